@@ -0,0 +1,190 @@
+"""
+In-app admission control.
+
+nginx rate-limits per client, but inside a worker every request competes
+for the same thread pool and database connections. AdmissionMiddleware
+sorts requests into route classes and admits at most `capacity` of them at
+a time per worker. Each class also has its own concurrency limit, so a burst
+of brand drill-downs or /api/debug calls cannot take every slot:
+
+- dashboard:  /api/dashboard and its sections (highest priority)
+- drilldown:  brand metrics, brand detail, sales time series, price classify
+- diagnostic: /api/debug, /api/test-sales-by-brand (lowest priority)
+
+Other routes (/health, logos, the SSE stream) are cheap or long-lived and
+are never queued. A request that cannot start waits in its class's bounded
+FIFO queue. Freed slots go to the highest-priority class with a waiter that
+is under its limit. When the queue is full, or the wait exceeds
+queue_timeout_seconds, the request is answered with 503 and Retry-After
+straight away, instead of piling up behind the slow requests.
+"""
+from collections import deque
+from typing import Deque, Dict, List, NamedTuple, Optional, Pattern
+import asyncio
+import logging
+import re
+import time
+
+from starlette.datastructures import MutableHeaders
+from starlette.responses import JSONResponse
+
+logger = logging.getLogger(__name__)
+
+class RouteClass(NamedTuple):
+    name: str
+    priority: int  # lower is admitted first
+    paths: List[Pattern]
+
+DASHBOARD = "dashboard"
+DRILLDOWN = "drilldown"
+DIAGNOSTIC = "diagnostic"
+
+ROUTE_CLASSES = [
+    RouteClass(DASHBOARD, 0, [re.compile(r"^/api/dashboard$"), re.compile(r"^/api/dashboard/sections/[^/]+$")]),
+    RouteClass(DRILLDOWN, 1, [
+        re.compile(r"^/api/brand/[^/]+$"),
+        re.compile(r"^/api/brand/[^/]+/detailed$"),
+        re.compile(r"^/api/sales/timeseries$"),
+        re.compile(r"^/api/price-ranges/classify$"),
+    ]),
+    RouteClass(DIAGNOSTIC, 2, [re.compile(r"^/api/debug$"), re.compile(r"^/api/test-sales-by-brand$")]),
+]
+
+def route_class(path: str) -> Optional[RouteClass]:
+    """Class of a request path, None for routes that are not admission-controlled"""
+    for candidate in ROUTE_CLASSES:
+        if any(pattern.match(path) for pattern in candidate.paths):
+            return candidate
+    return None
+
+class Rejected(Exception):
+    """The request was not admitted (queue full or waited too long)"""
+
+    def __init__(self, reason: str):
+        super().__init__(reason)
+        self.reason = reason
+
+class _ClassState:
+    def __init__(self, route: RouteClass, limit: int, queue_size: int):
+        self.route = route
+        self.limit = limit
+        self.queue_size = queue_size
+        self.active = 0
+        self.waiters: Deque[asyncio.Future] = deque()
+        self.admitted = 0
+        self.rejected = 0
+
+class AdmissionController:
+    """Per-worker slots shared by the route classes, handed out by class priority"""
+
+    def __init__(self, capacity: int, limits: Dict[str, int], queue_sizes: Dict[str, int],
+                 queue_timeout_seconds: float):
+        self.capacity = capacity
+        self.queue_timeout_seconds = queue_timeout_seconds
+        self.active = 0
+        self._classes = {
+            route.name: _ClassState(route, min(limits.get(route.name, capacity), capacity),
+                                    queue_sizes.get(route.name, 0))
+            for route in ROUTE_CLASSES
+        }
+        self._by_priority = sorted(self._classes.values(), key=lambda state: state.route.priority)
+
+    def _can_start(self, state: _ClassState) -> bool:
+        return self.active < self.capacity and state.active < state.limit
+
+    def _start(self, state: _ClassState) -> None:
+        self.active += 1
+        state.active += 1
+        state.admitted += 1
+
+    async def acquire(self, name: str) -> None:
+        """Wait for a slot of class `name`; raises Rejected"""
+        state = self._classes[name]
+        if self._can_start(state):
+            self._start(state)
+            return
+        if len(state.waiters) >= state.queue_size:
+            state.rejected += 1
+            raise Rejected(f"{name} queue full ({state.queue_size} waiting)")
+
+        waiter = asyncio.get_running_loop().create_future()
+        state.waiters.append(waiter)
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), self.queue_timeout_seconds)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if waiter.done():
+                # Granted just as the wait ended: hand the slot on
+                self.release(name)
+            else:
+                waiter.cancel()
+                state.waiters.remove(waiter)
+            if isinstance(e, asyncio.TimeoutError):
+                state.rejected += 1
+                raise Rejected(f"{name} waited more than {self.queue_timeout_seconds}s")
+            raise
+
+    def release(self, name: str) -> None:
+        state = self._classes[name]
+        self.active -= 1
+        state.active -= 1
+        self._dispatch()
+
+    def _dispatch(self) -> None:
+        """Start queued requests, highest priority first, while slots are free"""
+        for state in self._by_priority:
+            while state.waiters and self._can_start(state):
+                waiter = state.waiters.popleft()
+                self._start(state)
+                waiter.set_result(None)
+            if self.active >= self.capacity:
+                return
+
+    def stats(self) -> dict:
+        return {
+            "capacity": self.capacity,
+            "active": self.active,
+            "classes": {
+                name: {"limit": state.limit, "active": state.active, "waiting": len(state.waiters),
+                       "admitted": state.admitted, "rejected": state.rejected}
+                for name, state in self._classes.items()
+            },
+        }
+
+class AdmissionMiddleware:
+    """ASGI middleware queuing requests per route class, 503 + Retry-After when overloaded"""
+
+    def __init__(self, app, controller: AdmissionController, retry_after_seconds: int = 2, server_timing: bool = True):
+        self.app = app
+        self.controller = controller
+        self.retry_after_seconds = retry_after_seconds
+        self.server_timing = server_timing
+
+    async def __call__(self, scope, receive, send):
+        route = route_class(scope.get("path", "")) if scope["type"] == "http" else None
+        if route is None:
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        try:
+            await self.controller.acquire(route.name)
+        except Rejected as e:
+            logger.warning(f"Rejected {scope.get('method', 'GET')} {scope['path']}: {e.reason}")
+            response = JSONResponse(
+                {"detail": f"Server busy, retry in {self.retry_after_seconds}s"},
+                status_code=503,
+                headers={"Retry-After": str(self.retry_after_seconds)}
+            )
+            await response(scope, receive, send)
+            return
+        queued_ms = (time.perf_counter() - started) * 1000
+
+        async def send_with_queue_time(message):
+            if message["type"] == "http.response.start" and self.server_timing:
+                MutableHeaders(scope=message).append("Server-Timing", f'queue;dur={queued_ms:.1f};desc="{route.name}"')
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_queue_time)
+        finally:
+            self.controller.release(route.name)
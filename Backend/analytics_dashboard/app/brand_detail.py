@@ -0,0 +1,219 @@
+"""
+Brand drill-down figures read from the per-brand materialized views.
+
+BrandViewMonitor decides whether the views may be used. It reads the last
+successful entry of brand_view_refresh_log, at most every check_seconds, and
+compares the loads it covers with the loaded data version (both from the ETL
+load manifest, see load_manifest.data_version). The views are fresh
+while those match and the sales window they hold covers the request. In
+every other case (no views yet, a refresh running or failed after a load)
+the endpoint falls back to the live queries. The status describes which
+source answered and how old the views are, for the response.
+
+The reads return the same shapes as the live helpers in main.py, so the
+endpoint assembles its response the same way from either source.
+"""
+from datetime import datetime, timezone
+from typing import Callable, List, NamedTuple, Optional
+import logging
+import threading
+import time
+
+from sqlalchemy import Date, and_, bindparam, cast, column, func, select, table, text
+from sqlalchemy.orm import Session
+
+from .brand_views import OK
+from .dimensions import Dimensions
+from .load_manifest import data_version
+from .models import DimDate
+from .snapshot import AgeGroupCount, PriceRangeCount
+from .statements import PreparedQuery, QueryRunner
+
+logger = logging.getLogger(__name__)
+
+class RefreshEntry(NamedTuple):
+    finished_at: datetime
+    version: str               # load_manifest.data_version of the loads it covers, as DataVersion.key()
+    sales_start_date_key: int  # oldest day in mv_brand_model_sales_daily
+
+class BrandViewStatus(NamedTuple):
+    fresh: bool
+    refresh: Optional[RefreshEntry]
+
+    def covers(self, start_date_key: int) -> bool:
+        """The views hold the latest load and sales back to start_date_key"""
+        return self.fresh and self.refresh.sales_start_date_key <= start_date_key
+
+    def describe(self, source: str) -> dict:
+        """Staleness indicator of a response: where it came from and how old the views are"""
+        refreshed_at = self.refresh.finished_at if self.refresh is not None else None
+        return {
+            "source": source,
+            "views_refreshed_at": refreshed_at.isoformat() if refreshed_at is not None else None,
+            "views_age_seconds": round((datetime.now(timezone.utc) - refreshed_at).total_seconds())
+            if refreshed_at is not None else None,
+            "views_stale": not self.fresh,
+        }
+
+# Sources of a drill-down response
+MATERIALIZED_VIEW = "materialized_view"
+LIVE = "live"
+
+# Through to_jsonb: a log created before the loaded_at columns existed reads them as NULL
+# until the next refresh adds them
+_LAST_REFRESH = text(
+    "SELECT finished_at, inventory_date_key, sales_date_key, sales_start_date_key, "
+    "(to_jsonb(l) ->> 'inventory_loaded_at')::timestamptz AS inventory_loaded_at, "
+    "(to_jsonb(l) ->> 'sales_loaded_at')::timestamptz AS sales_loaded_at "
+    "FROM brand_view_refresh_log l WHERE status = :status ORDER BY refresh_id DESC LIMIT 1"
+)
+
+class BrandViewMonitor:
+    """Last successful brand view refresh, re-read at most every check_seconds"""
+
+    def __init__(self, check_seconds: float, version: Callable[[Session], str], enabled: bool = True):
+        self.check_seconds = check_seconds
+        self.version = version
+        self.enabled = enabled
+        self._refresh: Optional[RefreshEntry] = None
+        self._checked_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def invalidate(self) -> None:
+        """Re-read on the next use (a new day was detected)"""
+        self._checked_at = None
+
+    def _due(self) -> bool:
+        return self._checked_at is None or time.monotonic() - self._checked_at >= self.check_seconds
+
+    def status(self, db: Session) -> BrandViewStatus:
+        if not self.enabled:
+            return BrandViewStatus(False, None)
+        if self._due():
+            with self._lock:
+                if self._due():
+                    self._refresh = self._load(db)
+                    self._checked_at = time.monotonic()
+        refresh = self._refresh
+        # The data version is checked on the same session, not on a second pooled connection
+        return BrandViewStatus(refresh is not None and refresh.version == self.version(db), refresh)
+
+    def _load(self, db: Session) -> Optional[RefreshEntry]:
+        # to_regclass first: querying a missing table would abort the request's transaction
+        if db.execute(text("SELECT to_regclass('brand_view_refresh_log')")).scalar() is None:
+            return None
+        row = db.execute(_LAST_REFRESH, {"status": OK}).first()
+        if row is None:
+            return None
+        version = data_version(row.inventory_date_key, row.inventory_loaded_at, row.sales_date_key, row.sales_loaded_at)
+        return RefreshEntry(row.finished_at, version, row.sales_start_date_key)
+
+mv_inventory = table("mv_brand_inventory", column("brand"), column("total_vehicles"), column("average_price"))
+mv_price_distribution = table("mv_brand_price_distribution", column("brand"), column("price_range_key"),
+                              column("inventory_count"))
+mv_inventory_age = table("mv_brand_inventory_age", column("brand"), column("age_group"), column("min_days_on_lot"),
+                         column("inventory_count"))
+mv_sales = table(
+    "mv_brand_model_sales_daily", column("brand"), column("model"), column("sale_date_key"), column("sales_count"),
+    column("total_revenue"), column("priced_count"), column("total_days_to_sell"), column("days_to_sell_count"),
+    column("capped_days_to_sell"), column("capped_days_to_sell_count")
+)
+dim_date = DimDate.__table__
+
+_sales_window = (
+    mv_sales.c.brand == bindparam("brand"),
+    mv_sales.c.sale_date_key >= bindparam("start_date_key"),
+    mv_sales.c.sale_date_key <= bindparam("end_date_key")
+)
+
+VIEW_INVENTORY = PreparedQuery("view_brand_inventory", select(
+    mv_inventory.c.total_vehicles, mv_inventory.c.average_price
+).where(mv_inventory.c.brand == bindparam("brand")))
+
+VIEW_PRICE_DISTRIBUTION = PreparedQuery("view_brand_price_distribution", select(
+    mv_price_distribution.c.price_range_key, mv_price_distribution.c.inventory_count
+).where(mv_price_distribution.c.brand == bindparam("brand")))
+
+VIEW_INVENTORY_AGE = PreparedQuery("view_brand_inventory_age", select(
+    mv_inventory_age.c.age_group, mv_inventory_age.c.inventory_count
+).where(mv_inventory_age.c.brand == bindparam("brand")).order_by(mv_inventory_age.c.min_days_on_lot))
+
+VIEW_MODEL_SALES = PreparedQuery("view_brand_model_sales", select(
+    mv_sales.c.model,
+    func.sum(mv_sales.c.sales_count).label("sales_count"),
+    func.sum(mv_sales.c.total_revenue).label("total_revenue"),
+    func.sum(mv_sales.c.priced_count).label("priced_count"),
+    func.sum(mv_sales.c.total_days_to_sell).label("total_days_to_sell"),
+    func.sum(mv_sales.c.days_to_sell_count).label("days_to_sell_count")
+).where(*_sales_window).group_by(mv_sales.c.model))
+
+# Same average as avg(days_to_sell) over 0 < days_to_sell <= 365, from the per-day sums
+VIEW_AVERAGE_DAYS_TO_SELL = PreparedQuery("view_brand_average_days_to_sell", select(
+    func.sum(mv_sales.c.capped_days_to_sell) / func.nullif(func.sum(mv_sales.c.capped_days_to_sell_count), 0)
+).where(*_sales_window))
+
+# Gap-filled ISO weeks of the window, like timeseries.sales_series(granularity="week", brand=...)
+_week_start = cast(func.date_trunc("week", dim_date.c.full_date), Date)
+VIEW_WEEKLY_SALES = PreparedQuery("view_brand_weekly_sales", select(
+    _week_start.label("period_start"),
+    func.coalesce(func.sum(mv_sales.c.sales_count), 0).label("sales_count"),
+    (func.sum(mv_sales.c.total_revenue) / func.nullif(func.sum(mv_sales.c.priced_count), 0)).label("avg_sale_price")
+).select_from(dim_date.outerjoin(mv_sales, and_(
+    mv_sales.c.sale_date_key == dim_date.c.date_key,
+    mv_sales.c.brand == bindparam("brand")
+))).where(
+    dim_date.c.date_key >= bindparam("start_date_key"),
+    dim_date.c.date_key <= bindparam("end_date_key")
+).group_by(_week_start).order_by(_week_start))
+
+def view_inventory(db: Session, queries: QueryRunner, dims: Dimensions, brand_name: str) -> dict:
+    """Latest-day inventory of a brand, shaped like main.get_brand_inventory(detailed=True)"""
+    row = queries.rows(db, VIEW_INVENTORY, brand=brand_name)
+    distribution = [
+        row for row in queries.rows(db, VIEW_PRICE_DISTRIBUTION, brand=brand_name)
+        if row.price_range_key in dims.price_ranges
+    ]
+    return {
+        "total_vehicles": row[0].total_vehicles if row else 0,
+        "relative_error": None,
+        "average_price": (row[0].average_price if row else None) or 0,
+        "price_distribution": [
+            PriceRangeCount(dims.range_name(result.price_range_key), result.inventory_count)
+            for result in sorted(distribution, key=lambda result: dims.range_order(result.price_range_key))
+        ],
+        "inventory_age": [
+            AgeGroupCount(result.age_group, result.inventory_count)
+            for result in queries.rows(db, VIEW_INVENTORY_AGE, brand=brand_name)
+        ],
+    }
+
+def view_sales_by_model(db: Session, queries: QueryRunner, brand_name: str,
+                        start_date_key: int, end_date_key: int) -> List[dict]:
+    """Shaped like main.get_brand_sales_by_model"""
+    rows = queries.rows(db, VIEW_MODEL_SALES, brand=brand_name, start_date_key=start_date_key,
+                        end_date_key=end_date_key)
+    models = []
+    for row in rows:
+        # Sums over days come back as numeric; the live query counts per vehicle in integers
+        priced_count, days_count = int(row.priced_count), int(row.days_to_sell_count)
+        total_revenue = float(row.total_revenue or 0)
+        models.append({
+            "model": row.model,
+            "sales_count": int(row.sales_count),
+            "avg_price": total_revenue / priced_count if priced_count else 0.0,
+            "total_revenue": total_revenue,
+            "avg_days_to_sell": float(int(row.total_days_to_sell or 0) / days_count) if days_count else 0.0
+        })
+    return sorted(models, key=lambda model: (-model["sales_count"], model["model"]))
+
+def view_average_days_to_sell(db: Session, queries: QueryRunner, brand_name: str,
+                              start_date_key: int, end_date_key: int):
+    return queries.scalar(db, VIEW_AVERAGE_DAYS_TO_SELL, brand=brand_name, start_date_key=start_date_key,
+                          end_date_key=end_date_key)
+
+def view_weekly_sales(db: Session, queries: QueryRunner, brand_name: str,
+                      start_date_key: int, end_date_key: int) -> List[dict]:
+    """Shaped like sales_series(..., ["sales_count", "avg_sale_price"], granularity="week", brand=...)"""
+    rows = queries.rows(db, VIEW_WEEKLY_SALES, brand=brand_name, start_date_key=start_date_key,
+                        end_date_key=end_date_key)
+    return [dict(row._mapping, sales_count=int(row.sales_count)) for row in rows]
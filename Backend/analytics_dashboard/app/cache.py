@@ -0,0 +1,84 @@
+"""
+In-process cache for dashboard and API payloads (the L1 of tiered_cache).
+
+Entries expire after their TTL and, once the cache is full, the least
+recently used one is evicted. The last good value of every cache group
+(e.g. a dashboard section, or one endpoint's parameters) is kept so a failing
+recompute can degrade to it instead of erroring the page; at most
+max_entries groups are remembered, least recently stored dropped first.
+"""
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional, Tuple
+import threading
+import time
+
+class CacheEntry:
+    __slots__ = ("value", "stored_at", "expires_at")
+
+    def __init__(self, value: Any, ttl_seconds: float):
+        self.value = value
+        self.stored_at = time.time()
+        self.expires_at = self.stored_at + ttl_seconds
+
+    @property
+    def fresh(self) -> bool:
+        return time.time() < self.expires_at
+
+class TTLCache:
+    """Thread-safe TTL + LRU cache with a last-good value per group"""
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, CacheEntry]" = OrderedDict()
+        self._last_good: "OrderedDict[Hashable, CacheEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Fresh value for key, or None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if not entry.fresh:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry.value
+
+    def set(self, key: Hashable, value: Any, ttl_seconds: float, group: Hashable = None) -> None:
+        entry = CacheEntry(value, ttl_seconds)
+        with self._lock:
+            self._entries.pop(key, None)
+            if len(self._entries) >= self.max_entries:
+                self._evict_expired()
+            if len(self._entries) >= self.max_entries:
+                self._entries.popitem(last=False)  # still full: drop the least recently used
+            self._entries[key] = entry
+            if group is not None:
+                self._last_good.pop(group, None)
+                self._last_good[group] = entry
+                if len(self._last_good) > self.max_entries:
+                    self._last_good.popitem(last=False)
+
+    def last_good(self, group: Hashable) -> Optional[Tuple[Any, float]]:
+        """(value, stored_at) of the most recent value stored for a group, even if expired"""
+        with self._lock:
+            entry = self._last_good.get(group)
+            return (entry.value, entry.stored_at) if entry is not None else None
+
+    def invalidate_where(self, predicate: Callable[[Hashable], bool]) -> int:
+        """Expire every key matching predicate; last-good values are kept"""
+        with self._lock:
+            keys = [key for key in self._entries if predicate(key)]
+            for key in keys:
+                del self._entries[key]
+            return len(keys)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def _evict_expired(self) -> None:
+        now = time.time()
+        for key in [k for k, e in self._entries.items() if e.expires_at <= now]:
+            del self._entries[key]
@@ -1,6 +1,6 @@
 import os
 from pydantic_settings import BaseSettings
-from typing import List
+from typing import Dict, List
 from urllib.parse import quote_plus
 
 def _get_database_url() -> str:
@@ -47,6 +47,114 @@ class Settings(BaseSettings):
     # Production settings
     debug: bool = False
     
+    # Query instrumentation (Server-Timing header, budget warnings)
+    server_timing_enabled: bool = True
+    query_budget_per_request: int = 25
+    query_repeat_threshold: int = 5
+    
+    # Server-Sent Events: how often each process checks for a newly loaded day
+    snapshot_poll_seconds: float = 60.0
+    sse_keepalive_seconds: float = 15.0
+    
+    # Admission control per worker (app/admission.py): at most admission_max_concurrent requests
+    # run at once; each route class (dashboard, drilldown, diagnostic) has its own limit and a
+    # bounded queue, and requests that find it full or wait too long get 503 + Retry-After
+    admission_enabled: bool = True
+    admission_max_concurrent: int = 16
+    admission_limits: Dict[str, int] = {"dashboard": 16, "drilldown": 6, "diagnostic": 1}
+    admission_queue_sizes: Dict[str, int] = {"dashboard": 64, "drilldown": 16, "diagnostic": 2}
+    admission_queue_timeout_seconds: float = 5.0
+    admission_retry_after_seconds: int = 2
+    
+    # statement_timeout (ms) of each helper's queries, set with SET LOCAL in its transaction; overrides
+    # are keyed by dashboard section or by debug / brand / brand_detailed / sales_timeseries, 0 = none.
+    # A timed-out helper serves its last good value marked stale. Running requests check every
+    # disconnect_poll_seconds whether their client left, and cancel their query if so
+    statement_timeout_ms: int = 10000
+    statement_timeouts_ms: Dict[str, int] = {"debug": 30000}
+    disconnect_poll_seconds: float = 0.5
+    
+    # Dashboard sections: cache TTL (default and per-section overrides, JSON in env)
+    # and how long to wait for a recompute before serving the last good value
+    dashboard_section_ttl_seconds: float = 300.0
+    dashboard_section_ttls: Dict[str, float] = {"kpis": 120.0, "recent_sales": 120.0}
+    dashboard_section_soft_timeout_seconds: float = 3.0
+    
+    # Top-N rankings (sales by brand, top models) over windows of at least this many
+    # days are answered from the per-day heavy-hitter sketches; 0 = always exact
+    ranking_sketch_min_days: int = 0
+    
+    # Estimate distinct VIN counts (KPIs, /api/debug, brand endpoints) from the daily
+    # HyperLogLog sketches, 0.81% relative standard error; ?approximate= overrides per request
+    approximate_distinct_counts: bool = False
+    
+    # Keep the latest inventory load (per etl_load_manifest) in memory as NumPy columns for the
+    # price-range, slow-moving and brand inventory figures; without a manifest a newer
+    # max(date_key) is picked up within this many seconds
+    inventory_snapshot_enabled: bool = True
+    inventory_snapshot_check_seconds: float = 30.0
+    
+    # dim_vehicle / dim_price_range are cached in each process and checked for changes this often
+    dimension_cache_check_seconds: float = 60.0
+    
+    # Directory shared by the workers of a host (tmpfs, e.g. /dev/shm/carvana-analytics):
+    # the inventory snapshot is memory-mapped from it and dashboard sections are computed
+    # once per host instead of once per worker; empty = everything per process
+    shared_store_dir: str = ""
+    
+    # Production server (gunicorn_conf.py). web_concurrency 0 = derive the worker count
+    # from the CPUs available to the container: workers_per_cpu each, at least 2, at most max_workers
+    server_host: str = "0.0.0.0"
+    server_port: int = 9515
+    web_concurrency: int = 0
+    workers_per_cpu: float = 2.0
+    max_workers: int = 8
+    worker_class: str = "uvicorn.workers.UvicornWorker"
+    # Threads per worker running the sync (SQL) endpoints; 0 = the anyio default of 40
+    worker_threads: int = 0
+    keepalive_seconds: int = 5
+    # Recycle a worker after this many requests (+ random jitter) to bound memory growth
+    max_requests: int = 1000
+    max_requests_jitter: int = 100
+    worker_timeout_seconds: int = 60
+    graceful_timeout_seconds: int = 30
+    
+    # Helper queries run as server-side prepared statements (PREPARE once per pooled connection,
+    # then EXECUTE); turn off behind a transaction-pooling proxy such as PgBouncer. Their results
+    # are cached per loaded data version for query_result_cache_ttl_seconds (0 disables)
+    prepared_statements: bool = True
+    query_result_cache_ttl_seconds: float = 300.0
+    query_result_cache_max_entries: int = 2048
+    
+    # /api/brand/{brand}/detailed reads the per-brand materialized views (app/brand_views.py)
+    # while their last refresh matches the latest manifest loads, checked this often
+    brand_views_enabled: bool = True
+    brand_views_check_seconds: float = 30.0
+    
+    # The reporting window (dashboard, brand metrics, KPIs) ends at the last day both fact
+    # tables were loaded for, read from etl_load_manifest at most this often; without a
+    # manifest it ends reporting_lag_days before today
+    load_manifest_enabled: bool = True
+    load_manifest_check_seconds: float = 30.0
+    reporting_lag_days: int = 2
+    
+    # Response cache (brand, time series, debug and dashboard sections): a per-process LRU
+    # in front of a shared tier, Redis when cache_redis_url is set (any server speaking the
+    # Redis protocol) or else shared_store_dir. Keys carry the latest load of each fact table
+    # (etl_load_manifest day and finished_at), re-read every cache_version_check_seconds, so a
+    # new load, a same-day re-run included, is a miss everywhere; the TTL bounds reuse
+    cache_l1_max_entries: int = 512
+    cache_redis_url: str = ""
+    cache_redis_namespace: str = "carvana-analytics"
+    cache_ttl_seconds: float = 3600.0
+    cache_lock_wait_seconds: float = 10.0
+    cache_version_check_seconds: float = 30.0
+    
+    # Brand logos written by sync_logos.py (content-hashed files + manifest.json); the
+    # /api/brand/{brand}/logo redirect may be cached this long, the files themselves forever
+    logo_dir: str = "logos"
+    logo_redirect_max_age_seconds: int = 3600
+    
     class Config:
         env_file = ".env"
 
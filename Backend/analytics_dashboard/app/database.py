@@ -1,10 +1,15 @@
 from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session, sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
+from typing import Optional
 import os
 import logging
+import threading
 from urllib.parse import quote_plus
 
+from .instrumentation import install_query_counter
+
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -29,17 +34,40 @@ if not DATABASE_URL:
     
     DATABASE_URL = f"postgresql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
 
-logger.info(f"Environment: {ENVIRONMENT}")
-logger.info(f"Database URL: {DATABASE_URL}")
-
-engine = create_engine(DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# The engine (and the psycopg2 dialect it loads) is created on first use, normally by
+# the app's lifespan, so importing the app stays cheap for tooling and worker boot
+engine: Optional[Engine] = None
+_engine_lock = threading.Lock()
+SessionLocal = sessionmaker(autocommit=False, autoflush=False)
 
 Base = declarative_base()
 
+def get_engine() -> Engine:
+    """Create the engine and bind SessionLocal to it on the first call"""
+    global engine
+    if engine is None:
+        with _engine_lock:
+            if engine is None:
+                logger.info(f"Environment: {ENVIRONMENT}")
+                logger.info(f"Database URL: {DATABASE_URL}")
+                created = create_engine(DATABASE_URL)
+                install_query_counter(created)
+                SessionLocal.configure(bind=created)
+                engine = created
+    return engine
+
+def dispose_engine() -> None:
+    """Close pooled connections (app shutdown)"""
+    if engine is not None:
+        engine.dispose()
+
+def new_session() -> Session:
+    get_engine()
+    return SessionLocal()
+
 # Dependency to get DB session
 def get_db():
-    db = SessionLocal()
+    db = new_session()
     try:
         yield db
     finally:
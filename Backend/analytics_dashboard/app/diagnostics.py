@@ -0,0 +1,165 @@
+"""
+Catalog-based data inventory for /api/debug.
+
+The exact summary (main.debug_summary) runs min / max / count and two
+count(DISTINCT vin) over the fact tables, which means several full scans on
+a large warehouse. catalog_summary answers the same questions from
+metadata, in a few milliseconds:
+
+- row counts: pg_class.reltuples (as of the last ANALYZE / VACUUM)
+- latest loaded day and its active inventory: etl_load_manifest, written by
+  the ETL for every day it loads (load_manifest.py)
+- earliest day, and the latest one before any load was recorded: the
+  smallest and largest date_key in pg_stats, over the histogram bounds and
+  the most common values (a column whose values all fit in the most common
+  values list has no histogram)
+- distinct VINs: pg_stats.n_distinct of the vin column
+
+Every figure except the manifest's is an estimate. The response says when
+the statistics were last gathered. `?exact=true` runs the exact summary.
+"""
+from datetime import date
+from typing import Dict, List, Optional
+import logging
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+# Fact table -> its date_key column
+FACT_DATE_COLUMNS = {"fact_daily_inventory": "date_key", "fact_sales_events": "sale_date_key"}
+DIMENSION_TABLES = ["dim_vehicle", "dim_price_range"]
+
+# Loads listed in the response, most recent first
+RECENT_LOADS = 10
+
+_TABLE_STATS = text("""
+    SELECT c.relname, c.reltuples, greatest(s.last_analyze, s.last_autoanalyze) AS analyzed_at
+    FROM pg_class c
+    LEFT JOIN pg_stat_user_tables s ON s.relid = c.oid
+    WHERE c.relname = ANY(:tables) AND c.relkind IN ('r', 'p') AND pg_table_is_visible(c.oid)
+""")
+
+_COLUMN_STATS = text("""
+    SELECT tablename, attname, n_distinct, histogram_bounds::text AS histogram_bounds,
+           most_common_vals::text AS most_common_vals
+    FROM pg_stats
+    WHERE schemaname = current_schema() AND tablename = ANY(:tables) AND attname = ANY(:columns)
+""")
+
+# Days recorded with no rows (a re-run that found nothing) are not loaded days
+_MANIFEST_RANGES = text("""
+    SELECT table_name, min(date_key) AS min_date_key, max(date_key) AS max_date_key,
+           count(*) AS days, sum(row_count) AS row_count
+    FROM etl_load_manifest
+    WHERE row_count > 0
+    GROUP BY table_name
+""")
+
+_LOAD = text("""
+    SELECT details
+    FROM etl_load_manifest
+    WHERE table_name = :table_name AND date_key = :date_key
+""")
+
+_RECENT_LOADS = text("""
+    SELECT table_name, date_key, row_count, finished_at, duration_ms, details
+    FROM etl_load_manifest
+    ORDER BY finished_at DESC
+    LIMIT :limit
+""")
+
+def _stats_range(histogram_bounds: Optional[str], most_common_vals: Optional[str]) -> Dict[str, Optional[int]]:
+    """Smallest and largest value of an integer column in pg_stats, from arrays like "{20240101,...,20261017}" """
+    values = [
+        int(value)
+        for array in (histogram_bounds, most_common_vals) if array
+        for value in array.strip("{}").split(",") if value
+    ]
+    if not values:
+        return {"min": None, "max": None}
+    return {"min": min(values), "max": max(values)}
+
+def _distinct_estimate(n_distinct: Optional[float], reltuples: Optional[float]) -> Optional[int]:
+    """pg_stats.n_distinct is a count when positive and minus a fraction of the rows when negative"""
+    if n_distinct is None:
+        return None
+    if n_distinct >= 0:
+        return int(n_distinct)
+    return int(-n_distinct * reltuples) if reltuples else None
+
+def manifest_available(db: Session) -> bool:
+    # to_regclass first: querying a missing table would abort the request's transaction
+    return db.execute(text("SELECT to_regclass('etl_load_manifest')")).scalar() is not None
+
+def catalog_summary(db: Session) -> dict:
+    """Data inventory from pg_class, pg_stats and etl_load_manifest (no fact table scans)"""
+    tables = list(FACT_DATE_COLUMNS) + DIMENSION_TABLES
+    table_stats = {row.relname: row for row in db.execute(_TABLE_STATS, {"tables": tables})}
+    column_stats = {
+        (row.tablename, row.attname): row
+        for row in db.execute(_COLUMN_STATS, {"tables": list(FACT_DATE_COLUMNS),
+                                              "columns": list(FACT_DATE_COLUMNS.values()) + ["vin"]})
+    }
+
+    def reltuples(table: str) -> Optional[int]:
+        row = table_stats.get(table)
+        # -1: never analyzed or vacuumed (PostgreSQL 14+); 0 may mean the same on older versions
+        return int(row.reltuples) if row is not None and row.reltuples >= 0 else None
+
+    manifest: Dict[str, dict] = {}
+    recent_loads: List[dict] = []
+    if manifest_available(db):
+        manifest = {row.table_name: row._asdict() for row in db.execute(_MANIFEST_RANGES)}
+        recent_loads = [
+            {**row._asdict(), "details": row.details or {}}
+            for row in db.execute(_RECENT_LOADS, {"limit": RECENT_LOADS})
+        ]
+
+    date_ranges = {}
+    for table, column in FACT_DATE_COLUMNS.items():
+        stats = column_stats.get((table, column))
+        estimated = _stats_range(stats.histogram_bounds, stats.most_common_vals) if stats else _stats_range(None, None)
+        if table in manifest:
+            # Days loaded before the manifest existed are only in the statistics
+            lows = [key for key in (manifest[table]["min_date_key"], estimated["min"]) if key is not None]
+            date_ranges[table] = {"min": min(lows), "max": manifest[table]["max_date_key"], "source": "manifest"}
+        else:
+            date_ranges[table] = {**estimated, "source": "pg_stats"}
+
+    inventory_vins = column_stats.get(("fact_daily_inventory", "vin"))
+    latest_inventory = None
+    if "fact_daily_inventory" in manifest:
+        # Read by key: the latest day is not among the recent loads when older days were re-run since
+        latest_inventory = db.execute(_LOAD, {"table_name": "fact_daily_inventory",
+                                              "date_key": manifest["fact_daily_inventory"]["max_date_key"]}).first()
+
+    analyzed = [row.analyzed_at for row in table_stats.values() if row.analyzed_at is not None]
+    return {
+        "mode": "catalog",
+        "today_key": int(date.today().strftime("%Y%m%d")),
+        "inventory_date_range": date_ranges["fact_daily_inventory"],
+        "sales_date_range": date_ranges["fact_sales_events"],
+        "record_counts": {
+            "inventory": reltuples("fact_daily_inventory"),
+            "sales": reltuples("fact_sales_events"),
+            "vehicles": reltuples("dim_vehicle"),
+            "price_ranges": reltuples("dim_price_range")
+        },
+        "inventory_summary": {
+            # Distinct VINs ever on the lot (pg_stats cannot filter on status)
+            "distinct_vins_estimate": _distinct_estimate(
+                inventory_vins.n_distinct if inventory_vins else None, reltuples("fact_daily_inventory")
+            ),
+            "most_recent": (latest_inventory.details or {}).get("active") if latest_inventory else None
+        },
+        "statistics_analyzed_at": min(analyzed) if analyzed else None,
+        "manifest": {
+            "tables": {
+                table: {"days": stats["days"], "row_count": int(stats["row_count"])}
+                for table, stats in manifest.items()
+            },
+            "recent_loads": recent_loads
+        }
+    }
@@ -0,0 +1,134 @@
+"""
+In-process cache of the small dimension tables.
+
+dim_vehicle and dim_price_range hold a few thousand rows and only change
+when the ETL adds vehicles or bands, yet most fact queries joined them just
+to read brand / manufacturer / model or range_name. With this cache the
+fact queries group by vehicle_key / price_range_key alone and the labels are
+resolved in Python; a brand filter becomes vehicle_key IN (the brand's keys).
+
+The cache compares a checksum of both tables at most every check_seconds
+(or on the next use after invalidate() or a lookup of an unknown key) and
+reloads them when it changed.
+"""
+from collections import defaultdict
+from typing import Dict, List, NamedTuple, Optional
+import logging
+import threading
+import time
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from .models import DimPriceRange, DimVehicle
+
+logger = logging.getLogger(__name__)
+
+# md5 of every row of each table: cheap on tables this size, and catches edits as well as inserts
+VERSION_SQL = text("""
+    SELECT
+        (SELECT md5(coalesce(string_agg(v::text, '|' ORDER BY v.vehicle_key), '')) FROM dim_vehicle v),
+        (SELECT md5(coalesce(string_agg(p::text, '|' ORDER BY p.price_range_key), '')) FROM dim_price_range p)
+""")
+
+class VehicleLabels(NamedTuple):
+    manufacturer: str
+    model: str
+    brand: Optional[str]
+
+# Labels of a vehicle_key the cache does not know yet (added since the last refresh)
+UNKNOWN_VEHICLE = VehicleLabels("Unknown", "Unknown", None)
+
+class PriceRangeLabels(NamedTuple):
+    range_name: str
+    min_price: float
+    max_price: float
+
+class Dimensions:
+    """One loaded version of dim_vehicle and dim_price_range"""
+
+    def __init__(self, version: tuple, vehicles: Dict[int, VehicleLabels], price_ranges: Dict[int, PriceRangeLabels]):
+        self.version = version
+        self.vehicles = vehicles
+        self.price_ranges = price_ranges
+        self.missed = False  # a lookup found no label, so the tables have probably changed
+        self._brand_keys: Dict[str, List[int]] = defaultdict(list)
+        for vehicle_key, labels in vehicles.items():
+            if labels.brand is not None:
+                self._brand_keys[labels.brand].append(vehicle_key)
+
+    def vehicle(self, vehicle_key: Optional[int]) -> VehicleLabels:
+        labels = self.vehicles.get(vehicle_key)
+        if labels is None:
+            self.missed = True
+            return UNKNOWN_VEHICLE
+        return labels
+
+    def brand_vehicle_keys(self, brand: str) -> List[int]:
+        """vehicle_keys of a brand (empty for an unknown brand)"""
+        return self._brand_keys.get(brand, [])
+
+    def range_name(self, price_range_key: Optional[int]) -> Optional[str]:
+        price_range = self.price_ranges.get(price_range_key)
+        return price_range.range_name if price_range is not None else None
+
+    def range_order(self, price_range_key: int) -> float:
+        """Sort key putting price ranges in min_price order"""
+        return self.price_ranges[price_range_key].min_price
+
+def load_dimensions(db: Session, version: tuple) -> Dimensions:
+    vehicles = {
+        row.vehicle_key: VehicleLabels(row.manufacturer, row.model, row.brand)
+        for row in db.query(DimVehicle.vehicle_key, DimVehicle.manufacturer, DimVehicle.model, DimVehicle.brand)
+    }
+    price_ranges = {
+        row.price_range_key: PriceRangeLabels(row.range_name, float(row.min_price), float(row.max_price))
+        for row in db.query(
+            DimPriceRange.price_range_key, DimPriceRange.range_name, DimPriceRange.min_price, DimPriceRange.max_price
+        )
+    }
+    return Dimensions(version, vehicles, price_ranges)
+
+class DimensionCache:
+    """Holds the current Dimensions, reloading them when the tables change"""
+
+    def __init__(self, check_seconds: float):
+        self.check_seconds = check_seconds
+        self._dimensions: Optional[Dimensions] = None
+        self._checked_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def invalidate(self) -> None:
+        """Compare the table checksums on the next use (e.g. after an ETL load)"""
+        self._checked_at = None
+
+    def _due(self) -> bool:
+        if self._checked_at is None or self._dimensions is None or self._dimensions.missed:
+            return True
+        return time.monotonic() - self._checked_at >= self.check_seconds
+
+    def get(self, db: Session) -> Dimensions:
+        if not self._due():
+            return self._dimensions
+
+        with self._lock:
+            if self._due():  # another thread may have refreshed while we waited
+                try:
+                    self._refresh(db)
+                except Exception as e:
+                    if self._dimensions is None:
+                        raise
+                    logger.error(f"Dimension refresh failed, keeping version {self._dimensions.version}: {str(e)}")
+                self._checked_at = time.monotonic()
+        return self._dimensions
+
+    def _refresh(self, db: Session) -> None:
+        version = tuple(db.execute(VERSION_SQL).one())
+        if self._dimensions is not None and self._dimensions.version == version:
+            self._dimensions.missed = False  # nothing new to load
+            return
+        self._dimensions = load_dimensions(db, version)
+        logger.info(
+            f"Loaded {len(self._dimensions.vehicles)} vehicles and "
+            f"{len(self._dimensions.price_ranges)} price ranges into the dimension cache"
+        )
@@ -0,0 +1,170 @@
+"""
+Server-Sent Events for dashboard snapshot changes.
+
+The warehouse changes once a day, so instead of every browser tab polling
+/api/dashboard, each API process polls the latest load of each fact table
+and pushes a `snapshot` event to its subscribers when it changes. Clients
+refetch only the sections named in the event.
+
+The latest load is the newest etl_load_manifest row of the table (its day
+and finished_at), which the ETL writes only after the day's rows have
+committed: an event never fires in the middle of a load, and re-running a
+day fires one too. A table the manifest has no load of falls back to its
+max(date_key).
+"""
+from datetime import datetime
+from typing import Callable, Optional, Set
+import asyncio
+import json
+import logging
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from .database import new_session
+from .freshness import LoadedDays, read_loaded_days
+from .instrumentation import clear_query_stats
+from .models import FactDailyInventory, FactSalesEvents
+
+logger = logging.getLogger(__name__)
+
+# Dashboard sections that depend on each fact table
+INVENTORY_SECTIONS = [
+    "kpis", "inventory_by_price_range", "days_on_lot_by_price_range", "slow_moving_inventory"
+]
+SALES_SECTIONS = [
+    "kpis", "daily_sales_trend", "sales_by_brand", "top_selling_models", "recent_sales"
+]
+
+# How long EventSource waits before reconnecting after a dropped stream
+RECONNECT_MS = 5000
+
+def snapshot_version(loaded: Optional[LoadedDays], db: Session) -> dict:
+    """Latest load of each fact table: <table>_date_key and <table>_loaded_at (None without a manifest row)"""
+    version = {}
+    for prefix, loads, column in (("inventory", loaded.inventory if loaded else None, FactDailyInventory.date_key),
+                                  ("sales", loaded.sales if loaded else None, FactSalesEvents.sale_date_key)):
+        latest = loads.latest if loads is not None else None
+        if latest is not None:
+            version[f"{prefix}_date_key"], version[f"{prefix}_loaded_at"] = latest.date_key, latest.finished_at
+        else:
+            version[f"{prefix}_date_key"], version[f"{prefix}_loaded_at"] = db.query(func.max(column)).scalar(), None
+    return version
+
+def load_snapshot_version(db: Optional[Session] = None,
+                          loaded_days: Callable[[Session], Optional[LoadedDays]] = read_loaded_days) -> dict:
+    """snapshot_version of the loaded days (read from the manifest by default), on db or else a session of its own"""
+    session = db if db is not None else new_session()
+    try:
+        return snapshot_version(loaded_days(session), session)
+    finally:
+        if db is None:
+            session.close()
+
+def changed_sections(previous: Optional[dict], current: dict) -> list:
+    """Dashboard sections affected by a version change, in a stable order"""
+    if previous is None:
+        return []
+    sections = []
+    for prefix, table_sections in (("inventory", INVENTORY_SECTIONS), ("sales", SALES_SECTIONS)):
+        fields = (f"{prefix}_date_key", f"{prefix}_loaded_at")
+        if any(previous.get(field) != current.get(field) for field in fields):
+            sections += table_sections
+    return list(dict.fromkeys(sections))
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+def format_event(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=_json_default)}\n\n"
+
+class SnapshotNotifier:
+    """One poller per process, fanned out to every connected SSE client.
+
+    The poll task only runs while at least one client is subscribed, so a
+    process without open dashboards does no background queries at all.
+    """
+
+    def __init__(self, poll_seconds: float, version_loader=load_snapshot_version, on_change=None):
+        self.poll_seconds = poll_seconds
+        self.version_loader = version_loader
+        self.on_change = on_change  # called with the changed sections before clients are notified
+        self.version: Optional[dict] = None
+        self._subscribers: Set[asyncio.Queue] = set()
+        self._task: Optional[asyncio.Task] = None
+        self._ready = asyncio.Event()
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    async def subscribe(self) -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue(maxsize=16)
+        self._subscribers.add(queue)
+        if self._task is None or self._task.done():
+            self._ready = asyncio.Event()
+            self._task = asyncio.create_task(self._poll())
+        await self._ready.wait()
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue) -> None:
+        self._subscribers.discard(queue)
+        if not self._subscribers and self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def publish(self, event: str, data: dict) -> None:
+        for queue in list(self._subscribers):
+            try:
+                queue.put_nowait((event, data))
+            except asyncio.QueueFull:
+                # A client that stopped reading only needs the latest state
+                logger.warning("Dropping SSE event for a slow subscriber")
+
+    async def _poll(self) -> None:
+        clear_query_stats()  # the task inherits the first subscriber's request context
+        try:
+            # Nobody was listening before this task started, so the cached version may be stale
+            self.version = await run_in_threadpool(self.version_loader)
+        except Exception as e:
+            logger.error(f"Snapshot version load failed: {str(e)}")
+        finally:
+            self._ready.set()
+
+        while True:
+            await asyncio.sleep(self.poll_seconds)
+            try:
+                current = await run_in_threadpool(self.version_loader)
+            except Exception as e:
+                logger.error(f"Snapshot version poll failed: {str(e)}")
+                continue
+            if self.version is None:
+                self.version = current
+                continue
+            sections = changed_sections(self.version, current)
+            if sections:
+                logger.info(f"Snapshot changed {self.version} -> {current}, notifying {self.subscriber_count} clients")
+                self.version = current
+                if self.on_change is not None:
+                    self.on_change(sections)
+                self.publish("snapshot", {**current, "changed_sections": sections})
+
+    async def stream(self, request, keepalive_seconds: float):
+        """Async generator of SSE frames for one client"""
+        queue = await self.subscribe()
+        try:
+            yield f"retry: {RECONNECT_MS}\n\n"
+            yield format_event("snapshot", {**(self.version or {}), "changed_sections": []})
+            while True:
+                try:
+                    event, data = await asyncio.wait_for(queue.get(), timeout=keepalive_seconds)
+                    yield format_event(event, data)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        break
+                    yield ": keepalive\n\n"
+        finally:
+            self.unsubscribe(queue)
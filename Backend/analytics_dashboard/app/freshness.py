@@ -0,0 +1,207 @@
+"""
+Loaded days from the ETL load manifest (etl_load_manifest, see load_manifest.py).
+
+The API used to assume data lags two days behind the calendar and probe the
+fact tables when a day turned out to be missing. LoadManifest reads which
+days each fact table has been loaded for, at most every check_seconds, so
+that:
+
+- the reporting window ends at the last day both fact tables were loaded for
+  (LoadedDays.anchor_date_key), instead of today minus a fixed lag
+- helpers resolve "this day, else the latest loaded one" with a lookup
+  instead of count / max queries (LoadedDays.inventory_date_key)
+- /api/freshness reports per table the latest loaded day, when it was loaded,
+  the Iceberg snapshot it was read from, its quality checks and the days
+  missing from the window
+
+Without a manifest (no ETL run has written one yet, or it is disabled),
+everything answers None and callers keep the lag and the probe queries.
+"""
+from datetime import date, datetime, timedelta, timezone
+from typing import Callable, FrozenSet, List, NamedTuple, Optional
+import logging
+import threading
+import time
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from .database import new_session
+from .load_manifest import load_id
+
+logger = logging.getLogger(__name__)
+
+INVENTORY_TABLE = "fact_daily_inventory"
+SALES_TABLE = "fact_sales_events"
+
+_LOADED_DAYS = text("""
+    SELECT table_name, min(date_key) AS first_date_key,
+           array_agg(date_key ORDER BY date_key) FILTER (WHERE row_count > 0) AS date_keys
+    FROM etl_load_manifest
+    WHERE table_name = ANY(:tables)
+    GROUP BY table_name
+""")
+
+# Through to_jsonb: a manifest created before iceberg_snapshot_id / quality_checks existed
+# reads them as NULL until the next ETL run adds the columns
+_LATEST_LOADS = text("""
+    SELECT DISTINCT ON (table_name) table_name, date_key, row_count, started_at, finished_at, duration_ms,
+           (to_jsonb(m) ->> 'iceberg_snapshot_id')::bigint AS iceberg_snapshot_id,
+           to_jsonb(m) -> 'quality_checks' AS quality_checks
+    FROM etl_load_manifest m
+    WHERE table_name = ANY(:tables) AND row_count > 0
+    ORDER BY table_name, date_key DESC
+""")
+
+def _to_date(date_key: int) -> date:
+    return datetime.strptime(str(date_key), "%Y%m%d").date()
+
+def _to_key(day: date) -> int:
+    return int(day.strftime("%Y%m%d"))
+
+class LoadRecord(NamedTuple):
+    date_key: int
+    row_count: int
+    started_at: datetime
+    finished_at: datetime
+    duration_ms: int
+    iceberg_snapshot_id: Optional[int]
+    quality_checks: Optional[dict]
+
+    @property
+    def load_id(self) -> str:
+        return load_id(self.date_key, self.finished_at)
+
+class TableLoads(NamedTuple):
+    table_name: str
+    first_date_key: int          # earliest day in the manifest (days before it predate the manifest)
+    date_keys: FrozenSet[int]    # days loaded with at least one row
+    latest: Optional[LoadRecord]  # load of the latest day with rows
+
+    @property
+    def latest_date_key(self) -> Optional[int]:
+        return self.latest.date_key if self.latest is not None else None
+
+    def missing(self, start_date_key: int, end_date_key: int) -> List[int]:
+        """Days of [start, end] the manifest covers but has no rows for"""
+        day, end = _to_date(max(start_date_key, self.first_date_key)), _to_date(end_date_key)
+        missing = []
+        while day <= end:
+            if _to_key(day) not in self.date_keys:
+                missing.append(_to_key(day))
+            day += timedelta(days=1)
+        return missing
+
+class LoadedDays(NamedTuple):
+    inventory: Optional[TableLoads]
+    sales: Optional[TableLoads]
+
+    def anchor_date_key(self) -> Optional[int]:
+        """Last day both fact tables were loaded for, None unless the manifest has both"""
+        if self.inventory is None or self.sales is None:
+            return None
+        if self.inventory.latest is None or self.sales.latest is None:
+            return None
+        return min(self.inventory.latest_date_key, self.sales.latest_date_key)
+
+    def inventory_date_key(self, date_key: int) -> Optional[int]:
+        """date_key if inventory was loaded for it, else the latest loaded day; None when the manifest cannot tell"""
+        loads = self.inventory
+        if loads is None or loads.latest is None or date_key < loads.first_date_key:
+            return None
+        return date_key if date_key in loads.date_keys else loads.latest_date_key
+
+class LoadManifest:
+    """
+    The manifest's loaded days, re-read at most every check_seconds. A caller
+    holding a session passes it as db, so the re-read never waits on the pool
+    for a second connection; without one it opens a session of its own.
+    """
+
+    def __init__(self, check_seconds: float, enabled: bool = True, session_factory: Callable = new_session):
+        self.check_seconds = check_seconds
+        self.enabled = enabled
+        self.session_factory = session_factory
+        self._loaded: Optional[LoadedDays] = None
+        self._checked_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def invalidate(self) -> None:
+        """Re-read on the next use (a new day was detected)"""
+        self._checked_at = None
+
+    def _due(self) -> bool:
+        return self._checked_at is None or time.monotonic() - self._checked_at >= self.check_seconds
+
+    def current(self, db: Optional[Session] = None) -> Optional[LoadedDays]:
+        """Loaded days, or None without a manifest. Blocking: call it from the threadpool"""
+        if not self.enabled:
+            return None
+        if self._due():
+            with self._lock:
+                if self._due():
+                    try:
+                        self._loaded = self._load(db) if db is not None else self._load_own()
+                    except Exception as e:
+                        logger.error(f"Load manifest read failed, keeping the previous one: {str(e)}")
+                    self._checked_at = time.monotonic()
+        return self._loaded
+
+    def _load_own(self) -> Optional[LoadedDays]:
+        db = self.session_factory()
+        try:
+            return self._load(db)
+        finally:
+            db.close()
+
+    def _load(self, db: Session) -> Optional[LoadedDays]:
+        return read_loaded_days(db)
+
+def read_loaded_days(db: Session) -> Optional[LoadedDays]:
+    """Loaded days straight from the manifest, None without one"""
+    # A savepoint, so a failed read leaves the caller's transaction usable
+    with db.begin_nested():
+        # to_regclass first: querying a missing table would abort the transaction
+        if db.execute(text("SELECT to_regclass('etl_load_manifest')")).scalar() is None:
+            return None
+        params = {"tables": [INVENTORY_TABLE, SALES_TABLE]}
+        latest = {
+            row.table_name: LoadRecord(row.date_key, row.row_count, row.started_at, row.finished_at,
+                                       row.duration_ms, row.iceberg_snapshot_id, row.quality_checks)
+            for row in db.execute(_LATEST_LOADS, params)
+        }
+        tables = {
+            row.table_name: TableLoads(row.table_name, row.first_date_key, frozenset(row.date_keys or ()),
+                                       latest.get(row.table_name))
+            for row in db.execute(_LOADED_DAYS, params)
+        }
+    if not tables:
+        return None
+    return LoadedDays(tables.get(INVENTORY_TABLE), tables.get(SALES_TABLE))
+
+def freshness_report(loaded: Optional[LoadedDays], start_date_key: int, end_date_key: int) -> dict:
+    """/api/freshness: the reporting window and, per fact table, its latest load"""
+    now = datetime.now(timezone.utc)
+    anchor = loaded.anchor_date_key() if loaded is not None else None
+    tables = {}
+    for loads in ((loaded.inventory, loaded.sales) if loaded is not None else ()):
+        if loads is None:
+            continue
+        latest = loads.latest
+        tables[loads.table_name] = {
+            "latest_date_key": loads.latest_date_key,
+            "days_behind": (now.date() - _to_date(latest.date_key)).days if latest else None,
+            "loaded_at": latest.finished_at if latest else None,
+            "age_seconds": round((now - latest.finished_at).total_seconds()) if latest else None,
+            "row_count": latest.row_count if latest else None,
+            "duration_ms": latest.duration_ms if latest else None,
+            "iceberg_snapshot_id": latest.iceberg_snapshot_id if latest else None,
+            "quality_checks": (latest.quality_checks or {}) if latest else None,
+            "missing_date_keys": loads.missing(start_date_key, end_date_key),
+        }
+    return {
+        "anchor_date_key": end_date_key,
+        "anchor_source": "manifest" if anchor is not None else "lag",
+        "window": {"start_date_key": start_date_key, "end_date_key": end_date_key},
+        "tables": tables,
+    }
@@ -0,0 +1,121 @@
+"""
+Per-request SQL instrumentation.
+
+SQLAlchemy engine events count every statement and its cursor time into a
+per-request accumulator held in a context variable. QueryCountMiddleware
+creates the accumulator, reports it in a Server-Timing header (visible in the
+browser devtools "Timing" tab) and logs a warning when a request goes over
+the statement budget or repeats the same statement (N+1 pattern).
+"""
+from collections import Counter
+from contextvars import ContextVar
+from typing import Optional
+import logging
+import time
+
+from sqlalchemy import event
+from starlette.datastructures import MutableHeaders
+
+logger = logging.getLogger(__name__)
+
+class RequestQueryStats:
+    """Statements and DB time accumulated for one request"""
+
+    def __init__(self):
+        self.statements = 0
+        self.db_seconds = 0.0
+        self.statement_counts = Counter()
+
+    @property
+    def db_ms(self) -> float:
+        return self.db_seconds * 1000
+
+    def most_repeated(self):
+        """(statement, count) of the most repeated statement, or (None, 0)"""
+        if not self.statement_counts:
+            return None, 0
+        return self.statement_counts.most_common(1)[0]
+
+_request_stats: ContextVar[Optional[RequestQueryStats]] = ContextVar("request_query_stats", default=None)
+
+def current_query_stats() -> Optional[RequestQueryStats]:
+    return _request_stats.get()
+
+def clear_query_stats() -> None:
+    """Stop attributing queries in the current context (e.g. a background task) to a request"""
+    _request_stats.set(None)
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+def _record(conn, statement) -> None:
+    started = conn.info["query_start_time"].pop()
+    stats = _request_stats.get()
+    if stats is not None:
+        stats.statements += 1
+        stats.db_seconds += time.perf_counter() - started
+        stats.statement_counts[statement] += 1
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    _record(conn, statement)
+
+def _handle_error(exception_context):
+    # A failed statement (timeout, cancel, error) never reaches after_cursor_execute:
+    # pop its start time here so it does not stay on the pooled connection, and count it
+    conn = exception_context.connection
+    if conn is not None and exception_context.execution_context is not None and conn.info.get("query_start_time"):
+        _record(conn, exception_context.statement)
+
+def install_query_counter(engine) -> None:
+    """Attach the statement counting events to an engine"""
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+        event.listen(engine, "handle_error", _handle_error)
+
+class QueryCountMiddleware:
+    """ASGI middleware adding `Server-Timing: db;dur=..;desc="N queries"` to responses"""
+
+    def __init__(self, app, statement_budget: int = 25, repeat_threshold: int = 5, server_timing: bool = True):
+        self.app = app
+        self.statement_budget = statement_budget
+        self.repeat_threshold = repeat_threshold
+        self.server_timing = server_timing
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestQueryStats()
+        token = _request_stats.set(stats)
+        started = time.perf_counter()
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start" and self.server_timing:
+                total_ms = (time.perf_counter() - started) * 1000
+                headers = MutableHeaders(scope=message)
+                headers.append(
+                    "Server-Timing",
+                    f'db;dur={stats.db_ms:.1f};desc="{stats.statements} queries", app;dur={total_ms:.1f}'
+                )
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _request_stats.reset(token)
+            self._check_budget(scope, stats)
+
+    def _check_budget(self, scope, stats: RequestQueryStats) -> None:
+        path = scope.get("path", "")
+        if stats.statements > self.statement_budget:
+            logger.warning(
+                f"Query budget exceeded on {scope.get('method', 'GET')} {path}: "
+                f"{stats.statements} statements (budget {self.statement_budget}), {stats.db_ms:.1f} ms in DB"
+            )
+        statement, repeats = stats.most_repeated()
+        if repeats >= self.repeat_threshold:
+            logger.warning(
+                f"Possible N+1 on {path}: statement executed {repeats} times: {statement[:200]}"
+            )
@@ -0,0 +1,82 @@
+"""
+ETL load manifest: one row per loaded fact table and date_key.
+
+The Spark jobs record every day they load (rows written, when and how long
+it took, the Iceberg snapshot they read, a quality-check summary, plus
+table-specific counts in `details`) in etl_load_manifest. The API then reads
+what is loaded from this small table instead of aggregating the fact tables
+(see diagnostics.py and freshness.py). Reloading a day replaces its row.
+
+A row is written once the day's load has committed, so the latest row per
+table (its date_key and finished_at, see load_id) is what the API versions
+its caches, the inventory snapshot and the SSE snapshot events by.
+
+Like brand_views.py this module only uses the standard library (plus a
+DB-API connection), so the jobs import it directly (see
+etl_common.record_load).
+"""
+from datetime import datetime
+from typing import Optional
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_DDL = """
+CREATE TABLE IF NOT EXISTS etl_load_manifest (
+    table_name VARCHAR(64) NOT NULL,
+    date_key INTEGER NOT NULL,
+    row_count BIGINT NOT NULL,
+    started_at TIMESTAMPTZ NOT NULL,
+    finished_at TIMESTAMPTZ NOT NULL,
+    duration_ms INTEGER NOT NULL,
+    details JSONB,
+    iceberg_snapshot_id BIGINT,
+    quality_checks JSONB,
+    PRIMARY KEY (table_name, date_key)
+)
+"""
+
+# Columns added after the table was first created
+MANIFEST_MIGRATIONS = [
+    "ALTER TABLE etl_load_manifest ADD COLUMN IF NOT EXISTS iceberg_snapshot_id BIGINT",
+    "ALTER TABLE etl_load_manifest ADD COLUMN IF NOT EXISTS quality_checks JSONB",
+]
+
+def load_id(date_key: Optional[int], loaded_at: Optional[datetime]) -> str:
+    """One load of a day, "<date_key>.<finished_at in ms>" (just the date_key without a manifest row):
+    a same-day reload gets a new id. Safe as a file name or cache key"""
+    if loaded_at is None:
+        return str(date_key)
+    return f"{date_key}.{int(loaded_at.timestamp() * 1000)}"
+
+def data_version(inventory_date_key: Optional[int], inventory_loaded_at: Optional[datetime],
+                 sales_date_key: Optional[int], sales_loaded_at: Optional[datetime]) -> str:
+    """e.g. "20261017.1792206765000-20261017.1792210365000" (inventory load, sales load)"""
+    return f"{load_id(inventory_date_key, inventory_loaded_at)}-{load_id(sales_date_key, sales_loaded_at)}"
+
+def record_load(conn, table_name: str, date_key: int, row_count: int, started_at: datetime,
+                finished_at: datetime, details: Optional[dict] = None, iceberg_snapshot_id: Optional[int] = None,
+                quality_checks: Optional[dict] = None) -> None:
+    """Insert or replace the manifest row of one table and day, and commit"""
+    cur = conn.cursor()
+    try:
+        cur.execute(MANIFEST_DDL)
+        for migration in MANIFEST_MIGRATIONS:
+            cur.execute(migration)
+        cur.execute(
+            "INSERT INTO etl_load_manifest (table_name, date_key, row_count, started_at, finished_at, duration_ms, "
+            "details, iceberg_snapshot_id, quality_checks) "
+            "VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s) "
+            "ON CONFLICT (table_name, date_key) DO UPDATE SET row_count = EXCLUDED.row_count, "
+            "started_at = EXCLUDED.started_at, finished_at = EXCLUDED.finished_at, "
+            "duration_ms = EXCLUDED.duration_ms, details = EXCLUDED.details, "
+            "iceberg_snapshot_id = EXCLUDED.iceberg_snapshot_id, quality_checks = EXCLUDED.quality_checks",
+            (table_name, date_key, row_count, started_at, finished_at,
+             int((finished_at - started_at).total_seconds() * 1000), json.dumps(details or {}),
+             iceberg_snapshot_id, json.dumps(quality_checks or {}))
+        )
+        conn.commit()
+    finally:
+        cur.close()
+    logger.info(f"Recorded {table_name} load of {date_key}: {row_count} rows")
@@ -0,0 +1,80 @@
+"""
+Brand logos served from local storage instead of third-party CDNs.
+
+sync_logos.py (repository root) downloads the logo URLs the checker has
+verified and writes them to LOGO_DIR under content-hashed names
+(`ford.3f9a1c0b7d2e.svg`), together with a manifest.json mapping each brand
+to its current file. A file name therefore never changes meaning, so the
+files are served with an immutable one-year Cache-Control. Only the small
+brand -> file redirect has to be revalidated.
+
+nginx serves the files straight from disk with sendfile; the API routes
+below are the fallback when the backend is reached directly.
+"""
+from typing import Dict, Optional
+import json
+import logging
+import os
+import re
+import threading
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = "manifest.json"
+
+# <slug>.<12 hex digits of sha256>.<ext>, the only names sync_logos.py writes
+LOGO_FILENAME = re.compile(r"^[a-z0-9_-]+\.[0-9a-f]{12}\.(svg|png|jpg|gif|webp)$")
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+# Logos are third-party SVGs served same-origin: never let one run script
+LOGO_CONTENT_SECURITY_POLICY = "default-src 'none'; style-src 'unsafe-inline'"
+
+class LogoStore:
+    """Reads LOGO_DIR/manifest.json, reloading it when sync_logos.py rewrites it"""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self._brands: Dict[str, dict] = {}
+        self._by_folded_name: Dict[str, str] = {}
+        self._mtime: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def _load(self) -> None:
+        path = os.path.join(self.directory, MANIFEST_NAME)
+        try:
+            mtime = os.stat(path).st_mtime
+        except OSError:
+            return  # no logos synced yet: every brand falls back to its name in the UI
+        if mtime == self._mtime:
+            return
+
+        with self._lock:
+            if mtime == self._mtime:
+                return
+            try:
+                with open(path) as f:
+                    brands = json.load(f).get("brands", {})
+            except (OSError, ValueError) as e:
+                logger.error(f"Could not read logo manifest {path}: {str(e)}")
+                return
+            self._brands = brands
+            self._by_folded_name = {name.casefold(): name for name in brands}
+            self._mtime = mtime
+            logger.info(f"Loaded {len(brands)} brand logos from {path}")
+
+    def entry(self, brand_name: str) -> Optional[dict]:
+        """Manifest entry of a brand (exact name first, then case-insensitive)"""
+        self._load()
+        entry = self._brands.get(brand_name)
+        if entry is None:
+            name = self._by_folded_name.get(brand_name.casefold())
+            entry = self._brands.get(name) if name is not None else None
+        return entry
+
+    def path(self, filename: str) -> Optional[str]:
+        """On-disk path of a logo file, None for names that are not hashed logo files or are missing"""
+        if not LOGO_FILENAME.match(filename):
+            return None
+        path = os.path.join(self.directory, filename)
+        return path if os.path.isfile(path) else None
@@ -1,29 +1,95 @@
-from fastapi import FastAPI, Depends, HTTPException
+from fastapi import FastAPI, Depends, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import FileResponse, RedirectResponse, StreamingResponse
 from sqlalchemy.orm import Session
-from sqlalchemy import func, desc, and_, case, text
-from typing import List
+from sqlalchemy import func, desc, and_, text
+from typing import List, Optional
+from contextlib import asynccontextmanager
 from datetime import date, datetime, timedelta
+from decimal import Decimal
 import logging
 
-from .database import get_db
+from anyio import to_thread
+from starlette.concurrency import run_in_threadpool
+
+from .database import get_db, get_engine, dispose_engine
 from .config import settings
 from .models import (
-    DimDate, DimVehicle, DimPriceRange, 
+    DimVehicle, DimPriceRange, 
     FactDailyInventory, FactSalesEvents
 )
 from .schemas import (
-    DashboardResponse, KPIResponse, DailySalesTrendItem,
+    DashboardResponse, DashboardSectionResponse, KPIResponse, DailySalesTrendItem,
     InventoryByPriceRangeItem, SalesByBrandItem, DaysOnLotByPriceRangeItem,
-    TopSellingModelItem, SlowMovingInventoryItem, RecentSaleItem
+    TopSellingModelItem, SlowMovingInventoryItem, RecentSaleItem,
+    PriceBandClassifyRequest, PriceBandClassifyResponse, PriceBandCountItem,
+    SalesTimeSeriesResponse
+)
+from .price_bands import PriceBandClassifier, UNASSIGNED
+from .instrumentation import QueryCountMiddleware
+from .admission import AdmissionController, AdmissionMiddleware
+from .events import SnapshotNotifier, load_snapshot_version
+from .sections import DashboardWindow, Section, SectionLoader, dashboard_window
+from .ranking import Ranking, rank_top_n, sketch_top_n
+from .sketches import SALES_BY_BRAND, SALES_BY_MODEL, ACTIVE_VINS, INVENTORY_VINS, HyperLogLog
+from .cardinality import approx_loaded_distinct_vins
+from .diagnostics import catalog_summary
+from .freshness import LoadManifest, LoadRecord, freshness_report
+from .timeseries import GRANULARITIES, SALES_METRICS, sales_series
+from .snapshot import (
+    InventorySnapshotStore, AgeGroupCount, PriceRangeCount, PriceRangeDaysOnLot, SlowMovingVehicle
+)
+from .shared_store import SharedPayloadCache
+from .cache import TTLCache
+from .tiered_cache import DataVersion, RedisPayloadCache, TieredCache, connect_redis
+from .dimensions import DimensionCache, Dimensions
+from .brand_detail import (
+    BrandViewMonitor, LIVE, MATERIALIZED_VIEW, view_average_days_to_sell, view_inventory, view_sales_by_model,
+    view_weekly_sales
+)
+from .statements import (
+    QueryRunner, LATEST_INVENTORY_DATE_KEY, INVENTORY_ROW_COUNT, ACTIVE_VIN_COUNT, INVENTORY_BY_PRICE_RANGE,
+    DAYS_ON_LOT_BY_PRICE_RANGE, SLOW_MOVING_COUNT, SLOW_MOVING, BRAND_VIN_COUNT, BRAND_AVERAGE_PRICE,
+    BRAND_PRICE_DISTRIBUTION, BRAND_INVENTORY_AGE, SALES_ON_DAY, PRICED_SALES_COUNT, AVERAGE_DAYS_TO_SELL,
+    BRAND_AVERAGE_DAYS_TO_SELL, AVERAGE_SALE_PRICE, SALES_BY_VEHICLE, RECENT_SALES, LATEST_SALES
+)
+from .timeouts import (
+    QueryCanceller, QueryCancelled, QueryTimeout, StatementTimeouts, run_until_disconnect, statement_timeout
 )
+from .logos import LogoStore, IMMUTABLE_CACHE_CONTROL, LOGO_CONTENT_SECURITY_POLICY
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Create the database engine once the worker starts serving, not at import"""
+    if settings.worker_threads:
+        # Thread pool the sync (SQL) endpoints run in
+        to_thread.current_default_thread_limiter().total_tokens = settings.worker_threads
+    get_engine()
+    yield
+    dispose_engine()
 
 app = FastAPI(
     title="Autovana Analytics Dashboard API",
     description="Analytics API for Autovana used car website vehicle inventory and sales data",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
+# Per-route concurrency limits and bounded queues (innermost, so 503s still get CORS headers)
+admission = AdmissionController(
+    capacity=settings.admission_max_concurrent,
+    limits=settings.admission_limits,
+    queue_sizes=settings.admission_queue_sizes,
+    queue_timeout_seconds=settings.admission_queue_timeout_seconds
+)
+if settings.admission_enabled:
+    app.add_middleware(
+        AdmissionMiddleware,
+        controller=admission,
+        retry_after_seconds=settings.admission_retry_after_seconds,
+        server_timing=settings.server_timing_enabled,
+    )
+
 # Add CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -31,11 +97,120 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing", "Retry-After"],
+)
+
+# Count SQL statements and DB time per request (Server-Timing header)
+app.add_middleware(
+    QueryCountMiddleware,
+    statement_budget=settings.query_budget_per_request,
+    repeat_threshold=settings.query_repeat_threshold,
+    server_timing=settings.server_timing_enabled,
 )
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Label of the bucket holding every brand outside the top 10
+OTHER_BRANDS = "Other"
+
+# Relative standard error of approximate distinct counts (HyperLogLog, 2^14 registers)
+HLL_RELATIVE_ERROR = HyperLogLog().relative_error
+
+# Host-wide directory the workers share the inventory snapshot and dashboard sections through
+shared_store_dir = settings.shared_store_dir or None
+
+# Days each fact table was loaded for (ETL load manifest): what is loaded, for the reporting anchor,
+# date lookups, cache keys and the inventory snapshot
+load_manifest = LoadManifest(
+    check_seconds=settings.load_manifest_check_seconds,
+    enabled=settings.load_manifest_enabled
+)
+
+def latest_inventory_load(db: Optional[Session] = None) -> Optional[LoadRecord]:
+    """The load manifest's latest inventory load, None without a manifest"""
+    loaded = load_manifest.current(db)
+    return loaded.inventory.latest if loaded is not None and loaded.inventory is not None else None
+
+# Latest inventory load as in-memory columns (price ranges, slow movers, brand inventory)
+inventory_snapshots = InventorySnapshotStore(
+    check_seconds=settings.inventory_snapshot_check_seconds,
+    enabled=settings.inventory_snapshot_enabled,
+    shared_dir=shared_store_dir,
+    latest_load=latest_inventory_load
+)
+
+# dim_vehicle / dim_price_range labels, so fact queries can group by key without joining them
+dimension_cache = DimensionCache(check_seconds=settings.dimension_cache_check_seconds)
+
+# Latest load of each fact table per load_manifest: part of every shared cache key, so a new load is a miss everywhere
+data_version = DataVersion(
+    check_seconds=settings.cache_version_check_seconds,
+    loader=lambda db: load_snapshot_version(db, load_manifest.current)
+)
+
+# Cluster-wide L2 (any Redis-protocol server) when configured
+redis_client = connect_redis(settings.cache_redis_url) if settings.cache_redis_url else None
+
+def shared_tier(name: str):
+    """L2 of a cache: Redis when configured, else the host-wide store, else none"""
+    if redis_client is not None:
+        return RedisPayloadCache(
+            redis_client, f"{settings.cache_redis_namespace}:{name}",
+            lock_wait_seconds=settings.cache_lock_wait_seconds
+        )
+    if shared_store_dir:
+        return SharedPayloadCache(shared_store_dir, name)
+    return None
+
+# Brand, time series and debug responses: per-process LRU in front of the shared tier
+response_cache = TieredCache(TTLCache(settings.cache_l1_max_entries), shared_tier("responses"), data_version)
+
+# Per-helper statement_timeout (dashboard sections and the cached endpoints)
+statement_timeouts = StatementTimeouts(settings.statement_timeout_ms, settings.statement_timeouts_ms)
+
+# Helper queries: prepared once per connection, results cached per loaded data version
+queries = QueryRunner(
+    prepare=settings.prepared_statements,
+    cache=TTLCache(settings.query_result_cache_max_entries),
+    version=data_version.key,
+    ttl_seconds=settings.query_result_cache_ttl_seconds
+)
+
+# Last refresh of the per-brand materialized views (brand drill-down)
+brand_view_monitor = BrandViewMonitor(
+    check_seconds=settings.brand_views_check_seconds,
+    version=data_version.key,
+    enabled=settings.brand_views_enabled
+)
+
+def reporting_window(db: Optional[Session] = None) -> DashboardWindow:
+    """30-day window ending at the last day both fact tables were loaded for, else today minus the lag"""
+    loaded = load_manifest.current(db)
+    anchor = loaded.anchor_date_key() if loaded is not None else None
+    return dashboard_window(anchor, settings.reporting_lag_days)
+
+def on_snapshot_change(sections: List[str]) -> None:
+    """Expire the cached sections (and inventory snapshot) a newly loaded day affects"""
+    if "inventory_by_price_range" in sections:
+        inventory_snapshots.invalidate()
+    dimension_cache.invalidate()  # loads may add vehicles
+    data_version.invalidate()
+    response_cache.invalidate()
+    queries.invalidate()
+    brand_view_monitor.invalidate()
+    load_manifest.invalidate()
+    section_loader.invalidate(sections)
+
+# Brand logos synced to local storage (content-hashed files + manifest.json)
+logo_store = LogoStore(settings.logo_dir)
+
+# Pushes "snapshot changed" events to open dashboards (replaces interval polling)
+snapshot_notifier = SnapshotNotifier(
+    poll_seconds=settings.snapshot_poll_seconds,
+    on_change=on_snapshot_change
+)
+
 @app.get("/")
 async def root():
     return {"message": "Autovana Analytics Dashboard API"}
@@ -45,53 +220,35 @@ async def health_check():
     return {"status": "healthy", "timestamp": datetime.now()}
 
 @app.get("/api/debug")
-async def debug_data(db: Session = Depends(get_db)):
-    """Debug endpoint to check data availability"""
+async def debug_data(
+    request: Request,
+    exact: bool = Query(False, description="Exact counts and date ranges from the fact tables (full scans) instead of catalog statistics"),
+    approximate: Optional[bool] = Query(None, description="With exact: estimate distinct VIN counts from HyperLogLog sketches (default: APPROXIMATE_DISTINCT_COUNTS)"),
+    db: Session = Depends(get_db)
+):
+    """Debug endpoint to check data availability (catalog statistics and load manifest unless exact)"""
+    approximate = use_approximate(approximate)
     try:
-        # Check date ranges
-        min_inventory_date = db.query(func.min(FactDailyInventory.date_key)).scalar()
-        max_inventory_date = db.query(func.max(FactDailyInventory.date_key)).scalar()
-        
-        min_sales_date = db.query(func.min(FactSalesEvents.sale_date_key)).scalar()
-        max_sales_date = db.query(func.max(FactSalesEvents.sale_date_key)).scalar()
-        
-        # Count records
-        inventory_count = db.query(func.count(FactDailyInventory.vin)).scalar()
-        sales_count = db.query(func.count(FactSalesEvents.vin)).scalar()
-        vehicle_count = db.query(func.count(DimVehicle.vehicle_key)).scalar()
-        price_range_count = db.query(func.count(DimPriceRange.price_range_key)).scalar()
-        
-        # Current inventory - count distinct VINs where status = 'active' (no date filter)
-        today_key = int(date.today().strftime("%Y%m%d"))
-        current_inventory = db.query(func.count(func.distinct(FactDailyInventory.vin))).filter(
-            FactDailyInventory.status == 'active'
-        ).scalar() or 0
-        
-        # Most recent inventory (for comparison)
-        recent_inventory = db.query(func.count(func.distinct(FactDailyInventory.vin))).filter(
-            FactDailyInventory.date_key == max_inventory_date,
-            FactDailyInventory.status == 'active'
-        ).scalar() or 0 if max_inventory_date else 0
-        
-        return {
-            "today_key": today_key,
-            "inventory_date_range": {"min": min_inventory_date, "max": max_inventory_date},
-            "sales_date_range": {"min": min_sales_date, "max": max_sales_date},
-            "record_counts": {
-                "inventory": inventory_count,
-                "sales": sales_count,
-                "vehicles": vehicle_count,
-                "price_ranges": price_range_count
-            },
-            "inventory_summary": {
-                "today": current_inventory,
-                "most_recent": recent_inventory
-            }
-        }
+        if not exact:
+            return await run_in_threadpool(catalog_summary, db)
+        return await cached_response(request, db, "debug", (approximate,), lambda: debug_summary(db, approximate))
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Debug endpoint error: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/api/freshness")
+async def get_freshness():
+    """Reporting anchor and, per fact table, its latest loaded day, load time, snapshot and quality checks"""
+    try:
+        loaded = await run_in_threadpool(load_manifest.current)
+        window = await run_in_threadpool(reporting_window)
+        return freshness_report(loaded, window.thirty_days_ago_key, window.today_key)
+    except Exception as e:
+        logger.error(f"Freshness endpoint error: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @app.get("/api/test-sales-by-brand")
 async def test_sales_by_brand(db: Session = Depends(get_db)):
     """Test endpoint to debug sales by brand data"""
@@ -102,7 +259,7 @@ async def test_sales_by_brand(db: Session = Depends(get_db)):
         thirty_days_ago_key = int(thirty_days_ago.strftime("%Y%m%d"))
         
         # Get raw sales by brand data
-        sales_by_brand = await get_sales_by_brand(db, thirty_days_ago_key, today_key)
+        sales_by_brand = get_sales_by_brand(db, thirty_days_ago_key, today_key)
         
         # Also get the raw SQL results for debugging
         raw_results = db.query(
@@ -138,360 +295,538 @@ async def test_sales_by_brand(db: Session = Depends(get_db)):
         logger.error(f"Test sales by brand error: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.get("/api/dashboard", response_model=DashboardResponse)
-async def get_dashboard_data(db: Session = Depends(get_db)):
+@app.get("/api/dashboard", response_model=DashboardResponse, response_model_exclude_none=True)
+async def get_dashboard_data(
+    sections: Optional[str] = Query(None, description="Comma separated sections to return (default: all)"),
+    approximate: Optional[bool] = Query(None, description="KPIs: estimate distinct VIN counts from HyperLogLog sketches (default: APPROXIMATE_DISTINCT_COUNTS)")
+):
     """
     Get all dashboard data including KPIs, charts, and tables
-    Data is returned with a 2-day lag (shows data up to 2 days ago)
+    Data is returned up to the last loaded day (see /api/freshness), or with a 2-day lag without a load manifest
+    Each section is cached on its own; sections that fail or are slow are served
+    from their last good value and listed in stale_sections
     """
-    try:
-        # Apply 2-day lag to data - show data up to 2 days ago instead of today
-        today = date.today() - timedelta(days=2)  # 2-day lag
-        today_key = int(today.strftime("%Y%m%d"))
-        thirty_days_ago = today - timedelta(days=30)
-        thirty_days_ago_key = int(thirty_days_ago.strftime("%Y%m%d"))
-        
-        # Get KPIs
-        kpis = await get_kpis(db, today_key)
-        
-        # Get chart data
-        daily_sales_trend = await get_daily_sales_trend(db, thirty_days_ago_key, today_key)
-        inventory_by_price_range = await get_inventory_by_price_range(db, today_key)
-        sales_by_brand = await get_sales_by_brand(db, thirty_days_ago_key, today_key)
-        days_on_lot_by_price_range = await get_days_on_lot_by_price_range(db, today_key)
-        
-        # Get table data
-        top_selling_models = await get_top_selling_models(db, thirty_days_ago_key, today_key)
-        slow_moving_inventory = await get_slow_moving_inventory(db, today_key)
-        recent_sales = await get_recent_sales(db, today_key)
-        
-        return DashboardResponse(
-            kpis=kpis,
-            daily_sales_trend=daily_sales_trend,
-            inventory_by_price_range=inventory_by_price_range,
-            sales_by_brand=sales_by_brand,
-            days_on_lot_by_price_range=days_on_lot_by_price_range,
-            top_selling_models=top_selling_models,
-            slow_moving_inventory=slow_moving_inventory,
-            recent_sales=recent_sales
+    names = parse_sections(sections)
+    results = await section_loader.load_many(
+        names, await run_in_threadpool(reporting_window), section_params(use_approximate(approximate))
+    )
+    
+    failed_sections = [name for name, result in results.items() if result.failed]
+    if failed_sections and len(failed_sections) == len(names):
+        raise HTTPException(status_code=500, detail=f"Internal server error: failed to load {', '.join(failed_sections)}")
+    
+    return DashboardResponse(
+        **{name: result.value for name, result in results.items() if not result.failed},
+        stale_sections=[name for name, result in results.items() if result.stale],
+        failed_sections=failed_sections
+    )
+
+@app.get("/api/dashboard/sections/{section}", response_model=DashboardSectionResponse)
+async def get_dashboard_section(
+    section: str,
+    approximate: Optional[bool] = Query(None, description="KPIs: estimate distinct VIN counts from HyperLogLog sketches (default: APPROXIMATE_DISTINCT_COUNTS)")
+):
+    """Get a single dashboard section"""
+    if section not in section_loader.sections:
+        raise HTTPException(status_code=404, detail=f"Unknown dashboard section: {section}")
+    
+    params = section_params(use_approximate(approximate)).get(section, ())
+    result = await section_loader.load(section, await run_in_threadpool(reporting_window), params)
+    if result.failed:
+        raise HTTPException(status_code=500, detail=f"Internal server error: failed to load {section}")
+    
+    return DashboardSectionResponse(
+        section=section,
+        data=result.value,
+        stale=result.stale,
+        computed_at=datetime.fromtimestamp(result.computed_at) if result.computed_at else None
+    )
+
+def section_params(approximate: bool) -> dict:
+    """Query parameters of the sections that take any (extra loader arguments, part of their cache key)"""
+    return {"kpis": (approximate,)}
+
+def parse_sections(sections: Optional[str]) -> List[str]:
+    """Validate a `sections=` selector, keeping the dashboard's section order"""
+    if not sections:
+        return section_loader.names
+    requested = {name.strip() for name in sections.split(",") if name.strip()}
+    unknown = requested - set(section_loader.names)
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown dashboard section(s): {', '.join(sorted(unknown))}. Valid: {', '.join(section_loader.names)}"
         )
-    except Exception as e:
-        logger.error(f"Error getting dashboard data: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+    return [name for name in section_loader.names if name in requested]
+
+@app.get("/api/dashboard/events")
+async def dashboard_events(request: Request):
+    """Server-Sent Events stream announcing newly loaded warehouse days"""
+    return StreamingResponse(
+        snapshot_notifier.stream(request, settings.sse_keepalive_seconds),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 @app.get("/api/brand/{brand_name}")
-async def get_brand_metrics(brand_name: str, db: Session = Depends(get_db)):
+async def get_brand_metrics(request: Request, brand_name: str, approximate: Optional[bool] = Query(None, description="Estimate distinct VIN counts from HyperLogLog sketches (default: APPROXIMATE_DISTINCT_COUNTS)"), db: Session = Depends(get_db)):
     """Get detailed metrics for a specific brand"""
+    approximate = use_approximate(approximate)
     try:
-        # Get the most recent inventory date
-        most_recent_date = db.query(func.max(FactDailyInventory.date_key)).scalar()
-        
-        # Calculate 30 days ago (with 2-day lag)
-        today = date.today() - timedelta(days=2)  # 2-day lag
-        thirty_days_ago = today - timedelta(days=30)
-        thirty_days_ago_key = int(thirty_days_ago.strftime("%Y%m%d"))
-        
-        # Total vehicles for this brand (most recent date)
-        total_vehicles = db.query(func.count(func.distinct(FactDailyInventory.vin))).filter(
-            FactDailyInventory.date_key == most_recent_date,
-            DimVehicle.brand == brand_name
-        ).join(
-            DimVehicle, FactDailyInventory.vehicle_key == DimVehicle.vehicle_key
-        ).scalar() or 0
-        
-        # Average price for this brand (most recent date)
-        avg_price = db.query(func.avg(FactDailyInventory.price)).filter(
-            FactDailyInventory.date_key == most_recent_date,
-            DimVehicle.brand == brand_name,
-            FactDailyInventory.price.isnot(None),
-            FactDailyInventory.price > 0
-        ).join(
-            DimVehicle, FactDailyInventory.vehicle_key == DimVehicle.vehicle_key
-        ).scalar() or 0
-        
-        # Total sales for this brand in last 30 days
-        total_sales_30_days = db.query(func.count(FactSalesEvents.vin)).filter(
-            FactSalesEvents.sale_date_key >= thirty_days_ago_key,
-            FactSalesEvents.sale_date_key <= int(today.strftime("%Y%m%d")),
-            DimVehicle.brand == brand_name
-        ).join(
-            DimVehicle, FactSalesEvents.vehicle_key == DimVehicle.vehicle_key
-        ).scalar() or 0
-        
-        # Average days to sell for this brand (last 30 days)
-        avg_days_to_sell = db.query(func.avg(FactSalesEvents.days_to_sell)).filter(
-            FactSalesEvents.sale_date_key >= thirty_days_ago_key,
-            FactSalesEvents.sale_date_key <= int(today.strftime("%Y%m%d")),
-            DimVehicle.brand == brand_name,
-            FactSalesEvents.days_to_sell > 0,
-            FactSalesEvents.days_to_sell <= 365
-        ).join(
-            DimVehicle, FactSalesEvents.vehicle_key == DimVehicle.vehicle_key
-        ).scalar() or 0
-        
-        # Get top models for this brand
-        top_models = db.query(
-            DimVehicle.model,
-            func.count(FactSalesEvents.vin).label('sales_count'),
-            func.avg(FactSalesEvents.sale_price).label('avg_price')
-        ).join(
-            FactSalesEvents, DimVehicle.vehicle_key == FactSalesEvents.vehicle_key
-        ).filter(
-            FactSalesEvents.sale_date_key >= thirty_days_ago_key,
-            FactSalesEvents.sale_date_key <= int(today.strftime("%Y%m%d")),
-            DimVehicle.brand == brand_name
-        ).group_by(
-            DimVehicle.model
-        ).order_by(
-            desc(func.count(FactSalesEvents.vin))
-        ).limit(5).all()
-        
-        return {
-            "brand_name": brand_name,
-            "total_vehicles": total_vehicles,
-            "average_price": float(avg_price),
-            "total_sales_30_days": total_sales_30_days,
-            "avg_days_to_sell": float(avg_days_to_sell),
-            "top_models": [
-                {
-                    "model": result.model,
-                    "sales_count": result.sales_count,
-                    "avg_price": float(result.avg_price or 0)
-                }
-                for result in top_models
-            ]
-        }
+        return await cached_response(
+            request, db, "brand", (brand_name, approximate), lambda: brand_metrics(db, brand_name, approximate)
+        )
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error getting brand metrics for {brand_name}: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/brand/{brand_name}/detailed")
-async def get_detailed_brand_analysis(brand_name: str, db: Session = Depends(get_db)):
+async def get_detailed_brand_analysis(request: Request, brand_name: str, approximate: Optional[bool] = Query(None, description="Estimate distinct VIN counts from HyperLogLog sketches (default: APPROXIMATE_DISTINCT_COUNTS)"), db: Session = Depends(get_db)):
     """Get comprehensive detailed analysis for a specific brand"""
+    approximate = use_approximate(approximate)
     try:
-        # Get the most recent inventory date
-        most_recent_date = db.query(func.max(FactDailyInventory.date_key)).scalar()
-        
-        # Calculate date ranges
-        today = date.today()
-        thirty_days_ago = today - timedelta(days=30)
-        thirty_days_ago_key = int(thirty_days_ago.strftime("%Y%m%d"))
-        ninety_days_ago = today - timedelta(days=90)
-        ninety_days_ago_key = int(ninety_days_ago.strftime("%Y%m%d"))
+        return await cached_response(
+            request, db, "brand_detailed", (brand_name, approximate),
+            lambda: detailed_brand_analysis(db, brand_name, approximate)
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error getting detailed brand analysis for {brand_name}: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/brand/{brand_name}/logo")
+async def get_brand_logo(brand_name: str):
+    """Redirect to the brand's current content-hashed logo file"""
+    entry = logo_store.entry(brand_name)
+    if entry is None:
+        raise HTTPException(status_code=404, detail=f"No logo for brand '{brand_name}'")
+    return RedirectResponse(
+        f"/api/logos/{entry['file']}",
+        status_code=302,
+        headers={"Cache-Control": f"public, max-age={settings.logo_redirect_max_age_seconds}"}
+    )
+
+@app.get("/api/logos/{filename}")
+async def get_logo_file(filename: str):
+    """Logo file by content-hashed name (nginx serves these directly in production)"""
+    path = logo_store.path(filename)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Logo not found")
+    return FileResponse(path, headers={
+        "Cache-Control": IMMUTABLE_CACHE_CONTROL,
+        "Content-Security-Policy": LOGO_CONTENT_SECURITY_POLICY,
+        "X-Content-Type-Options": "nosniff",
+    })
+
+@app.get("/api/sales/timeseries", response_model=SalesTimeSeriesResponse)
+async def get_sales_timeseries(
+    request: Request,
+    start_date: Optional[date] = Query(None, description="Defaults to 30 days before end_date"),
+    end_date: Optional[date] = Query(None, description="Defaults to the last loaded day (today minus the 2-day lag without a load manifest)"),
+    granularity: str = Query("day", description="day, week or month"),
+    metrics: str = Query("sales_count,total_sales_amount", description=f"Comma separated: {', '.join(SALES_METRICS)}"),
+    brand: Optional[str] = Query(None, description="Only sales of this brand"),
+    group_by_brand: bool = Query(False, description="One series per brand"),
+    db: Session = Depends(get_db)
+):
+    """Gap-filled sales series for any metric and granularity"""
+    window = await run_in_threadpool(reporting_window, db)
+    end_date = end_date or datetime.strptime(str(window.today_key), "%Y%m%d").date()
+    start_date = start_date or end_date - timedelta(days=30)
+    metric_names = [name.strip() for name in metrics.split(",") if name.strip()]
+    if granularity not in GRANULARITIES:
+        raise HTTPException(status_code=400, detail=f"granularity must be one of {', '.join(GRANULARITIES)}")
+    unknown = [name for name in metric_names if name not in SALES_METRICS]
+    if unknown or not metric_names:
+        raise HTTPException(status_code=400, detail=f"metrics must be a subset of {', '.join(SALES_METRICS)}")
+    if start_date > end_date:
+        raise HTTPException(status_code=400, detail="start_date must not be after end_date")
+    
+    try:
+        return await cached_response(
+            request, db, "sales_timeseries", (start_date, end_date, granularity, metric_names, brand, group_by_brand),
+            lambda: sales_timeseries(db, start_date, end_date, granularity, metric_names, brand, group_by_brand)
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error getting sales time series: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/api/price-ranges/classify", response_model=PriceBandClassifyResponse)
+async def classify_prices(request: PriceBandClassifyRequest, db: Session = Depends(get_db)):
+    """Assign price ranges to an ad-hoc batch of prices (what-if analysis)"""
+    try:
+        bands = db.query(DimPriceRange).all()
+        classifier = PriceBandClassifier.from_rows(bands)
+        range_names = {band.price_range_key: band.range_name for band in bands}
         
-        # Basic metrics
-        total_vehicles = db.query(func.count(func.distinct(FactDailyInventory.vin))).filter(
-            FactDailyInventory.date_key == most_recent_date,
-            DimVehicle.brand == brand_name
-        ).join(
-            DimVehicle, FactDailyInventory.vehicle_key == DimVehicle.vehicle_key
-        ).scalar() or 0
+        keys = classifier.classify(request.prices)
+        band_counts, unassigned_count = classifier.counts(request.prices)
+        total_prices = len(request.prices)
         
-        avg_price = db.query(func.avg(FactDailyInventory.price)).filter(
-            FactDailyInventory.date_key == most_recent_date,
-            DimVehicle.brand == brand_name,
-            FactDailyInventory.price.isnot(None),
-            FactDailyInventory.price > 0
-        ).join(
-            DimVehicle, FactDailyInventory.vehicle_key == DimVehicle.vehicle_key
+        return PriceBandClassifyResponse(
+            price_range_keys=[int(key) if key != UNASSIGNED else None for key in keys],
+            distribution=[
+                PriceBandCountItem(
+                    price_range_key=int(key),
+                    price_range=range_names[int(key)],
+                    count=int(band_count),
+                    percentage=round((band_count / total_prices * 100), 2) if total_prices > 0 else 0
+                )
+                for key, band_count in zip(classifier.keys, band_counts)
+            ],
+            unassigned_count=unassigned_count
+        )
+    except Exception as e:
+        logger.error(f"Error classifying prices: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+async def cached_response(request: Request, db: Session, name: str, params: tuple, compute):
+    """
+    Cached response of a helper, computed under its statement timeout. On a
+    timeout the last good value for the same parameters is served with
+    stale=True; a client that disconnects has its query cancelled (499).
+    """
+    canceller = QueryCanceller()
+    
+    def compute_with_timeout():
+        with statement_timeout(db, name, statement_timeouts.for_helper(name), canceller):
+            return compute()
+    
+    try:
+        value, stale_computed_at = await run_until_disconnect(
+            request, canceller, settings.disconnect_poll_seconds,
+            response_cache.get_or_last_good, name, params, compute_with_timeout, settings.cache_ttl_seconds,
+            (QueryTimeout,), db
+        )
+    except QueryTimeout as e:
+        logger.error(f"{str(e)}, no earlier value to serve")
+        raise HTTPException(status_code=503, detail=f"{name} timed out", headers={"Retry-After": "5"})
+    except QueryCancelled:
+        raise HTTPException(status_code=499, detail="Client closed request")
+    if stale_computed_at is None:
+        return value
+    return {**value, "stale": True, "computed_at": datetime.fromtimestamp(stale_computed_at)}
+
+def use_approximate(approximate: Optional[bool]) -> bool:
+    """Resolve the `approximate` query parameter against the configured default"""
+    return settings.approximate_distinct_counts if approximate is None else approximate
+
+def debug_summary(db: Session, approximate: bool) -> dict:
+    """Date ranges, row counts and active inventory of the loaded data"""
+    # Check date ranges
+    min_inventory_date = db.query(func.min(FactDailyInventory.date_key)).scalar()
+    max_inventory_date = db.query(func.max(FactDailyInventory.date_key)).scalar()
+    
+    min_sales_date = db.query(func.min(FactSalesEvents.sale_date_key)).scalar()
+    max_sales_date = db.query(func.max(FactSalesEvents.sale_date_key)).scalar()
+    
+    # Count records
+    inventory_count = db.query(func.count(FactDailyInventory.vin)).scalar()
+    sales_count = db.query(func.count(FactSalesEvents.vin)).scalar()
+    vehicle_count = db.query(func.count(DimVehicle.vehicle_key)).scalar()
+    price_range_count = db.query(func.count(DimPriceRange.price_range_key)).scalar()
+    
+    # Current inventory - count distinct VINs where status = 'active' (no date filter)
+    today_key = int(date.today().strftime("%Y%m%d"))
+    current_estimate = approx_loaded_distinct_vins(db, ACTIVE_VINS) if approximate else None
+    if current_estimate is not None:
+        current_inventory = current_estimate.estimate
+    else:
+        current_inventory = db.query(func.count(func.distinct(FactDailyInventory.vin))).filter(
+            FactDailyInventory.status == 'active'
         ).scalar() or 0
+    
+    # Most recent inventory (for comparison)
+    recent_estimate = (
+        approx_loaded_distinct_vins(db, ACTIVE_VINS, max_inventory_date) if approximate and max_inventory_date else None
+    )
+    if recent_estimate is not None:
+        recent_inventory = recent_estimate.estimate
+    else:
+        recent_inventory = db.query(func.count(func.distinct(FactDailyInventory.vin))).filter(
+            FactDailyInventory.date_key == max_inventory_date,
+            FactDailyInventory.status == 'active'
+        ).scalar() or 0 if max_inventory_date else 0
+    
+    return {
+        "today_key": today_key,
+        "inventory_date_range": {"min": min_inventory_date, "max": max_inventory_date},
+        "sales_date_range": {"min": min_sales_date, "max": max_sales_date},
+        "record_counts": {
+            "inventory": inventory_count,
+            "sales": sales_count,
+            "vehicles": vehicle_count,
+            "price_ranges": price_range_count
+        },
+        "inventory_summary": {
+            "today": current_inventory,
+            "most_recent": recent_inventory,
+            "relative_error": HLL_RELATIVE_ERROR if (current_estimate or recent_estimate) is not None else None
+        }
+    }
+
+def brand_metrics(db: Session, brand_name: str, approximate: bool) -> dict:
+    """Inventory, 30-day sales and top models of a brand"""
+    # Last 30 days of the reporting window (up to the last loaded day)
+    window = reporting_window(db)
+    today_key, thirty_days_ago_key = window.today_key, window.thirty_days_ago_key
+    
+    dims = dimension_cache.get(db)
+    brand_vehicle_keys = dims.brand_vehicle_keys(brand_name)
+    
+    # Total vehicles and average price for this brand (most recent date)
+    inventory = get_brand_inventory(db, dims, brand_name, approximate)
+    
+    # Sales per model for this brand in last 30 days (total and top models)
+    sales_by_model = get_brand_sales_by_model(
+        db, dims, brand_vehicle_keys, thirty_days_ago_key, today_key
+    )
+    total_sales_30_days = sum(model["sales_count"] for model in sales_by_model)
+    
+    # Average days to sell for this brand (last 30 days)
+    avg_days_to_sell = queries.scalar(
+        db, BRAND_AVERAGE_DAYS_TO_SELL, start_date_key=thirty_days_ago_key,
+        end_date_key=today_key, vehicle_keys=brand_vehicle_keys
+    ) or 0
+    
+    return {
+        "brand_name": brand_name,
+        "total_vehicles": inventory["total_vehicles"],
+        "total_vehicles_relative_error": inventory["relative_error"],
+        "average_price": float(inventory["average_price"]),
+        "total_sales_30_days": total_sales_30_days,
+        "avg_days_to_sell": float(avg_days_to_sell),
+        "top_models": [
+            {
+                "model": model["model"],
+                "sales_count": model["sales_count"],
+                "avg_price": model["avg_price"]
+            }
+            for model in sales_by_model[:5]
+        ]
+    }
+
+def detailed_brand_analysis(db: Session, brand_name: str, approximate: bool) -> dict:
+    """Brand metrics with model sales, price distribution, weekly trend and inventory age"""
+    # Calculate date ranges, ending at the last loaded day
+    today = datetime.strptime(str(reporting_window(db).today_key), "%Y%m%d").date()
+    thirty_days_ago = today - timedelta(days=30)
+    thirty_days_ago_key = int(thirty_days_ago.strftime("%Y%m%d"))
+    ninety_days_ago = today - timedelta(days=90)
+    ninety_days_ago_key = int(ninety_days_ago.strftime("%Y%m%d"))
+    
+    today_key = int(today.strftime("%Y%m%d"))
+    
+    dims = dimension_cache.get(db)
+    brand_vehicle_keys = dims.brand_vehicle_keys(brand_name)
+    
+    # Per-brand materialized views when they hold the loaded data, live queries otherwise
+    views = brand_view_monitor.status(db)
+    if views.covers(ninety_days_ago_key):
+        source = MATERIALIZED_VIEW
+        inventory = view_inventory(db, queries, dims, brand_name)
+        sales_by_model = view_sales_by_model(db, queries, brand_name, thirty_days_ago_key, today_key)
+        sales_trend = view_weekly_sales(db, queries, brand_name, ninety_days_ago_key, today_key)
+        avg_days_to_sell = view_average_days_to_sell(db, queries, brand_name, thirty_days_ago_key, today_key) or 0
+    else:
+        source = LIVE
+        # Basic metrics, price distribution and age of the current inventory
+        inventory = get_brand_inventory(db, dims, brand_name, approximate, detailed=True)
         
         # Sales breakdown by model (last 30 days)
-        sales_by_model = db.query(
-            DimVehicle.model,
-            func.count(FactSalesEvents.vin).label('sales_count'),
-            func.avg(FactSalesEvents.sale_price).label('avg_price'),
-            func.sum(FactSalesEvents.sale_price).label('total_revenue'),
-            func.avg(FactSalesEvents.days_to_sell).label('avg_days_to_sell')
-        ).join(
-            FactSalesEvents, DimVehicle.vehicle_key == FactSalesEvents.vehicle_key
-        ).filter(
-            FactSalesEvents.sale_date_key >= thirty_days_ago_key,
-            FactSalesEvents.sale_date_key <= int(today.strftime("%Y%m%d")),
-            DimVehicle.brand == brand_name
-        ).group_by(
-            DimVehicle.model
-        ).order_by(
-            desc(func.count(FactSalesEvents.vin))
-        ).all()
-        
-        # Price distribution for current inventory
-        price_distribution = db.query(
-            DimPriceRange.range_name,
-            func.count(FactDailyInventory.vin).label('inventory_count')
-        ).join(
-            FactDailyInventory, DimPriceRange.price_range_key == FactDailyInventory.price_range_key
-        ).join(
-            DimVehicle, FactDailyInventory.vehicle_key == DimVehicle.vehicle_key
-        ).filter(
-            FactDailyInventory.date_key == most_recent_date,
-            DimVehicle.brand == brand_name
-        ).group_by(
-            DimPriceRange.range_name
-        ).order_by(
-            DimPriceRange.min_price
-        ).all()
-        
-        # Sales trend over last 90 days (weekly)
-        sales_trend = db.query(
-            DimDate.full_date,
-            func.count(FactSalesEvents.vin).label('sales_count'),
-            func.avg(FactSalesEvents.sale_price).label('avg_price')
-        ).join(
-            FactSalesEvents, DimDate.date_key == FactSalesEvents.sale_date_key
-        ).join(
-            DimVehicle, FactSalesEvents.vehicle_key == DimVehicle.vehicle_key
-        ).filter(
-            FactSalesEvents.sale_date_key >= ninety_days_ago_key,
-            FactSalesEvents.sale_date_key <= int(today.strftime("%Y%m%d")),
-            DimVehicle.brand == brand_name
-        ).group_by(
-            DimDate.full_date
-        ).order_by(
-            DimDate.full_date
-        ).limit(12).all()
+        sales_by_model = get_brand_sales_by_model(db, dims, brand_vehicle_keys, thirty_days_ago_key, today_key)
         
-        # Inventory age analysis
-        inventory_age = db.query(
-            case(
-                (FactDailyInventory.days_on_lot <= 7, '0-7 days'),
-                (FactDailyInventory.days_on_lot <= 14, '8-14 days'),
-                (FactDailyInventory.days_on_lot <= 30, '15-30 days'),
-                (FactDailyInventory.days_on_lot <= 60, '31-60 days'),
-                (FactDailyInventory.days_on_lot <= 90, '61-90 days'),
-                else_='90+ days'
-            ).label('age_group'),
-            func.count(FactDailyInventory.vin).label('inventory_count')
-        ).join(
-            DimVehicle, FactDailyInventory.vehicle_key == DimVehicle.vehicle_key
-        ).filter(
-            FactDailyInventory.date_key == most_recent_date,
-            DimVehicle.brand == brand_name,
-            FactDailyInventory.days_on_lot > 0
-        ).group_by(
-            case(
-                (FactDailyInventory.days_on_lot <= 7, '0-7 days'),
-                (FactDailyInventory.days_on_lot <= 14, '8-14 days'),
-                (FactDailyInventory.days_on_lot <= 30, '15-30 days'),
-                (FactDailyInventory.days_on_lot <= 60, '31-60 days'),
-                (FactDailyInventory.days_on_lot <= 90, '61-90 days'),
-                else_='90+ days'
-            )
-        ).order_by(
-            case(
-                (FactDailyInventory.days_on_lot <= 7, 1),
-                (FactDailyInventory.days_on_lot <= 14, 2),
-                (FactDailyInventory.days_on_lot <= 30, 3),
-                (FactDailyInventory.days_on_lot <= 60, 4),
-                (FactDailyInventory.days_on_lot <= 90, 5),
-                else_=6
-            )
-        ).all()
-        
-        # Performance metrics
-        total_sales_30_days = sum(model.sales_count for model in sales_by_model)
-        total_revenue_30_days = sum(float(model.total_revenue or 0) for model in sales_by_model)
-        avg_days_to_sell = db.query(func.avg(FactSalesEvents.days_to_sell)).filter(
-            FactSalesEvents.sale_date_key >= thirty_days_ago_key,
-            FactSalesEvents.sale_date_key <= int(today.strftime("%Y%m%d")),
-            DimVehicle.brand == brand_name,
-            FactSalesEvents.days_to_sell > 0,
-            FactSalesEvents.days_to_sell <= 365
-        ).join(
-            DimVehicle, FactSalesEvents.vehicle_key == DimVehicle.vehicle_key
-        ).scalar() or 0
+        # Sales trend over last 90 days (weekly, weeks without sales included)
+        sales_trend = sales_series(
+            db, ninety_days_ago_key, today_key, ["sales_count", "avg_sale_price"],
+            granularity="week", brand=brand_name
+        )
         
-        return {
-            "brand_name": brand_name,
-            "basic_metrics": {
-                "total_vehicles": total_vehicles,
-                "average_price": float(avg_price),
-                "total_sales_30_days": total_sales_30_days,
-                "total_revenue_30_days": float(total_revenue_30_days),
-                "avg_days_to_sell": float(avg_days_to_sell)
-            },
-            "sales_by_model": [
-                {
-                    "model": result.model,
-                    "sales_count": result.sales_count,
-                    "avg_price": float(result.avg_price or 0),
-                    "total_revenue": float(result.total_revenue or 0),
-                    "avg_days_to_sell": float(result.avg_days_to_sell or 0)
-                }
-                for result in sales_by_model
-            ],
-            "price_distribution": [
-                {
-                    "price_range": result.range_name,
-                    "inventory_count": result.inventory_count
-                }
-                for result in price_distribution
-            ],
-            "sales_trend": [
-                {
-                    "week_start": result.full_date.strftime("%Y-%m-%d") if result.full_date else None,
-                    "sales_count": result.sales_count,
-                    "avg_price": float(result.avg_price or 0)
-                }
-                for result in sales_trend
-            ],
-            "inventory_age": [
-                {
-                    "age_group": result.age_group,
-                    "inventory_count": result.inventory_count
-                }
-                for result in inventory_age
-            ]
+        avg_days_to_sell = queries.scalar(
+            db, BRAND_AVERAGE_DAYS_TO_SELL, start_date_key=thirty_days_ago_key,
+            end_date_key=today_key, vehicle_keys=brand_vehicle_keys
+        ) or 0
+    
+    # Performance metrics
+    total_sales_30_days = sum(model["sales_count"] for model in sales_by_model)
+    total_revenue_30_days = sum(model["total_revenue"] for model in sales_by_model)
+    
+    return {
+        "brand_name": brand_name,
+        "basic_metrics": {
+            "total_vehicles": inventory["total_vehicles"],
+            "total_vehicles_relative_error": inventory["relative_error"],
+            "average_price": float(inventory["average_price"]),
+            "total_sales_30_days": total_sales_30_days,
+            "total_revenue_30_days": float(total_revenue_30_days),
+            "avg_days_to_sell": float(avg_days_to_sell)
+        },
+        "sales_by_model": sales_by_model,
+        "price_distribution": [
+            {
+                "price_range": result.range_name,
+                "inventory_count": result.inventory_count
+            }
+            for result in inventory["price_distribution"]
+        ],
+        "sales_trend": [
+            {
+                "week_start": point["period_start"].strftime("%Y-%m-%d"),
+                "sales_count": point["sales_count"],
+                "avg_price": float(point["avg_sale_price"] or 0)
+            }
+            for point in sales_trend
+        ],
+        "inventory_age": [
+            {
+                "age_group": result.age_group,
+                "inventory_count": result.inventory_count
+            }
+            for result in inventory["inventory_age"]
+        ],
+        "freshness": views.describe(source)
+    }
+
+def sales_timeseries(db: Session, start_date: date, end_date: date, granularity: str, metric_names: List[str],
+                     brand: Optional[str], group_by_brand: bool) -> SalesTimeSeriesResponse:
+    """Validated /api/sales/timeseries parameters -> response"""
+    points = sales_series(
+        db, int(start_date.strftime("%Y%m%d")), int(end_date.strftime("%Y%m%d")), metric_names,
+        granularity=granularity, brand=brand, by_brand=group_by_brand
+    )
+    return SalesTimeSeriesResponse(
+        granularity=granularity,
+        start_date=start_date,
+        end_date=end_date,
+        metrics=metric_names,
+        points=[
+            {key: float(value) if isinstance(value, Decimal) else value for key, value in point.items()}
+            for point in points
+        ]
+    )
+
+def get_brand_inventory(db: Session, dims: Dimensions, brand_name: str, approximate: bool,
+                        detailed: bool = False) -> dict:
+    """Inventory metrics of a brand on the most recent inventory day, from the snapshot when it holds that day"""
+    # One day for both paths: the snapshot only answers when it holds the day the SQL path would read
+    most_recent_date = latest_inventory_date_key(db)
+    snapshot = inventory_snapshots.latest(db)
+    if snapshot is not None and snapshot.date_key == most_recent_date:
+        inventory = {
+            "total_vehicles": snapshot.brand_vehicle_count(brand_name),
+            "relative_error": None,
+            "average_price": snapshot.brand_average_price(brand_name)
         }
-    except Exception as e:
-        logger.error(f"Error getting detailed brand analysis for {brand_name}: {str(e)}")
-        raise HTTPException(status_code=500, detail=str(e))
+        if detailed:
+            inventory["price_distribution"] = snapshot.brand_price_distribution(brand_name)
+            inventory["inventory_age"] = snapshot.brand_inventory_age(brand_name)
+        return inventory
+    
+    brand_rows = {"date_key": most_recent_date, "vehicle_keys": dims.brand_vehicle_keys(brand_name)}
+    
+    total_vehicles, relative_error = count_brand_vehicles(db, dims, brand_name, most_recent_date, approximate)
+    
+    avg_price = queries.scalar(db, BRAND_AVERAGE_PRICE, **brand_rows) or 0
+    
+    inventory = {"total_vehicles": total_vehicles, "relative_error": relative_error, "average_price": avg_price}
+    if not detailed:
+        return inventory
+    
+    # Price distribution for current inventory
+    price_distribution = queries.rows(
+        db, BRAND_PRICE_DISTRIBUTION, **brand_rows, price_range_keys=list(dims.price_ranges)
+    )
+    
+    # Inventory age analysis
+    inventory_age = queries.rows(db, BRAND_INVENTORY_AGE, **brand_rows)
+    
+    inventory["price_distribution"] = [
+        PriceRangeCount(dims.range_name(result.price_range_key), result.inventory_count)
+        for result in sorted(price_distribution, key=lambda result: dims.range_order(result.price_range_key))
+    ]
+    inventory["inventory_age"] = [AgeGroupCount(result.age_group, result.inventory_count) for result in inventory_age]
+    return inventory
 
-async def get_kpis(db: Session, today_key: int) -> KPIResponse:
+def get_brand_sales_by_model(db: Session, dims: Dimensions, vehicle_keys: List[int],
+                             start_date_key: int, end_date_key: int) -> List[dict]:
+    """Sales of the given vehicles per model, most sold first.
+    
+    Aggregated per vehicle_key in SQL and folded into models here, so the query needs no join.
+    """
+    results = queries.rows(
+        db, SALES_BY_VEHICLE, start_date_key=start_date_key, end_date_key=end_date_key, vehicle_keys=vehicle_keys
+    )
+    
+    models = {}
+    for result in results:
+        model = models.setdefault(dims.vehicle(result.vehicle_key).model, [0, 0.0, 0, 0, 0])
+        model[0] += result.sales_count
+        model[1] += float(result.total_revenue or 0)
+        model[2] += result.priced_count
+        model[3] += result.total_days_to_sell or 0
+        model[4] += result.days_to_sell_count
+    
+    return [
+        {
+            "model": name,
+            "sales_count": sales_count,
+            "avg_price": total_revenue / priced_count if priced_count else 0.0,
+            "total_revenue": total_revenue,
+            "avg_days_to_sell": float(total_days / days_count) if days_count else 0.0
+        }
+        for name, (sales_count, total_revenue, priced_count, total_days, days_count)
+        in sorted(models.items(), key=lambda item: (-item[1][0], item[0]))
+    ]
+
+def count_brand_vehicles(db: Session, dims: Dimensions, brand_name: str, date_key: int, approximate: bool):
+    """Distinct VINs of a brand on one day, and the relative error when it was estimated"""
+    if approximate and date_key:
+        estimate = approx_loaded_distinct_vins(db, INVENTORY_VINS, date_key, brand_name)
+        if estimate is not None:
+            return estimate.estimate, estimate.relative_error
+    
+    total_vehicles = queries.scalar(
+        db, BRAND_VIN_COUNT, date_key=date_key, vehicle_keys=dims.brand_vehicle_keys(brand_name)
+    ) or 0
+    return total_vehicles, None
+
+def get_kpis(db: Session, today_key: int, approximate: bool = False) -> KPIResponse:
     """Get Key Performance Indicators"""
     logger.info(f"Getting KPIs for date_key: {today_key}")
     
-    # Calculate 30 days ago properly (with 2-day lag)
-    today = date.today() - timedelta(days=2)  # 2-day lag
+    # 30 days before the reporting day
+    today = datetime.strptime(str(today_key), "%Y%m%d").date()
     thirty_days_ago = today - timedelta(days=30)
     thirty_days_ago_key = int(thirty_days_ago.strftime("%Y%m%d"))
     
     # Check inventory - count distinct VINs where status = 'active' (no date filter)
-    inventory_today = db.query(func.count(func.distinct(FactDailyInventory.vin))).filter(
-        FactDailyInventory.status == 'active'
-    ).scalar() or 0
-    
-    # Check sales for today with data quality filters
-    sales_today = db.query(func.count(FactSalesEvents.vin)).filter(
-        FactSalesEvents.sale_date_key == today_key,
-        FactSalesEvents.vin.isnot(None),  # Ensure VIN is not null
-        FactSalesEvents.sale_price.isnot(None)  # Ensure price is not null
-    ).scalar() or 0
-    
-    # If no sales today, check if we have any sales data at all
+    estimate = approx_loaded_distinct_vins(db, ACTIVE_VINS) if approximate else None
+    if estimate is not None:
+        inventory_today = estimate.estimate
+    else:
+        inventory_today = queries.scalar(db, ACTIVE_VIN_COUNT) or 0
+    
+    # Check sales for today with data quality filters (VIN and price present)
+    sales_today = queries.scalar(db, SALES_ON_DAY, date_key=today_key) or 0
+    
+    # If no sales today, check if we have any sales data at all (the load manifest knows)
     if not sales_today:
-        total_sales_check = db.query(func.count(FactSalesEvents.vin)).filter(
-            FactSalesEvents.vin.isnot(None),
-            FactSalesEvents.sale_price.isnot(None)
-        ).scalar() or 0
-        logger.info(f"No sales today, total sales in database: {total_sales_check}")
-    
-    # Average days to sell (last 30 days) - only consider reasonable values
-    avg_days_to_sell = db.query(func.avg(FactSalesEvents.days_to_sell)).filter(
-        FactSalesEvents.sale_date_key >= thirty_days_ago_key,
-        FactSalesEvents.sale_date_key <= today_key,
-        FactSalesEvents.days_to_sell > 0,
-        FactSalesEvents.days_to_sell <= 365  # Cap at 1 year to avoid outliers
-    ).scalar() or 0.0
-    
-    # Average sale price (last 30 days) - only consider reasonable values
-    avg_sale_price = db.query(func.avg(FactSalesEvents.sale_price)).filter(
-        FactSalesEvents.sale_date_key >= thirty_days_ago_key,
-        FactSalesEvents.sale_date_key <= today_key,
-        FactSalesEvents.sale_price.isnot(None),
-        FactSalesEvents.sale_price > 0,  # Only positive prices
-        FactSalesEvents.sale_price <= 200000  # Cap at $200k to avoid outliers
-    ).scalar() or 0.0
+        loaded = load_manifest.current(db)
+        if loaded is not None and loaded.sales is not None:
+            logger.info(f"No sales today, latest loaded sales day: {loaded.sales.latest_date_key}")
+        else:
+            total_sales_check = queries.scalar(db, PRICED_SALES_COUNT) or 0
+            logger.info(f"No sales today, total sales in database: {total_sales_check}")
+    
+    # Average days to sell and sale price (last 30 days) - only consider reasonable values
+    window = {"start_date_key": thirty_days_ago_key, "end_date_key": today_key}
+    avg_days_to_sell = queries.scalar(db, AVERAGE_DAYS_TO_SELL, **window) or 0.0
+    avg_sale_price = queries.scalar(db, AVERAGE_SALE_PRICE, **window) or 0.0
     
     logger.info(f"KPIs: inventory={inventory_today}, sales={sales_today}, avg_days={avg_days_to_sell}, avg_price={avg_sale_price}")
     
@@ -499,94 +834,74 @@ async def get_kpis(db: Session, today_key: int) -> KPIResponse:
         total_active_inventory=int(inventory_today),
         total_sales_today=int(sales_today),
         average_days_to_sell=float(avg_days_to_sell),
-        average_sale_price=float(avg_sale_price)
+        average_sale_price=float(avg_sale_price),
+        total_active_inventory_relative_error=estimate.relative_error if estimate is not None else None
     )
 
-async def get_daily_sales_trend(db: Session, start_date_key: int, end_date_key: int) -> List[DailySalesTrendItem]:
+def latest_inventory_date_key(db: Session) -> Optional[int]:
+    """Most recent inventory day: the load manifest's latest inventory load, max(date_key) without one"""
+    load = latest_inventory_load(db)
+    if load is not None:
+        return load.date_key
+    return queries.scalar(db, LATEST_INVENTORY_DATE_KEY)
+
+def resolve_inventory_date_key(db: Session, date_key: int, has_data) -> int:
+    """date_key if its inventory was loaded, else the most recent inventory day.
+    
+    Answered from the load manifest when it covers date_key; otherwise has_data()
+    probes the fact table and the latest date_key is queried.
+    """
+    loaded = load_manifest.current(db)
+    resolved = loaded.inventory_date_key(date_key) if loaded is not None else None
+    if resolved is None:
+        if has_data():
+            return date_key
+        resolved = queries.scalar(db, LATEST_INVENTORY_DATE_KEY)
+    if resolved and resolved != date_key:
+        logger.info(f"No data for {date_key}, using most recent date: {resolved}")
+        return resolved
+    return date_key
+
+def get_daily_sales_trend(db: Session, start_date_key: int, end_date_key: int) -> List[DailySalesTrendItem]:
     """Get daily sales trend for the last 30 days"""
     logger.info(f"Getting daily sales trend from {start_date_key} to {end_date_key}")
     
-    # First, ensure we have all dates in the range
-    all_dates = db.query(DimDate).filter(
-        DimDate.date_key >= start_date_key,
-        DimDate.date_key <= end_date_key
-    ).order_by(DimDate.date_key).all()
-    
-    logger.info(f"Found {len(all_dates)} dates in range")
-    
-    # Create a dictionary to store sales data by date
-    sales_by_date = {}
-    
-    # Get sales data for the date range
-    sales_results = db.query(
-        DimDate.date_key,
-        DimDate.full_date,
-        func.count(FactSalesEvents.vin).label('sales_count'),
-        func.coalesce(func.sum(FactSalesEvents.sale_price), 0).label('total_sales_amount')
-    ).outerjoin(
-        FactSalesEvents, DimDate.date_key == FactSalesEvents.sale_date_key
-    ).filter(
-        DimDate.date_key >= start_date_key,
-        DimDate.date_key <= end_date_key
-    ).group_by(
-        DimDate.date_key, DimDate.full_date
-    ).all()
-    
-    logger.info(f"Found {len(sales_results)} sales records")
-    
-    # Create a lookup dictionary for sales data
-    for result in sales_results:
-        sales_by_date[result.date_key] = {
-            'sales_count': result.sales_count,
-            'total_sales_amount': result.total_sales_amount
-        }
+    # One row per day of the range, days without sales included
+    points = sales_series(db, start_date_key, end_date_key, ["sales_count", "total_sales_amount"])
     
-    # Build the complete timeline with all dates
-    timeline_items = []
-    for date_record in all_dates:
-        sales_data = sales_by_date.get(date_record.date_key, {'sales_count': 0, 'total_sales_amount': 0})
-        
-        timeline_items.append(
-            DailySalesTrendItem(
-                date=date_record.full_date,
-                sales_count=sales_data['sales_count'],
-                total_sales_amount=float(sales_data['total_sales_amount'] or 0)
-            )
+    logger.info(f"Returning {len(points)} timeline items")
+    return [
+        DailySalesTrendItem(
+            date=point["period_start"],
+            sales_count=point["sales_count"],
+            total_sales_amount=float(point["total_sales_amount"] or 0)
         )
-    
-    logger.info(f"Returning {len(timeline_items)} timeline items")
-    return timeline_items
+        for point in points
+    ]
 
-async def get_inventory_by_price_range(db: Session, date_key: int) -> List[InventoryByPriceRangeItem]:
+def get_inventory_by_price_range(db: Session, date_key: int) -> List[InventoryByPriceRangeItem]:
     """Get inventory distribution by price range"""
     logger.info(f"Querying inventory for date_key: {date_key}")
     
-    # First check if we have any data for this date
-    total_inventory_check = db.query(func.count(FactDailyInventory.vin)).filter(
-        FactDailyInventory.date_key == date_key
-    ).scalar()
-    logger.info(f"Total inventory for date {date_key}: {total_inventory_check}")
-    
-    # If no data for today, try the most recent date
-    if not total_inventory_check:
-        most_recent_date = db.query(func.max(FactDailyInventory.date_key)).scalar()
-        logger.info(f"No data for {date_key}, using most recent date: {most_recent_date}")
-        if most_recent_date:
-            date_key = most_recent_date
-    
-    results = db.query(
-        DimPriceRange.range_name,
-        func.count(FactDailyInventory.vin).label('inventory_count')
-    ).join(
-        FactDailyInventory, DimPriceRange.price_range_key == FactDailyInventory.price_range_key
-    ).filter(
-        FactDailyInventory.date_key == date_key
-    ).group_by(
-        DimPriceRange.range_name
-    ).all()
+    snapshot = inventory_snapshots.for_date(db, date_key)
+    if snapshot is not None:
+        return price_range_items(snapshot.inventory_by_price_range())
     
-    logger.info(f"Found {len(results)} price range results")
+    # If no data for today, use the most recent date
+    date_key = resolve_inventory_date_key(
+        db, date_key, lambda: queries.scalar(db, INVENTORY_ROW_COUNT, date_key=date_key)
+    )
     
+    dims = dimension_cache.get(db)
+    results = queries.rows(db, INVENTORY_BY_PRICE_RANGE, date_key=date_key, price_range_keys=list(dims.price_ranges))
+    
+    logger.info(f"Found {len(results)} price range results")
+    return price_range_items([
+        PriceRangeCount(dims.range_name(result.price_range_key), result.inventory_count)
+        for result in sorted(results, key=lambda result: dims.range_order(result.price_range_key))
+    ])
+
+def price_range_items(results) -> List[InventoryByPriceRangeItem]:
     total_inventory = sum(result.inventory_count for result in results)
     
     return [
@@ -598,84 +913,60 @@ async def get_inventory_by_price_range(db: Session, date_key: int) -> List[Inven
         for result in results
     ]
 
-async def get_sales_by_brand(db: Session, start_date_key: int, end_date_key: int) -> List[SalesByBrandItem]:
-    """Get sales distribution by brand"""
+def get_sales_by_brand(db: Session, start_date_key: int, end_date_key: int) -> List[SalesByBrandItem]:
+    """Get sales distribution by brand (top 10 plus "Other", percentages of all sales)"""
     logger.info(f"Querying sales by brand from {start_date_key} to {end_date_key}")
     
-    results = db.query(
-        DimVehicle.brand,
-        func.count(FactSalesEvents.vin).label('sales_count'),
-        func.avg(FactSalesEvents.sale_price).label('avg_sale_price')
-    ).join(
-        FactSalesEvents, DimVehicle.vehicle_key == FactSalesEvents.vehicle_key
-    ).filter(
-        FactSalesEvents.sale_date_key >= start_date_key,
-        FactSalesEvents.sale_date_key <= end_date_key
-    ).group_by(
-        DimVehicle.brand
-    ).order_by(
-        desc(func.count(FactSalesEvents.vin))
-    ).limit(10).all()
-    
-    logger.info(f"Found {len(results)} brand results")
+    ranking = rank_sales(db, SALES_BY_BRAND, [DimVehicle.brand], ["sale_price"], start_date_key, end_date_key, 10)
+    logger.info(f"Found {len(ranking.top)} brand results out of {ranking.total} sales")
     
     # If no results in date range, get any sales data available
-    if not results:
+    if not ranking.total:
         logger.info("No sales in date range, checking all sales")
-        results = db.query(
-            DimVehicle.brand,
-            func.count(FactSalesEvents.vin).label('sales_count'),
-            func.avg(FactSalesEvents.sale_price).label('avg_sale_price')
-        ).join(
-            FactSalesEvents, DimVehicle.vehicle_key == FactSalesEvents.vehicle_key
-        ).group_by(
-            DimVehicle.brand
-        ).order_by(
-            desc(func.count(FactSalesEvents.vin))
-        ).limit(10).all()
-        logger.info(f"Found {len(results)} total brand results")
-    
-    total_sales = sum(result.sales_count for result in results)
+        ranking = rank_sales(db, SALES_BY_BRAND, [DimVehicle.brand], ["sale_price"], None, None, 10)
+        logger.info(f"Found {len(ranking.top)} total brand results")
     
-    return [
+    items = [
         SalesByBrandItem(
-            brand=result.brand or "Unknown",
-            sales_count=result.sales_count,
-            percentage=round((result.sales_count / total_sales * 100), 2) if total_sales > 0 else 0,
-            avg_sale_price=float(result.avg_sale_price or 0)
+            brand=group.keys[0] or "Unknown",
+            sales_count=group.count,
+            percentage=ranking.percentage(group),
+            avg_sale_price=group.averages["sale_price"]
         )
-        for result in results
+        for group in ranking.top
     ]
+    if ranking.other is not None:
+        items.append(SalesByBrandItem(
+            brand=OTHER_BRANDS,
+            sales_count=ranking.other.count,
+            percentage=ranking.percentage(ranking.other),
+            avg_sale_price=ranking.other.averages["sale_price"]
+        ))
+    return items
 
-async def get_days_on_lot_by_price_range(db: Session, date_key: int) -> List[DaysOnLotByPriceRangeItem]:
+def get_days_on_lot_by_price_range(db: Session, date_key: int) -> List[DaysOnLotByPriceRangeItem]:
     """Get average days on lot by price range"""
     logger.info(f"Querying days on lot for date_key: {date_key}")
     
-    # If no data for today, try the most recent date
-    data_check = db.query(func.count(FactDailyInventory.vin)).filter(
-        FactDailyInventory.date_key == date_key
-    ).scalar()
-    
-    if not data_check:
-        most_recent_date = db.query(func.max(FactDailyInventory.date_key)).scalar()
-        logger.info(f"No data for {date_key}, using most recent date: {most_recent_date}")
-        if most_recent_date:
-            date_key = most_recent_date
-    
-    results = db.query(
-        DimPriceRange.range_name,
-        func.avg(FactDailyInventory.days_on_lot).label('avg_days_on_lot')
-    ).join(
-        FactDailyInventory, DimPriceRange.price_range_key == FactDailyInventory.price_range_key
-    ).filter(
-        FactDailyInventory.date_key == date_key,
-        FactDailyInventory.days_on_lot > 0
-    ).group_by(
-        DimPriceRange.range_name
-    ).all()
+    snapshot = inventory_snapshots.for_date(db, date_key)
+    if snapshot is not None:
+        return days_on_lot_items(snapshot.days_on_lot_by_price_range())
     
-    logger.info(f"Found {len(results)} days on lot results")
+    # If no data for today, use the most recent date
+    date_key = resolve_inventory_date_key(
+        db, date_key, lambda: queries.scalar(db, INVENTORY_ROW_COUNT, date_key=date_key)
+    )
     
+    dims = dimension_cache.get(db)
+    results = queries.rows(db, DAYS_ON_LOT_BY_PRICE_RANGE, date_key=date_key, price_range_keys=list(dims.price_ranges))
+    
+    logger.info(f"Found {len(results)} days on lot results")
+    return days_on_lot_items([
+        PriceRangeDaysOnLot(dims.range_name(result.price_range_key), result.avg_days_on_lot)
+        for result in sorted(results, key=lambda result: dims.range_order(result.price_range_key))
+    ])
+
+def days_on_lot_items(results) -> List[DaysOnLotByPriceRangeItem]:
     return [
         DaysOnLotByPriceRangeItem(
             price_range=result.range_name,
@@ -684,74 +975,75 @@ async def get_days_on_lot_by_price_range(db: Session, date_key: int) -> List[Day
         for result in results
     ]
 
-async def get_top_selling_models(db: Session, start_date_key: int, end_date_key: int) -> List[TopSellingModelItem]:
+def get_top_selling_models(db: Session, start_date_key: int, end_date_key: int) -> List[TopSellingModelItem]:
     """Get top selling models"""
-    results = db.query(
-        DimVehicle.manufacturer,
-        DimVehicle.model,
-        DimVehicle.brand,
-        func.count(FactSalesEvents.vin).label('units_sold'),
-        func.avg(FactSalesEvents.sale_price).label('avg_sale_price'),
-        func.avg(FactSalesEvents.days_to_sell).label('avg_days_to_sell')
-    ).join(
-        FactSalesEvents, DimVehicle.vehicle_key == FactSalesEvents.vehicle_key
-    ).filter(
-        FactSalesEvents.sale_date_key >= start_date_key,
-        FactSalesEvents.sale_date_key <= end_date_key
-    ).group_by(
-        DimVehicle.manufacturer,
-        DimVehicle.model,
-        DimVehicle.brand
-    ).order_by(
-        desc(func.count(FactSalesEvents.vin))
-    ).limit(10).all()
+    ranking = rank_sales(
+        db, SALES_BY_MODEL, [DimVehicle.manufacturer, DimVehicle.model, DimVehicle.brand],
+        ["sale_price", "days_to_sell"], start_date_key, end_date_key, 10
+    )
     
     return [
         TopSellingModelItem(
-            manufacturer=result.manufacturer,
-            model=result.model,
-            brand=result.brand or "Unknown",
-            units_sold=result.units_sold,
-            avg_sale_price=float(result.avg_sale_price or 0),
-            avg_days_to_sell=float(result.avg_days_to_sell or 0)
+            manufacturer=group.keys[0],
+            model=group.keys[1],
+            brand=group.keys[2] or "Unknown",
+            units_sold=group.count,
+            avg_sale_price=group.averages["sale_price"],
+            avg_days_to_sell=group.averages["days_to_sell"]
         )
-        for result in results
+        for group in ranking.top
     ]
 
-async def get_slow_moving_inventory(db: Session, date_key: int) -> List[SlowMovingInventoryItem]:
+def rank_sales(db: Session, dimension: str, group_columns: list, value_names: List[str],
+               start_date_key: Optional[int], end_date_key: Optional[int], n: int) -> Ranking:
+    """Top-N sales groups; windows of RANKING_SKETCH_MIN_DAYS or more use the daily sketches when available"""
+    if start_date_key is not None and end_date_key is not None and settings.ranking_sketch_min_days > 0:
+        window_days = (
+            datetime.strptime(str(end_date_key), "%Y%m%d") - datetime.strptime(str(start_date_key), "%Y%m%d")
+        ).days + 1
+        if window_days >= settings.ranking_sketch_min_days:
+            ranking = sketch_top_n(db, dimension, value_names, start_date_key, end_date_key, n)
+            if ranking is not None:
+                return ranking
+    
+    filters = []
+    if start_date_key is not None:
+        filters.append(FactSalesEvents.sale_date_key >= start_date_key)
+    if end_date_key is not None:
+        filters.append(FactSalesEvents.sale_date_key <= end_date_key)
+    return rank_top_n(
+        db,
+        FactSalesEvents.__table__.join(DimVehicle.__table__, FactSalesEvents.vehicle_key == DimVehicle.vehicle_key),
+        group_columns,
+        FactSalesEvents.vin,
+        {name: getattr(FactSalesEvents, name) for name in value_names},
+        filters,
+        n
+    )
+
+def get_slow_moving_inventory(db: Session, date_key: int) -> List[SlowMovingInventoryItem]:
     """Get slow moving inventory (vehicles on lot > 30 days)"""
     logger.info(f"Querying slow moving inventory for date_key: {date_key}")
     
-    # If no data for today, try the most recent date
-    data_check = db.query(func.count(FactDailyInventory.vin)).filter(
-        FactDailyInventory.date_key == date_key,
-        FactDailyInventory.days_on_lot > 30
-    ).scalar()
-    
-    if not data_check:
-        most_recent_date = db.query(func.max(FactDailyInventory.date_key)).scalar()
-        logger.info(f"No data for {date_key}, using most recent date: {most_recent_date}")
-        if most_recent_date:
-            date_key = most_recent_date
-    
-    results = db.query(
-        FactDailyInventory.vin,
-        FactDailyInventory.days_on_lot,
-        DimVehicle.manufacturer,
-        DimVehicle.model,
-        DimVehicle.brand,
-        FactDailyInventory.price
-    ).join(
-        DimVehicle, FactDailyInventory.vehicle_key == DimVehicle.vehicle_key
-    ).filter(
-        FactDailyInventory.date_key == date_key,
-        FactDailyInventory.days_on_lot > 30
-    ).distinct().order_by(
-        desc(FactDailyInventory.days_on_lot)
-    ).limit(20).all()
+    snapshot = inventory_snapshots.for_date(db, date_key)
+    if snapshot is not None:
+        return slow_moving_items(snapshot.slow_moving(min_days=30, limit=20))
     
-    logger.info(f"Found {len(results)} slow moving inventory items")
+    # If no data for today, use the most recent date
+    date_key = resolve_inventory_date_key(
+        db, date_key, lambda: queries.scalar(db, SLOW_MOVING_COUNT, date_key=date_key)
+    )
     
+    dims = dimension_cache.get(db)
+    results = queries.rows(db, SLOW_MOVING, date_key=date_key)
+    
+    logger.info(f"Found {len(results)} slow moving inventory items")
+    return slow_moving_items([
+        SlowMovingVehicle(result.vin, result.days_on_lot, *dims.vehicle(result.vehicle_key), result.price)
+        for result in results
+    ])
+
+def slow_moving_items(results) -> List[SlowMovingInventoryItem]:
     return [
         SlowMovingInventoryItem(
             vin=result.vin,
@@ -764,48 +1056,17 @@ async def get_slow_moving_inventory(db: Session, date_key: int) -> List[SlowMovi
         for result in results
     ]
 
-async def get_recent_sales(db: Session, end_date_key: int) -> List[RecentSaleItem]:
+def get_recent_sales(db: Session, end_date_key: int) -> List[RecentSaleItem]:
     """Get recent sales (last 10 unique sales)"""
     logger.info(f"Querying recent sales up to date_key: {end_date_key}")
     
-    results = db.query(
-        DimDate.full_date,
-        FactSalesEvents.vin,
-        FactSalesEvents.sale_date_key,
-        DimVehicle.manufacturer,
-        DimVehicle.model,
-        DimVehicle.brand,
-        FactSalesEvents.sale_price,
-        FactSalesEvents.days_to_sell
-    ).join(
-        DimDate, FactSalesEvents.sale_date_key == DimDate.date_key
-    ).join(
-        DimVehicle, FactSalesEvents.vehicle_key == DimVehicle.vehicle_key
-    ).filter(
-        FactSalesEvents.sale_date_key <= end_date_key
-    ).distinct().order_by(
-        desc(FactSalesEvents.sale_date_key)
-    ).limit(10).all()
+    dims = dimension_cache.get(db)
+    results = queries.rows(db, RECENT_SALES, end_date_key=end_date_key)
     
     # If no recent sales, get any sales available
     if not results:
         logger.info("No recent sales found, getting any available sales")
-        results = db.query(
-            DimDate.full_date,
-            FactSalesEvents.vin,
-            FactSalesEvents.sale_date_key,
-            DimVehicle.manufacturer,
-            DimVehicle.model,
-            DimVehicle.brand,
-            FactSalesEvents.sale_price,
-            FactSalesEvents.days_to_sell
-        ).join(
-            DimDate, FactSalesEvents.sale_date_key == DimDate.date_key
-        ).join(
-            DimVehicle, FactSalesEvents.vehicle_key == DimVehicle.vehicle_key
-        ).distinct().order_by(
-            desc(FactSalesEvents.sale_date_key)
-        ).limit(10).all()
+        results = queries.rows(db, LATEST_SALES)
     
     logger.info(f"Found {len(results)} recent sales")
     
@@ -813,15 +1074,36 @@ async def get_recent_sales(db: Session, end_date_key: int) -> List[RecentSaleIte
         RecentSaleItem(
             sale_date=result.full_date,
             vin=result.vin,
-            manufacturer=result.manufacturer,
-            model=result.model,
-            brand=result.brand or "Unknown",
+            manufacturer=vehicle.manufacturer,
+            model=vehicle.model,
+            brand=vehicle.brand or "Unknown",
             sale_price=float(result.sale_price or 0),
             days_to_sell=result.days_to_sell or 0
         )
-        for result in results
+        for result, vehicle in ((result, dims.vehicle(result.vehicle_key)) for result in results)
     ]
 
+# Dashboard sections, in response order. Each one is cached on its own with its own TTL.
+section_loader = SectionLoader(
+    [
+        Section(name, loader, settings.dashboard_section_ttls.get(name, settings.dashboard_section_ttl_seconds))
+        for name, loader in [
+            ("kpis", lambda db, w, approximate: get_kpis(db, w.today_key, approximate)),
+            ("daily_sales_trend", lambda db, w: get_daily_sales_trend(db, w.thirty_days_ago_key, w.today_key)),
+            ("inventory_by_price_range", lambda db, w: get_inventory_by_price_range(db, w.today_key)),
+            ("sales_by_brand", lambda db, w: get_sales_by_brand(db, w.thirty_days_ago_key, w.today_key)),
+            ("days_on_lot_by_price_range", lambda db, w: get_days_on_lot_by_price_range(db, w.today_key)),
+            ("top_selling_models", lambda db, w: get_top_selling_models(db, w.thirty_days_ago_key, w.today_key)),
+            ("slow_moving_inventory", lambda db, w: get_slow_moving_inventory(db, w.today_key)),
+            ("recent_sales", lambda db, w: get_recent_sales(db, w.today_key)),
+        ]
+    ],
+    soft_timeout_seconds=settings.dashboard_section_soft_timeout_seconds,
+    shared=shared_tier("sections"),
+    version=data_version.key,
+    timeouts=statement_timeouts
+)
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=9515)
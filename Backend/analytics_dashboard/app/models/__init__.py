@@ -1,4 +1,4 @@
-from sqlalchemy import create_engine, Column, Integer, String, Date, Numeric, ForeignKey, Text, Boolean
+from sqlalchemy import create_engine, Column, Integer, String, Date, Numeric, ForeignKey, Text, Boolean, LargeBinary
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, relationship
 from sqlalchemy.dialects.postgresql import INTEGER, VARCHAR, NUMERIC, DATE
@@ -89,3 +89,13 @@ class FactSalesEvents(Base):
     # Relationships
     sale_date = relationship("DimDate")
     vehicle = relationship("DimVehicle", back_populates="sales_events")
+
+class DailySketch(Base):
+    __tablename__ = "daily_sketches"
+    
+    # One mergeable summary per day, sketch type and dimension (see app/sketches.py)
+    date_key = Column(INTEGER, ForeignKey("dim_date.date_key"), primary_key=True)
+    sketch_type = Column(VARCHAR(20), primary_key=True)
+    dimension = Column(VARCHAR(50), primary_key=True)
+    dimension_value = Column(VARCHAR(100), primary_key=True, default="")  # "" = all rows of the day
+    payload = Column(LargeBinary, nullable=False)
@@ -0,0 +1,75 @@
+"""
+Vectorized price band assignment.
+
+Bands come from dim_price_range. They are sorted by min_price and looked up
+with a binary search (numpy.searchsorted) over the lower boundaries, so a
+batch of N prices is classified in O(N log B) inside numpy instead of one
+range join probe per row.
+
+This module only depends on numpy so the Spark jobs can ship it to executors
+as a plain file (see etl_common.share_backend_module).
+"""
+from typing import Iterable, Tuple
+import numpy as np
+
+UNASSIGNED = -1
+
+class PriceBandClassifier:
+    """Assigns price_range_key values to prices.
+
+    A band covers [min_price, max_price], cut off at the next band's
+    min_price when the two share a boundary, so every price maps to at most
+    one band. Prices outside every band (or NaN) get UNASSIGNED.
+    """
+
+    def __init__(self, bands: Iterable[Tuple[int, float, float]]):
+        ordered = sorted(bands, key=lambda band: float(band[1]))
+        self.keys = np.array([int(band[0]) for band in ordered], dtype=np.int64)
+        self.lower = np.array([float(band[1]) for band in ordered], dtype=np.float64)
+        self.upper = np.array([float(band[2]) for band in ordered], dtype=np.float64)
+
+    @classmethod
+    def from_rows(cls, rows) -> "PriceBandClassifier":
+        """Build from DimPriceRange objects or rows with the same attribute names"""
+        return cls((row.price_range_key, row.min_price, row.max_price) for row in rows)
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def band_index(self, prices) -> np.ndarray:
+        """Index into the sorted bands for each price, UNASSIGNED when none matches"""
+        values = np.asarray(prices, dtype=np.float64)
+        if not len(self.keys):
+            return np.full(values.shape, UNASSIGNED, dtype=np.int64)
+
+        idx = np.searchsorted(self.lower, values, side="right") - 1
+        clipped = np.clip(idx, 0, len(self.keys) - 1)
+        valid = (idx >= 0) & (values <= self.upper[clipped])  # NaN compares False
+        return np.where(valid, idx, UNASSIGNED)
+
+    def classify(self, prices) -> np.ndarray:
+        """price_range_key for each price, UNASSIGNED when none matches"""
+        idx = self.band_index(prices)
+        if not len(self.keys):
+            return idx
+        return np.where(idx >= 0, self.keys[np.clip(idx, 0, None)], UNASSIGNED)
+
+    def counts(self, prices) -> Tuple[np.ndarray, int]:
+        """Per-band counts in sorted band order, plus the number of unassigned prices"""
+        idx = self.band_index(prices)
+        assigned = idx[idx >= 0]
+        return np.bincount(assigned, minlength=len(self.keys)), int(idx.size - assigned.size)
+
+    def pandas_udf(self):
+        """Wrap the classifier as a Spark pandas UDF returning a nullable int column"""
+        import pandas as pd
+        from pyspark.sql.functions import pandas_udf
+
+        classifier = self
+
+        @pandas_udf("int")
+        def price_range_key(prices: pd.Series) -> pd.Series:
+            keys = classifier.classify(prices.to_numpy(dtype="float64", na_value=np.nan))
+            return pd.Series(keys, dtype="Int64").mask(keys == UNASSIGNED)
+
+        return price_range_key
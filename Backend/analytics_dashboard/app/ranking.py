@@ -0,0 +1,176 @@
+"""
+Top-N rankings with an "Other" bucket and the true grand total.
+
+rank_top_n aggregates the window once, ranks the groups with row_number()
+and folds everything below rank N into a single "Other" row in the same
+statement, so the database returns N + 1 rows and the grand total instead
+of every group. Percentages are computed against the grand total rather than
+the sum of the top N.
+
+sketch_top_n answers the same question from the per-day Space-Saving
+summaries in daily_sketches (approximate, but independent of window length).
+build_daily_sales_sketches (re)builds those summaries from fact_sales_events.
+"""
+from typing import Dict, List, NamedTuple, Optional
+import logging
+
+from sqlalchemy import case, func, select
+from sqlalchemy.orm import Session
+
+from .models import DailySketch, DimDate, DimVehicle, FactSalesEvents
+from .sketches import (
+    DEFAULT_CAPACITY, SALES_BY_BRAND, SALES_BY_MODEL, SPACE_SAVING, SpaceSaving, merge_all
+)
+
+logger = logging.getLogger(__name__)
+
+class RankedGroup(NamedTuple):
+    keys: Optional[tuple]  # group column values, None for the "Other" bucket
+    count: int
+    averages: Dict[str, float]
+
+class Ranking(NamedTuple):
+    top: List[RankedGroup]
+    other: Optional[RankedGroup]
+    total: int
+    approximate: bool = False
+
+    def percentage(self, group: RankedGroup) -> float:
+        return round((group.count / self.total * 100), 2) if self.total > 0 else 0
+
+def rank_top_n(db: Session, from_clause, group_columns: list, count_column, averages: Dict[str, object],
+               filters: list, n: int) -> Ranking:
+    """Exact top-N groups by count(count_column), the rest folded into one "Other" group"""
+    grouped = select(
+        *[column.label(f"group_{i}") for i, column in enumerate(group_columns)],
+        func.count(count_column).label("item_count"),
+        *[func.sum(column).label(f"{name}_sum") for name, column in averages.items()],
+        *[func.count(column).label(f"{name}_n") for name, column in averages.items()]
+    ).select_from(from_clause).where(*filters).group_by(*group_columns).subquery("grouped")
+
+    group_keys = [grouped.c[f"group_{i}"] for i in range(len(group_columns))]
+    rank = func.row_number().over(order_by=[grouped.c.item_count.desc(), *group_keys])
+    ranked = select(
+        grouped,
+        case((rank <= n, rank), else_=n + 1).label("bucket"),
+        func.sum(grouped.c.item_count).over().label("grand_total")
+    ).subquery("ranked")
+
+    rows = db.execute(
+        select(
+            ranked.c.bucket,
+            *[func.min(ranked.c[f"group_{i}"]).label(f"group_{i}") for i in range(len(group_columns))],
+            func.sum(ranked.c.item_count).label("item_count"),
+            *[func.sum(ranked.c[f"{name}_sum"]).label(f"{name}_sum") for name in averages],
+            *[func.sum(ranked.c[f"{name}_n"]).label(f"{name}_n") for name in averages],
+            func.max(ranked.c.grand_total).label("grand_total")
+        ).group_by(ranked.c.bucket).order_by(ranked.c.bucket)
+    ).all()
+
+    top, other, total = [], None, 0
+    for row in rows:
+        mapping = row._mapping
+        total = int(mapping["grand_total"] or 0)
+        group = RankedGroup(
+            keys=tuple(mapping[f"group_{i}"] for i in range(len(group_columns))) if row.bucket <= n else None,
+            count=int(mapping["item_count"]),
+            averages={
+                name: float(mapping[f"{name}_sum"] or 0) / int(mapping[f"{name}_n"]) if mapping[f"{name}_n"] else 0.0
+                for name in averages
+            }
+        )
+        if group.keys is None:
+            other = group
+        else:
+            top.append(group)
+    return Ranking(top, other, total)
+
+def sketch_top_n(db: Session, dimension: str, value_names: List[str], start_date_key: int, end_date_key: int,
+                 n: int) -> Optional[Ranking]:
+    """Approximate top-N from daily Space-Saving summaries, None unless every day of the window has one"""
+    expected_days = db.query(func.count(DimDate.date_key)).filter(
+        DimDate.date_key >= start_date_key,
+        DimDate.date_key <= end_date_key
+    ).scalar() or 0
+    payloads = db.query(DailySketch.payload).filter(
+        DailySketch.sketch_type == SPACE_SAVING,
+        DailySketch.dimension == dimension,
+        DailySketch.dimension_value == "",
+        DailySketch.date_key >= start_date_key,
+        DailySketch.date_key <= end_date_key
+    ).all()
+    if not expected_days or len(payloads) < expected_days:
+        logger.info(f"{dimension} sketches cover {len(payloads)}/{expected_days} days, using exact ranking")
+        return None
+
+    merged = merge_all(SpaceSaving.from_bytes(row.payload) for row in payloads)
+    hitters = merged.top(n)
+    top = [
+        RankedGroup(
+            keys=hitter.item if isinstance(hitter.item, tuple) else (hitter.item,),
+            count=hitter.count,
+            averages={name: hitter.average(i) for i, name in enumerate(value_names)}
+        )
+        for hitter in hitters
+    ]
+
+    # Whatever the top N do not account for is "Other"
+    other_count = max(merged.total - sum(hitter.count for hitter in hitters), 0)
+    other_observed = merged.total - sum(hitter.guaranteed for hitter in hitters)
+    other = None
+    if other_count:
+        other = RankedGroup(None, other_count, {
+            name: (merged.value_totals[i] - sum(hitter.sums[i] for hitter in hitters)) / other_observed
+            if other_observed > 0 else 0.0
+            for i, name in enumerate(value_names)
+        })
+    return Ranking(top, other, merged.total, approximate=True)
+
+def build_daily_sales_sketches(db: Session, start_date_key: int, end_date_key: int,
+                               capacity: int = DEFAULT_CAPACITY) -> int:
+    """Rebuild the sales summaries of every day in the range (days without sales get empty ones)"""
+    date_keys = [row.date_key for row in db.query(DimDate.date_key).filter(
+        DimDate.date_key >= start_date_key,
+        DimDate.date_key <= end_date_key
+    )]
+    joined = FactSalesEvents.__table__.join(DimVehicle.__table__, FactSalesEvents.vehicle_key == DimVehicle.vehicle_key)
+    in_range = [FactSalesEvents.sale_date_key >= start_date_key, FactSalesEvents.sale_date_key <= end_date_key]
+
+    by_brand = {key: [] for key in date_keys}
+    for row in db.execute(
+        select(FactSalesEvents.sale_date_key, DimVehicle.brand, func.count(FactSalesEvents.vin),
+               func.sum(FactSalesEvents.sale_price))
+        .select_from(joined).where(*in_range).group_by(FactSalesEvents.sale_date_key, DimVehicle.brand)
+    ):
+        by_brand.setdefault(row[0], []).append((row[1], row[2], row[3]))
+
+    by_model = {key: [] for key in date_keys}
+    for row in db.execute(
+        select(FactSalesEvents.sale_date_key, DimVehicle.manufacturer, DimVehicle.model, DimVehicle.brand,
+               func.count(FactSalesEvents.vin), func.sum(FactSalesEvents.sale_price),
+               func.sum(FactSalesEvents.days_to_sell))
+        .select_from(joined).where(*in_range)
+        .group_by(FactSalesEvents.sale_date_key, DimVehicle.manufacturer, DimVehicle.model, DimVehicle.brand)
+    ):
+        by_model.setdefault(row[0], []).append(((row[1], row[2], row[3]), row[4], row[5], row[6]))
+
+    db.query(DailySketch).filter(
+        DailySketch.sketch_type == SPACE_SAVING,
+        DailySketch.dimension.in_([SALES_BY_BRAND, SALES_BY_MODEL]),
+        DailySketch.date_key >= start_date_key,
+        DailySketch.date_key <= end_date_key
+    ).delete(synchronize_session=False)
+    db.bulk_save_objects(
+        [
+            DailySketch(date_key=key, sketch_type=SPACE_SAVING, dimension=SALES_BY_BRAND, dimension_value="",
+                        payload=SpaceSaving.from_counts(rows, capacity, n_values=1).to_bytes())
+            for key, rows in by_brand.items()
+        ] + [
+            DailySketch(date_key=key, sketch_type=SPACE_SAVING, dimension=SALES_BY_MODEL, dimension_value="",
+                        payload=SpaceSaving.from_counts(rows, capacity, n_values=2).to_bytes())
+            for key, rows in by_model.items()
+        ]
+    )
+    db.commit()
+    logger.info(f"Built sales sketches for {len(by_brand)} days ({start_date_key} - {end_date_key})")
+    return len(by_brand)
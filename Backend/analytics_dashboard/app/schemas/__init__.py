@@ -1,6 +1,6 @@
 from pydantic import BaseModel, ConfigDict
-from typing import Optional, List
-from datetime import date
+from typing import Any, Dict, Optional, List
+from datetime import date, datetime
 from decimal import Decimal
 
 class DimDateSchema(BaseModel):
@@ -85,6 +85,8 @@ class KPIResponse(BaseModel):
     total_sales_today: int
     average_days_to_sell: float
     average_sale_price: float
+    # Set when total_active_inventory was estimated from HyperLogLog sketches
+    total_active_inventory_relative_error: Optional[float] = None
 
 class DailySalesTrendItem(BaseModel):
     date: date
@@ -132,11 +134,48 @@ class RecentSaleItem(BaseModel):
     days_to_sell: int
 
 class DashboardResponse(BaseModel):
-    kpis: KPIResponse
-    daily_sales_trend: List[DailySalesTrendItem]
-    inventory_by_price_range: List[InventoryByPriceRangeItem]
-    sales_by_brand: List[SalesByBrandItem]
-    days_on_lot_by_price_range: List[DaysOnLotByPriceRangeItem]
-    top_selling_models: List[TopSellingModelItem]
-    slow_moving_inventory: List[SlowMovingInventoryItem]
-    recent_sales: List[RecentSaleItem]
+    # Sections are omitted when not selected with ?sections= or when they failed to load
+    kpis: Optional[KPIResponse] = None
+    daily_sales_trend: Optional[List[DailySalesTrendItem]] = None
+    inventory_by_price_range: Optional[List[InventoryByPriceRangeItem]] = None
+    sales_by_brand: Optional[List[SalesByBrandItem]] = None
+    days_on_lot_by_price_range: Optional[List[DaysOnLotByPriceRangeItem]] = None
+    top_selling_models: Optional[List[TopSellingModelItem]] = None
+    slow_moving_inventory: Optional[List[SlowMovingInventoryItem]] = None
+    recent_sales: Optional[List[RecentSaleItem]] = None
+    # Sections served from their last good value / not available at all
+    stale_sections: List[str] = []
+    failed_sections: List[str] = []
+
+class DashboardSectionResponse(BaseModel):
+    section: str
+    data: Any
+    stale: bool = False
+    computed_at: Optional[datetime] = None
+
+# Price band classification
+class PriceBandClassifyRequest(BaseModel):
+    prices: List[float]
+
+class PriceBandCountItem(BaseModel):
+    price_range_key: int
+    price_range: str
+    count: int
+    percentage: float
+
+class PriceBandClassifyResponse(BaseModel):
+    price_range_keys: List[Optional[int]]
+    distribution: List[PriceBandCountItem]
+    unassigned_count: int
+
+# Sales time series
+class SalesTimeSeriesResponse(BaseModel):
+    granularity: str
+    start_date: date
+    end_date: date
+    metrics: List[str]
+    # {"period_start": date, ["brand": str,] <metric>: number | null}
+    points: List[Dict[str, Any]]
+    # Set when a statement timeout served the last good series
+    stale: bool = False
+    computed_at: Optional[datetime] = None
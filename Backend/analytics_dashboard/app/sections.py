@@ -0,0 +1,162 @@
+"""
+Section-level dashboard loading.
+
+Every dashboard section (kpis, daily_sales_trend, ...) is computed and cached
+on its own, keyed by section name and reporting window, with its own TTL.
+Each computation runs in the threadpool on its own session, under the
+section's statement timeout. When a section raises (a timeout included), or
+is still running after the soft timeout, the last good value is served and
+the section is reported as stale instead of failing the page; a slow
+computation keeps running and refills the cache when it finishes.
+
+With a shared tier (SharedPayloadCache for the host, RedisPayloadCache for
+every replica) the computed sections are also stored for the other workers,
+and only one of them computes a given section at a time. Shared keys carry
+the loaded data version, so a new ETL load never serves another worker's
+value from before it.
+"""
+from datetime import date, datetime, timedelta
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+import asyncio
+import logging
+import time
+
+from fastapi.encoders import jsonable_encoder
+from starlette.concurrency import run_in_threadpool
+
+from .cache import TTLCache
+from .database import new_session
+from .timeouts import StatementTimeouts, statement_timeout
+
+logger = logging.getLogger(__name__)
+
+class DashboardWindow(NamedTuple):
+    today_key: int
+    thirty_days_ago_key: int
+
+def dashboard_window(anchor_date_key: Optional[int] = None, lag_days: int = 2, days: int = 30) -> DashboardWindow:
+    """Reporting window of the dashboard, ending at the anchor day (last loaded day) or today minus lag_days"""
+    if anchor_date_key is not None:
+        today = datetime.strptime(str(anchor_date_key), "%Y%m%d").date()
+    else:
+        today = date.today() - timedelta(days=lag_days)
+    start = today - timedelta(days=days)
+    return DashboardWindow(int(today.strftime("%Y%m%d")), int(start.strftime("%Y%m%d")))
+
+class Section(NamedTuple):
+    name: str
+    loader: Callable  # (db, DashboardWindow, *params) -> section payload
+    ttl_seconds: float
+
+class SectionResult(NamedTuple):
+    value: Any
+    stale: bool = False
+    failed: bool = False
+    computed_at: Optional[float] = None
+
+class SectionLoader:
+    """Loads dashboard sections through a per-section TTL cache"""
+
+    def __init__(self, sections: List[Section], soft_timeout_seconds: float,
+                 cache: Optional[TTLCache] = None, session_factory=new_session,
+                 shared=None, version: Optional[Callable[[], str]] = None,
+                 timeouts: Optional[StatementTimeouts] = None):
+        self.sections: Dict[str, Section] = {section.name: section for section in sections}
+        self.soft_timeout_seconds = soft_timeout_seconds
+        self.cache = cache or TTLCache()
+        self.session_factory = session_factory
+        self.shared = shared  # SharedPayloadCache / RedisPayloadCache
+        self.version = version  # loaded data version, part of the shared keys
+        self.timeouts = timeouts or StatementTimeouts(0)
+        self._inflight: Dict[tuple, asyncio.Task] = {}
+
+    @property
+    def names(self) -> List[str]:
+        return list(self.sections)
+
+    def invalidate(self, names: List[str]) -> None:
+        """Expire cached values of sections, e.g. after a new day was loaded"""
+        names = set(names)
+        dropped = self.cache.invalidate_where(lambda key: key[0] in names)
+        if self.shared is not None:
+            dropped += sum(self.shared.invalidate(f"{name}@") for name in names)
+        if dropped:
+            logger.info(f"Invalidated {dropped} cached dashboard section(s): {sorted(names)}")
+
+    async def load_many(self, names: List[str], window: DashboardWindow,
+                        params: Optional[Dict[str, tuple]] = None) -> Dict[str, SectionResult]:
+        """Load the sections concurrently, so the page waits for its slowest section, not their sum"""
+        params = params or {}
+        results = await asyncio.gather(*(self.load(name, window, params.get(name, ())) for name in names))
+        return dict(zip(names, results))
+
+    async def load(self, name: str, window: DashboardWindow, params: tuple = ()) -> SectionResult:
+        """params: extra loader arguments (e.g. query parameters), part of the cache key"""
+        section = self.sections[name]
+        key = (name, window, params)
+        cached = self.cache.get(key)
+        if cached is not None:
+            value, computed_at = cached
+            return SectionResult(value, computed_at=computed_at)
+
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(run_in_threadpool(self._compute, section, window, params))
+            task.add_done_callback(lambda done: self._finish(section, key, done))
+            self._inflight[key] = task
+
+        has_fallback = self.cache.last_good((name, params)) is not None
+        try:
+            # Without a fallback there is nothing better to serve, so wait it out
+            timeout = self.soft_timeout_seconds if has_fallback else None
+            value, computed_at = await asyncio.wait_for(asyncio.shield(task), timeout)
+            return SectionResult(value, computed_at=computed_at)
+        except asyncio.TimeoutError:
+            logger.warning(f"Section {name} exceeded {self.soft_timeout_seconds}s, serving last good value")
+        except Exception:
+            pass  # logged by _finish
+        return self._fallback(name, params)
+
+    def _compute(self, section: Section, window: DashboardWindow, params: tuple = ()):
+        if self.shared is None:
+            return self._run(section, window, params)
+
+        key = f"{section.name}@{window.thirty_days_ago_key}-{window.today_key}"
+        if params:
+            key += "@" + ",".join(str(param) for param in params)
+        if self.version is not None:
+            key += f"@{self.version()}"  # before _run opens the section's session
+        with self.shared.lock(key):
+            cached = self.shared.get(key, section.ttl_seconds)
+            if cached is not None:
+                return cached  # computed by another worker
+            value, computed_at = self._run(section, window, params)
+            self.shared.set(key, jsonable_encoder(value), computed_at)
+        return value, computed_at
+
+    def _run(self, section: Section, window: DashboardWindow, params: tuple = ()):
+        db = self.session_factory()
+        try:
+            with statement_timeout(db, section.name, self.timeouts.for_helper(section.name)):
+                value = section.loader(db, window, *params)
+        finally:
+            db.close()
+        return value, time.time()
+
+    def _finish(self, section: Section, key: tuple, task: asyncio.Task) -> None:
+        self._inflight.pop(key, None)
+        if task.cancelled():
+            return
+        if task.exception() is not None:
+            logger.error(f"Error loading dashboard section {section.name}: {str(task.exception())}")
+            return
+        # Last good value per section and params: an exact request never falls back to an estimate
+        name, _, params = key
+        self.cache.set(key, task.result(), section.ttl_seconds, group=(name, params))
+
+    def _fallback(self, name: str, params: tuple = ()) -> SectionResult:
+        last_good = self.cache.last_good((name, params))
+        if last_good is None:
+            return SectionResult(None, failed=True)
+        (value, computed_at), _ = last_good
+        return SectionResult(value, stale=True, computed_at=computed_at)
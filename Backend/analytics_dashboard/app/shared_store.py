@@ -0,0 +1,157 @@
+"""
+Host-wide store shared by the API worker processes.
+
+Production runs several workers per container, and anything cached in
+process memory would be loaded and warmed once per worker. With
+SHARED_STORE_DIR set (ideally on tmpfs, e.g. /dev/shm) the first worker to
+need a value writes it there and the others read it:
+
+- SharedSnapshotFiles: one immutable directory of .npy columns per load
+  (load_manifest.load_id, so a same-day reload gets its own), published with a rename plus an atomic swap of the `current` symlink and
+  memory-mapped read-only by every worker, so the pages exist once per host.
+- SharedPayloadCache: JSON-encoded dashboard sections with their compute
+  time; a per-key lock makes the other workers wait for the one computing
+  instead of running the same queries.
+
+Locks are fcntl.flock, which the kernel releases if a worker dies, so a
+shared directory needs a POSIX host.
+"""
+from contextlib import contextmanager
+from typing import Any, Callable, Optional, Tuple
+import json
+import logging
+import os
+import re
+import shutil
+import tempfile
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows: run without SHARED_STORE_DIR
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# Snapshot directory names: "<date_key>.<finished_at ms>", or just the date_key without a manifest
+LOAD_ID = re.compile(r"^\d+(\.\d+)?$")
+
+def _load_order(load_id: str) -> Tuple[int, int]:
+    date_key, _, loaded_ms = load_id.partition(".")
+    return int(date_key), int(loaded_ms or 0)
+
+@contextmanager
+def file_lock(path: str):
+    """Exclusive lock shared by every process on the host (blocks until acquired)"""
+    if fcntl is None:
+        raise RuntimeError("SHARED_STORE_DIR needs fcntl.flock (POSIX)")
+    with open(path, "a") as handle:
+        fcntl.flock(handle, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(handle, fcntl.LOCK_UN)
+
+class SharedSnapshotFiles:
+    """Per-load snapshot directories under <root>/<name>/"""
+
+    def __init__(self, root: str, name: str, keep: int = 2):
+        self.directory = os.path.join(root, name)
+        self.keep = keep  # loads kept on disk; a worker may still map the previous one
+        os.makedirs(self.directory, exist_ok=True)
+
+    @contextmanager
+    def lock(self):
+        with file_lock(os.path.join(self.directory, ".lock")):
+            yield
+
+    def path(self, load_id: str) -> Optional[str]:
+        """Directory of a published load, None if no worker has written it yet"""
+        directory = os.path.join(self.directory, load_id)
+        return directory if os.path.isdir(directory) else None
+
+    def current(self) -> Optional[str]:
+        """Load id the `current` link points at"""
+        try:
+            load_id = os.readlink(os.path.join(self.directory, "current"))
+        except OSError:
+            return None
+        return load_id if LOAD_ID.match(load_id) else None
+
+    def publish(self, load_id: str, write: Callable[[str], None]) -> str:
+        """Write a load with write(directory) and make it current. Call with lock() held."""
+        final = os.path.join(self.directory, load_id)
+        staging = tempfile.mkdtemp(prefix=f".{load_id}-", dir=self.directory)
+        try:
+            write(staging)
+            os.rename(staging, final)  # readers only ever see complete directories
+        except Exception:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+
+        link = os.path.join(self.directory, f".current-{os.getpid()}")
+        if os.path.lexists(link):
+            os.remove(link)
+        os.symlink(load_id, link)
+        os.replace(link, os.path.join(self.directory, "current"))
+        self._prune()
+        logger.info(f"Published shared snapshot {final}")
+        return final
+
+    def _prune(self) -> None:
+        # Removing a mapped file is safe: existing maps stay valid until unmapped
+        loads = sorted((entry for entry in os.listdir(self.directory) if LOAD_ID.match(entry)), key=_load_order)
+        current = self.current()
+        for load_id in loads[:-self.keep] if self.keep else loads:
+            if load_id != current:
+                shutil.rmtree(os.path.join(self.directory, load_id), ignore_errors=True)
+
+class SharedPayloadCache:
+    """JSON payloads with a TTL under <root>/<name>/, one file per key"""
+
+    def __init__(self, root: str, name: str = "sections"):
+        self.directory = os.path.join(root, name)
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+
+    @contextmanager
+    def lock(self, key: str):
+        with file_lock(os.path.join(self.directory, f".{key}.lock")):
+            yield
+
+    def get(self, key: str, ttl_seconds: float) -> Optional[Tuple[Any, float]]:
+        """(value, computed_at) if another worker stored it less than ttl_seconds ago"""
+        try:
+            with open(self._path(key)) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if time.time() - data["computed_at"] >= ttl_seconds:
+            return None
+        return data["value"], data["computed_at"]
+
+    def set(self, key: str, value: Any, computed_at: float) -> None:
+        """Store a JSON-serializable value (written to a temp file, then renamed over the old one)"""
+        handle, staging = tempfile.mkstemp(prefix=f".{key}-", dir=self.directory)
+        try:
+            with os.fdopen(handle, "w") as f:
+                json.dump({"computed_at": computed_at, "value": value}, f)
+            os.replace(staging, self._path(key))
+        except Exception:
+            if os.path.exists(staging):
+                os.remove(staging)
+            raise
+
+    def invalidate(self, prefix: str) -> int:
+        """Drop every stored key starting with prefix"""
+        dropped = 0
+        for entry in os.listdir(self.directory):
+            if entry.startswith(prefix) and entry.endswith(".json"):
+                try:
+                    os.remove(os.path.join(self.directory, entry))
+                    dropped += 1
+                except FileNotFoundError:
+                    pass  # another worker got there first
+        return dropped
@@ -0,0 +1,352 @@
+"""
+In-memory columnar snapshot of the latest inventory day.
+
+The price-range, days-on-lot, slow-moving and brand inventory figures only
+read the latest date_key of fact_daily_inventory. InventorySnapshotStore
+loads that day once (with dim_vehicle and dim_price_range) into a
+few NumPy columns, with vehicle attributes dictionary-encoded, and answers
+those questions with vectorized masks and bincounts instead of a Postgres
+round trip per request.
+
+Which day to hold comes from the ETL load manifest: the latest inventory
+load recorded there (its day and finished_at, load_manifest.load_id), so the
+snapshot only moves once a load has committed, and a same-day reload
+replaces it. The store follows the manifest as the API reads it (latest_load)
+and swaps the whole snapshot at once so readers never see a half-loaded day.
+Without a manifest it looks for a newer max(date_key) at most every
+check_seconds, or on the next use after invalidate() (called when the
+snapshot notifier sees a new load).
+
+With a shared directory (SHARED_STORE_DIR) the columns are written once per
+load as .npy files and every worker of the host memory-maps them
+instead of loading its own copy (see shared_store.SharedSnapshotFiles).
+"""
+from typing import Callable, Dict, List, NamedTuple, Optional
+import json
+import logging
+import os
+import threading
+import time
+
+import numpy as np
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from .freshness import LoadRecord
+from .models import DimPriceRange, DimVehicle, FactDailyInventory
+from .shared_store import SharedSnapshotFiles
+
+logger = logging.getLogger(__name__)
+
+MISSING = -1
+
+# Array columns of a snapshot (one .npy file each when shared) and its label lists
+COLUMNS = [
+    "vin", "days_on_lot", "price", "band", "vehicle",
+    "vehicle_keys", "vehicle_manufacturer", "vehicle_model", "vehicle_brand", "range_keys"
+]
+LABELS = ["manufacturers", "models", "brands", "range_names"]
+
+# Inventory age buckets of the brand drill-down: upper bound (inclusive) and label
+AGE_GROUP_LIMITS = [7, 14, 30, 60, 90]
+AGE_GROUPS = ["0-7 days", "8-14 days", "15-30 days", "31-60 days", "61-90 days", "90+ days"]
+
+# Row shapes match the SQL queries they replace, so callers read either the same way
+class PriceRangeCount(NamedTuple):
+    range_name: str
+    inventory_count: int
+
+class PriceRangeDaysOnLot(NamedTuple):
+    range_name: str
+    avg_days_on_lot: float
+
+class AgeGroupCount(NamedTuple):
+    age_group: str
+    inventory_count: int
+
+class SlowMovingVehicle(NamedTuple):
+    vin: str
+    days_on_lot: int
+    manufacturer: str
+    model: str
+    brand: Optional[str]
+    price: Optional[float]
+
+def _encode(values: list):
+    """Dictionary-encode values: (codes, labels), None becomes MISSING"""
+    labels = sorted({value for value in values if value is not None})
+    index = {label: code for code, label in enumerate(labels)}
+    codes = np.fromiter((index.get(value, MISSING) for value in values), dtype=np.int32, count=len(values))
+    return codes, labels
+
+class InventorySnapshot:
+    """One inventory day as columns.
+
+    Facts: vin (17-byte strings), days_on_lot (NULL as 0, which every filter
+    here excludes), price (NULL as NaN), band (index into the price ranges
+    sorted by min_price) and vehicle (index into the vehicle columns).
+    Vehicle columns hold brand / manufacturer / model codes into the label
+    lists. Columns may be read-only memory maps, so nothing here writes to them.
+    """
+
+    def __init__(self, date_key: int, columns: Dict[str, np.ndarray], labels: Dict[str, list],
+                 load_id: Optional[str] = None):
+        self.date_key = date_key
+        self.load_id = load_id or str(date_key)  # the manifest load it was read from
+        self.loaded_at = time.time()
+        for name in COLUMNS:
+            setattr(self, name, columns[name])
+        for name in LABELS:
+            setattr(self, name, labels[name])
+        self._brand_codes = {brand: code for code, brand in enumerate(self.brands)}
+
+    @classmethod
+    def from_rows(cls, date_key: int, facts: list, vehicles: list, price_ranges: list,
+                  load_id: Optional[str] = None) -> "InventorySnapshot":
+        columns, labels = {}, {}
+
+        # Vehicles: (vehicle_key, manufacturer, model, brand)
+        vehicles = sorted(vehicles, key=lambda row: row[0])
+        columns["vehicle_keys"] = np.array([row[0] for row in vehicles], dtype=np.int64)
+        columns["vehicle_manufacturer"], labels["manufacturers"] = _encode([row[1] for row in vehicles])
+        columns["vehicle_model"], labels["models"] = _encode([row[2] for row in vehicles])
+        columns["vehicle_brand"], labels["brands"] = _encode([row[3] for row in vehicles])
+
+        # Price ranges: (price_range_key, range_name, min_price), in min_price order
+        price_ranges = sorted(price_ranges, key=lambda row: float(row[2]))
+        columns["range_keys"] = np.array([row[0] for row in price_ranges], dtype=np.int64)
+        labels["range_names"] = [row[1] for row in price_ranges]
+
+        # Facts: (vin, vehicle_key, price_range_key, price, days_on_lot)
+        size = len(facts)
+        columns["vin"] = np.array([row[0].encode("ascii") for row in facts], dtype="S17")
+        columns["days_on_lot"] = np.fromiter((row[4] or 0 for row in facts), dtype=np.int64, count=size)
+        columns["price"] = np.fromiter(
+            (float(row[3]) if row[3] is not None else np.nan for row in facts), dtype=np.float64, count=size
+        )
+        columns["band"] = cls._lookup(columns["range_keys"], [row[2] for row in facts])
+        columns["vehicle"] = cls._lookup(columns["vehicle_keys"], [row[1] for row in facts])
+        return cls(date_key, columns, labels, load_id)
+
+    def save(self, directory: str) -> None:
+        """Write the columns as .npy files and the labels as labels.json"""
+        for name in COLUMNS:
+            np.save(os.path.join(directory, f"{name}.npy"), getattr(self, name))
+        with open(os.path.join(directory, "labels.json"), "w") as f:
+            json.dump({"date_key": self.date_key, "load_id": self.load_id,
+                       **{name: getattr(self, name) for name in LABELS}}, f)
+
+    @classmethod
+    def open(cls, directory: str) -> "InventorySnapshot":
+        """Memory-map a saved snapshot read-only (pages are shared by every process mapping it)"""
+        with open(os.path.join(directory, "labels.json")) as f:
+            labels = json.load(f)
+        columns = {name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode="r") for name in COLUMNS}
+        return cls(labels.pop("date_key"), columns, labels, labels.pop("load_id", None))
+
+    @staticmethod
+    def _lookup(sorted_keys: np.ndarray, keys: list) -> np.ndarray:
+        """Position of each key in sorted_keys, MISSING for NULL or unknown keys"""
+        values = np.fromiter((key if key is not None else MISSING for key in keys), dtype=np.int64, count=len(keys))
+        if not len(sorted_keys):
+            return np.full(values.shape, MISSING, dtype=np.int64)
+        position = np.clip(np.searchsorted(sorted_keys, values), 0, len(sorted_keys) - 1)
+        return np.where(sorted_keys[position] == values, position, MISSING)
+
+    def __len__(self) -> int:
+        return len(self.vin)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(getattr(self, name).nbytes for name in COLUMNS)
+
+    def brand_mask(self, brand: str) -> np.ndarray:
+        """Rows whose vehicle has this brand"""
+        code = self._brand_codes.get(brand)
+        if code is None:
+            return np.zeros(len(self), dtype=bool)
+        matched = self.vehicle >= 0
+        mask = np.zeros(len(self), dtype=bool)
+        mask[matched] = self.vehicle_brand[self.vehicle[matched]] == code
+        return mask
+
+    def _band_counts(self, mask: np.ndarray) -> np.ndarray:
+        bands = self.band[mask]
+        return np.bincount(bands[bands >= 0], minlength=len(self.range_keys))
+
+    def inventory_by_price_range(self, mask: Optional[np.ndarray] = None) -> List[PriceRangeCount]:
+        """Vehicles per price range, ranges without vehicles left out"""
+        counts = self._band_counts(mask if mask is not None else np.ones(len(self), dtype=bool))
+        return [
+            PriceRangeCount(self.range_names[band], int(count))
+            for band, count in enumerate(counts) if count
+        ]
+
+    def days_on_lot_by_price_range(self) -> List[PriceRangeDaysOnLot]:
+        """Average days on lot per price range (vehicles with days_on_lot > 0)"""
+        on_lot = (self.days_on_lot > 0) & (self.band >= 0)
+        counts = np.bincount(self.band[on_lot], minlength=len(self.range_keys))
+        totals = np.bincount(self.band[on_lot], weights=self.days_on_lot[on_lot], minlength=len(self.range_keys))
+        return [
+            PriceRangeDaysOnLot(self.range_names[band], float(totals[band] / count))
+            for band, count in enumerate(counts) if count
+        ]
+
+    def slow_moving(self, min_days: int = 30, limit: int = 20) -> List[SlowMovingVehicle]:
+        """Vehicles on the lot longer than min_days, longest first"""
+        rows = np.flatnonzero((self.days_on_lot > min_days) & (self.vehicle >= 0))
+        order = np.lexsort((self.vin[rows], -self.days_on_lot[rows]))[:limit]
+        return [self._slow_moving_row(row) for row in rows[order]]
+
+    def _slow_moving_row(self, row: int) -> SlowMovingVehicle:
+        vehicle = self.vehicle[row]
+        brand = self.vehicle_brand[vehicle]
+        price = self.price[row]
+        return SlowMovingVehicle(
+            vin=self.vin[row].decode("ascii"),
+            days_on_lot=int(self.days_on_lot[row]),
+            manufacturer=self.manufacturers[self.vehicle_manufacturer[vehicle]],
+            model=self.models[self.vehicle_model[vehicle]],
+            brand=self.brands[brand] if brand != MISSING else None,
+            price=None if np.isnan(price) else float(price)
+        )
+
+    def brand_vehicle_count(self, brand: str) -> int:
+        # (date_key, vin) is the table's primary key, so rows are distinct VINs
+        return int(np.count_nonzero(self.brand_mask(brand)))
+
+    def brand_average_price(self, brand: str) -> float:
+        """Average price of the brand's vehicles with a positive price, 0 when there are none"""
+        prices = self.price[self.brand_mask(brand)]
+        prices = prices[prices > 0]  # NaN compares False
+        return float(prices.mean()) if len(prices) else 0.0
+
+    def brand_price_distribution(self, brand: str) -> List[PriceRangeCount]:
+        return self.inventory_by_price_range(self.brand_mask(brand))
+
+    def brand_inventory_age(self, brand: str) -> List[AgeGroupCount]:
+        """Vehicles per age group (days_on_lot > 0), youngest first"""
+        days = self.days_on_lot[self.brand_mask(brand)]
+        groups = np.searchsorted(AGE_GROUP_LIMITS, days[days > 0], side="left")
+        counts = np.bincount(groups, minlength=len(AGE_GROUPS))
+        return [AgeGroupCount(AGE_GROUPS[group], int(count)) for group, count in enumerate(counts) if count]
+
+def load_inventory_snapshot(db: Session, date_key: int, load_id: Optional[str] = None) -> InventorySnapshot:
+    """Load one inventory day with the vehicle and price range dimensions"""
+    facts = db.execute(
+        select(
+            FactDailyInventory.vin,
+            FactDailyInventory.vehicle_key,
+            FactDailyInventory.price_range_key,
+            FactDailyInventory.price,
+            FactDailyInventory.days_on_lot
+        ).where(FactDailyInventory.date_key == date_key)
+    ).all()
+    vehicles = db.execute(
+        select(DimVehicle.vehicle_key, DimVehicle.manufacturer, DimVehicle.model, DimVehicle.brand)
+    ).all()
+    price_ranges = db.execute(
+        select(DimPriceRange.price_range_key, DimPriceRange.range_name, DimPriceRange.min_price)
+    ).all()
+    return InventorySnapshot.from_rows(date_key, facts, vehicles, price_ranges, load_id)
+
+class InventorySnapshotStore:
+    """
+    Holds the snapshot of the latest loaded inventory day. latest_load(db)
+    returns the manifest's latest inventory load (a freshness.LoadRecord), or
+    None without one, in which case the store falls back to max(date_key).
+    """
+
+    def __init__(self, check_seconds: float, enabled: bool = True, shared_dir: Optional[str] = None,
+                 latest_load: Optional[Callable[[Session], Optional[LoadRecord]]] = None):
+        self.check_seconds = check_seconds
+        self.enabled = enabled
+        self.shared = SharedSnapshotFiles(shared_dir, "inventory") if shared_dir else None
+        self.latest_load = latest_load
+        self._snapshot: Optional[InventorySnapshot] = None
+        self._checked_at: Optional[float] = None
+        self._checked_load: Optional[str] = None
+        self._lock = threading.Lock()
+
+    def invalidate(self) -> None:
+        """Look for a newer day on the next use (e.g. after the ETL loaded one)"""
+        self._checked_at = None
+
+    def _due(self) -> bool:
+        return self._checked_at is None or time.monotonic() - self._checked_at >= self.check_seconds
+
+    def _stale(self, load: Optional[LoadRecord]) -> bool:
+        """A check is due, or the manifest holds a load the store has not tried yet"""
+        return self._due() or (load is not None and load.load_id != self._checked_load)
+
+    def latest(self, db: Session) -> Optional[InventorySnapshot]:
+        """Snapshot of the latest inventory day, None when disabled, empty or unloadable.
+
+        While the manifest holds a load the snapshot could not be refreshed to,
+        this is None too: callers answer from SQL for the manifest's day rather
+        than from the previous load.
+        """
+        if not self.enabled:
+            return None
+        load = self.latest_load(db) if self.latest_load is not None else None
+        if not self._stale(load):
+            return self._snapshot
+
+        with self._lock:
+            if self._stale(load):  # another thread may have refreshed while we waited
+                try:
+                    self._refresh(db, load)
+                except Exception as e:
+                    logger.error(f"Inventory snapshot refresh failed: {str(e)}")
+                self._checked_at = time.monotonic()
+                self._checked_load = load.load_id if load is not None else None
+        snapshot = self._snapshot
+        if load is not None and snapshot is not None and snapshot.load_id != load.load_id:
+            return None
+        return snapshot
+
+    def for_date(self, db: Session, date_key: int) -> Optional[InventorySnapshot]:
+        """Snapshot to answer a query for date_key with.
+
+        Days after the latest loaded one have no rows, and the SQL helpers fall
+        back to the latest day for them, so the snapshot serves those too.
+        """
+        snapshot = self.latest(db)
+        if snapshot is None or date_key < snapshot.date_key:
+            return None
+        return snapshot
+
+    def _refresh(self, db: Session, load: Optional[LoadRecord]) -> None:
+        if load is not None:
+            date_key, load_id = load.date_key, load.load_id
+        else:
+            # No manifest: the highest day (its rows commit in one transaction, see etl_common.load_date_partition)
+            date_key = db.query(func.max(FactDailyInventory.date_key)).scalar()
+            load_id = str(date_key)
+        if date_key is None:
+            self._snapshot = None
+            return
+        if self._snapshot is not None and self._snapshot.load_id == load_id:
+            return
+
+        started = time.perf_counter()
+        if self.shared is not None:
+            snapshot = self._open_shared(db, date_key, load_id)
+        else:
+            snapshot = load_inventory_snapshot(db, date_key, load_id)
+        self._snapshot = snapshot
+        logger.info(
+            f"Loaded inventory snapshot for {date_key} (load {load_id}): {len(snapshot)} vehicles, "
+            f"{snapshot.nbytes / 1024:.0f} KiB in {time.perf_counter() - started:.2f}s"
+            + (" (shared)" if self.shared is not None else "")
+        )
+
+    def _open_shared(self, db: Session, date_key: int, load_id: str) -> InventorySnapshot:
+        """Map the host's copy of the load, building it first if no worker has yet"""
+        directory = self.shared.path(load_id)
+        if directory is None:
+            with self.shared.lock():
+                directory = self.shared.path(load_id)  # built by another worker while we waited
+                if directory is None:
+                    directory = self.shared.publish(load_id, load_inventory_snapshot(db, date_key, load_id).save)
+        return InventorySnapshot.open(directory)
@@ -0,0 +1,279 @@
+"""
+Fixed SQL shapes of the dashboard and brand helpers as SQLAlchemy Core
+statements, executed as server-side prepared statements.
+
+Each statement is built once at import with named bind parameters. Lists
+(brand vehicle keys, price range keys) are bound as one array through
+`= ANY(:keys)` instead of an expanding IN, so the SQL text never changes
+with the list length. A PreparedQuery compiles its statement once per
+dialect. On PostgreSQL it is then sent as `PREPARE` once per pooled
+connection and run with `EXECUTE`, so neither SQLAlchemy compilation nor
+Postgres planning is repeated per request (Postgres switches to a generic
+plan once it stops paying off to re-plan per parameter set).
+
+QueryRunner adds a small result cache on top, keyed by (statement, bound
+parameters, loaded data version), so repeated shapes inside the same load
+(e.g. the latest inventory day, asked by several helpers) hit memory.
+"""
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import logging
+import re
+import threading
+
+from sqlalchemy import Integer, any_, bindparam, case, desc, func, select
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.orm import Session
+
+from .cache import TTLCache
+from .models import DimDate, FactDailyInventory, FactSalesEvents
+
+logger = logging.getLogger(__name__)
+
+_PYFORMAT_PARAM = re.compile(r"%\((\w+)\)s")
+
+class PreparedQuery:
+    """A Core statement compiled once and executed as a named prepared statement"""
+
+    def __init__(self, name: str, statement):
+        self.name = name
+        self.statement = statement
+        self._compiled: Dict[str, tuple] = {}  # dialect name -> (sql, prepare sql, parameter names, defaults)
+        self._lock = threading.Lock()
+
+    @property
+    def prepared_name(self) -> str:
+        return f"carvana_{self.name}"
+
+    def _compile(self, dialect) -> tuple:
+        compiled = self._compiled.get(dialect.name)
+        if compiled is None:
+            with self._lock:
+                compiled = self._compiled.get(dialect.name)
+                if compiled is None:
+                    result = self.statement.compile(dialect=dialect)
+                    sql = result.string
+                    names = list(dict.fromkeys(_PYFORMAT_PARAM.findall(sql)))
+                    positions = {name: index + 1 for index, name in enumerate(names)}
+                    prepare_body = _PYFORMAT_PARAM.sub(lambda m: f"${positions[m.group(1)]}", sql).replace("%%", "%")
+                    # Literals in the statement (e.g. status = 'active') are bind parameters with values
+                    defaults = {name: value for name, value in result.params.items() if value is not None}
+                    compiled = (sql, f"PREPARE {self.prepared_name} AS {prepare_body}", names, defaults)
+                    self._compiled[dialect.name] = compiled
+        return compiled
+
+    def execute(self, db: Session, params: Dict[str, Any], prepare: bool = True) -> list:
+        """All result rows (attribute access by column label)"""
+        connection = db.connection()
+        sql, prepare_sql, names, defaults = self._compile(connection.dialect)
+        values = {**defaults, **params}
+        if not prepare or connection.dialect.name != "postgresql":
+            return connection.exec_driver_sql(sql, values).all()
+
+        # Prepared statements live as long as the DBAPI connection (they survive rollbacks),
+        # and info is cleared when the pool replaces the connection
+        prepared = connection.info.setdefault("prepared_statements", set())
+        if self.name not in prepared:
+            # The driver formats every statement it is handed, so literal % goes back to %%
+            connection.exec_driver_sql(prepare_sql.replace("%", "%%"))
+            prepared.add(self.name)
+        arguments = ", ".join(f"%({name})s" for name in names)
+        execute_sql = f"EXECUTE {self.prepared_name}({arguments})" if names else f"EXECUTE {self.prepared_name}"
+        return connection.exec_driver_sql(execute_sql, {name: values[name] for name in names}).all()
+
+def _cache_key_value(value: Any) -> Any:
+    return tuple(value) if isinstance(value, list) else value
+
+class QueryRunner:
+    """Runs PreparedQuery objects, caching results per loaded data version"""
+
+    def __init__(self, prepare: bool = True, cache: Optional[TTLCache] = None,
+                 version: Optional[Callable[[Session], str]] = None, ttl_seconds: float = 0.0):
+        self.prepare = prepare
+        self.cache = cache or TTLCache()
+        self.version = version  # called with the caller's session, never opens another connection
+        self.ttl_seconds = ttl_seconds
+
+    def rows(self, db: Session, query: PreparedQuery, **params) -> list:
+        if self.ttl_seconds <= 0:
+            return query.execute(db, params, self.prepare)
+        key: Tuple = (
+            query.name,
+            tuple(sorted((name, _cache_key_value(value)) for name, value in params.items())),
+            self.version(db) if self.version is not None else None
+        )
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+        rows = query.execute(db, params, self.prepare)
+        self.cache.set(key, rows, self.ttl_seconds)
+        return rows
+
+    def scalar(self, db: Session, query: PreparedQuery, **params) -> Any:
+        """First column of the first row (None without rows)"""
+        rows = self.rows(db, query, **params)
+        return rows[0][0] if rows else None
+
+    def invalidate(self) -> None:
+        """Drop cached results (a new day was loaded)"""
+        self.cache.clear()
+
+inventory = FactDailyInventory.__table__
+sales = FactSalesEvents.__table__
+dim_date = DimDate.__table__
+
+def _keys(name: str):
+    """`= ANY(:name)` operand: a list of integer keys bound as one array"""
+    return any_(bindparam(name, type_=ARRAY(Integer)))
+
+# --- inventory -------------------------------------------------------------
+
+LATEST_INVENTORY_DATE_KEY = PreparedQuery("latest_inventory_date_key", select(func.max(inventory.c.date_key)))
+
+INVENTORY_ROW_COUNT = PreparedQuery("inventory_row_count", select(func.count(inventory.c.vin)).where(
+    inventory.c.date_key == bindparam("date_key")
+))
+
+ACTIVE_VIN_COUNT = PreparedQuery("active_vin_count", select(func.count(func.distinct(inventory.c.vin))).where(
+    inventory.c.status == "active"
+))
+
+INVENTORY_BY_PRICE_RANGE = PreparedQuery("inventory_by_price_range", select(
+    inventory.c.price_range_key,
+    func.count(inventory.c.vin).label("inventory_count")
+).where(
+    inventory.c.date_key == bindparam("date_key"),
+    inventory.c.price_range_key == _keys("price_range_keys")
+).group_by(inventory.c.price_range_key))
+
+DAYS_ON_LOT_BY_PRICE_RANGE = PreparedQuery("days_on_lot_by_price_range", select(
+    inventory.c.price_range_key,
+    func.avg(inventory.c.days_on_lot).label("avg_days_on_lot")
+).where(
+    inventory.c.date_key == bindparam("date_key"),
+    inventory.c.days_on_lot > 0,
+    inventory.c.price_range_key == _keys("price_range_keys")
+).group_by(inventory.c.price_range_key))
+
+SLOW_MOVING_COUNT = PreparedQuery("slow_moving_count", select(func.count(inventory.c.vin)).where(
+    inventory.c.date_key == bindparam("date_key"),
+    inventory.c.days_on_lot > 30
+))
+
+SLOW_MOVING = PreparedQuery("slow_moving", select(
+    inventory.c.vin,
+    inventory.c.days_on_lot,
+    inventory.c.vehicle_key,
+    inventory.c.price
+).where(
+    inventory.c.date_key == bindparam("date_key"),
+    inventory.c.days_on_lot > 30,
+    inventory.c.vehicle_key.isnot(None)
+).order_by(desc(inventory.c.days_on_lot)).limit(20))
+
+# --- brand inventory ---------------------------------------------------------
+
+_brand_inventory = (
+    inventory.c.date_key == bindparam("date_key"),
+    inventory.c.vehicle_key == _keys("vehicle_keys")
+)
+
+BRAND_VIN_COUNT = PreparedQuery("brand_vin_count", select(func.count(func.distinct(inventory.c.vin))).where(
+    *_brand_inventory
+))
+
+BRAND_AVERAGE_PRICE = PreparedQuery("brand_average_price", select(func.avg(inventory.c.price)).where(
+    *_brand_inventory,
+    inventory.c.price.isnot(None),
+    inventory.c.price > 0
+))
+
+BRAND_PRICE_DISTRIBUTION = PreparedQuery("brand_price_distribution", select(
+    inventory.c.price_range_key,
+    func.count(inventory.c.vin).label("inventory_count")
+).where(
+    *_brand_inventory,
+    inventory.c.price_range_key == _keys("price_range_keys")
+).group_by(inventory.c.price_range_key))
+
+# One CASE object so SELECT and GROUP BY render identically
+_age_group = case(
+    (inventory.c.days_on_lot <= 7, "0-7 days"),
+    (inventory.c.days_on_lot <= 14, "8-14 days"),
+    (inventory.c.days_on_lot <= 30, "15-30 days"),
+    (inventory.c.days_on_lot <= 60, "31-60 days"),
+    (inventory.c.days_on_lot <= 90, "61-90 days"),
+    else_="90+ days"
+)
+
+BRAND_INVENTORY_AGE = PreparedQuery("brand_inventory_age", select(
+    _age_group.label("age_group"),
+    func.count(inventory.c.vin).label("inventory_count")
+).where(
+    *_brand_inventory,
+    inventory.c.days_on_lot > 0
+).group_by(_age_group).order_by(func.min(inventory.c.days_on_lot)))
+
+# --- sales ---------------------------------------------------------------------
+
+_sales_window = (
+    sales.c.sale_date_key >= bindparam("start_date_key"),
+    sales.c.sale_date_key <= bindparam("end_date_key")
+)
+
+SALES_ON_DAY = PreparedQuery("sales_on_day", select(func.count(sales.c.vin)).where(
+    sales.c.sale_date_key == bindparam("date_key"),
+    sales.c.vin.isnot(None),
+    sales.c.sale_price.isnot(None)
+))
+
+PRICED_SALES_COUNT = PreparedQuery("priced_sales_count", select(func.count(sales.c.vin)).where(
+    sales.c.vin.isnot(None),
+    sales.c.sale_price.isnot(None)
+))
+
+# Only reasonable values: sold within a year, priced up to $200k
+_days_to_sell_in_range = (sales.c.days_to_sell > 0, sales.c.days_to_sell <= 365)
+
+AVERAGE_DAYS_TO_SELL = PreparedQuery("average_days_to_sell", select(func.avg(sales.c.days_to_sell)).where(
+    *_sales_window, *_days_to_sell_in_range
+))
+
+BRAND_AVERAGE_DAYS_TO_SELL = PreparedQuery("brand_average_days_to_sell", select(func.avg(sales.c.days_to_sell)).where(
+    *_sales_window, sales.c.vehicle_key == _keys("vehicle_keys"), *_days_to_sell_in_range
+))
+
+AVERAGE_SALE_PRICE = PreparedQuery("average_sale_price", select(func.avg(sales.c.sale_price)).where(
+    *_sales_window,
+    sales.c.sale_price.isnot(None),
+    sales.c.sale_price > 0,
+    sales.c.sale_price <= 200000
+))
+
+# Aggregated per vehicle_key and folded into models in Python, so no join is needed
+SALES_BY_VEHICLE = PreparedQuery("sales_by_vehicle", select(
+    sales.c.vehicle_key,
+    func.count(sales.c.vin).label("sales_count"),
+    func.sum(sales.c.sale_price).label("total_revenue"),
+    func.count(sales.c.sale_price).label("priced_count"),
+    func.sum(sales.c.days_to_sell).label("total_days_to_sell"),
+    func.count(sales.c.days_to_sell).label("days_to_sell_count")
+).where(
+    *_sales_window, sales.c.vehicle_key == _keys("vehicle_keys")
+).group_by(sales.c.vehicle_key))
+
+_recent_sales = select(
+    dim_date.c.full_date,
+    sales.c.vin,
+    sales.c.sale_date_key,
+    sales.c.vehicle_key,
+    sales.c.sale_price,
+    sales.c.days_to_sell
+).join_from(sales, dim_date, sales.c.sale_date_key == dim_date.c.date_key).where(
+    sales.c.vehicle_key.isnot(None)
+).distinct().order_by(desc(sales.c.sale_date_key)).limit(10)
+
+RECENT_SALES = PreparedQuery("recent_sales", _recent_sales.where(sales.c.sale_date_key <= bindparam("end_date_key")))
+
+LATEST_SALES = PreparedQuery("latest_sales", _recent_sales)
+
+ALL_QUERIES: List[PreparedQuery] = [value for value in list(globals().values()) if isinstance(value, PreparedQuery)]
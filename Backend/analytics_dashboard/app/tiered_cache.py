@@ -0,0 +1,269 @@
+"""
+Tiered response cache for the analytics endpoints.
+
+- L1: a TTLCache (LRU) in each worker process.
+- L2 (optional): shared by every worker that can reach it. Use Redis, or
+  any server speaking the Redis protocol, when CACHE_REDIS_URL is set, so
+  all replicas share one copy. Otherwise use the host-wide
+  SharedPayloadCache under SHARED_STORE_DIR.
+
+Both L2 flavours expose the same interface (lock / get / set / invalidate),
+which SectionLoader uses for the dashboard sections as well.
+
+Cache keys include the latest load of each fact table as the ETL load
+manifest records it (DataVersion: day and finished_at), so entries are tied
+to the loaded data: after an ETL load, a same-day re-run included, every
+worker misses and recomputes, with no invalidation traffic. TTLs only
+bound how long a value computed for one load may be reused.
+
+Stampedes are avoided at both levels. Within a process, concurrent misses
+on a key wait for the single computation. Across processes, the L2 lock
+makes other workers wait for the value the first one stores.
+
+get_or_last_good() also remembers the last value per name and parameters
+across data versions, in L1 only. When a recompute fails with one of the
+given errors (a statement timeout), that value is served instead.
+"""
+from contextlib import contextmanager
+from datetime import date
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+import hashlib
+import json
+import logging
+import threading
+import time
+import uuid
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy.orm import Session
+
+from .cache import TTLCache
+from .events import load_snapshot_version
+from .load_manifest import data_version
+
+logger = logging.getLogger(__name__)
+
+# How often a worker waiting on another's computation checks whether it finished
+LOCK_POLL_SECONDS = 0.05
+
+class RedisPayloadCache:
+    """JSON payloads with their compute time in Redis, under <namespace>:<key>"""
+
+    def __init__(self, client, namespace: str, max_ttl_seconds: float = 86400.0,
+                 lock_timeout_seconds: float = 60.0, lock_wait_seconds: float = 10.0,
+                 retry_seconds: float = 5.0):
+        self.client = client
+        self.namespace = namespace
+        self.max_ttl_seconds = max_ttl_seconds  # Redis expiry; freshness is checked on read
+        self.lock_timeout_seconds = lock_timeout_seconds
+        self.lock_wait_seconds = lock_wait_seconds
+        self.retry_seconds = retry_seconds
+        self._down_until = 0.0
+
+    def _key(self, key: str) -> str:
+        return f"{self.namespace}:{key}"
+
+    def _available(self) -> bool:
+        return time.monotonic() >= self._down_until
+
+    def _failed(self, operation: str, error: Exception) -> None:
+        # Serve from L1 / the database for a while instead of paying a timeout per request
+        self._down_until = time.monotonic() + self.retry_seconds
+        logger.warning(f"Redis {operation} failed, bypassing L2 for {self.retry_seconds}s: {str(error)}")
+
+    @contextmanager
+    def lock(self, key: str):
+        """
+        Waits up to lock_wait_seconds for another worker's computation, then
+        proceeds regardless. Plain SET NX PX with a random token rather than a
+        Lua-scripted lock, so servers without scripting work too.
+        """
+        name, token, held = self._key(f"lock:{key}"), uuid.uuid4().hex, False
+        deadline = time.monotonic() + self.lock_wait_seconds
+        while self._available():
+            try:
+                held = bool(self.client.set(name, token, nx=True, px=int(self.lock_timeout_seconds * 1000)))
+            except Exception as e:
+                self._failed("lock", e)
+                break
+            if held or time.monotonic() >= deadline:
+                break
+            time.sleep(LOCK_POLL_SECONDS)
+        try:
+            yield
+        finally:
+            if held:
+                try:
+                    # Only delete our own lock; one that expired mid-computation may be someone else's now
+                    if self.client.get(name) == token.encode():
+                        self.client.delete(name)
+                except Exception as e:  # Redis gone: the lock expires on its own
+                    logger.warning(f"Redis lock release for {key} failed: {str(e)}")
+
+    def get(self, key: str, ttl_seconds: float) -> Optional[Tuple[Any, float]]:
+        """(value, computed_at) if stored less than ttl_seconds ago"""
+        if not self._available():
+            return None
+        try:
+            raw = self.client.get(self._key(key))
+        except Exception as e:
+            self._failed("get", e)
+            return None
+        if raw is None:
+            return None
+        data = json.loads(raw)
+        if time.time() - data["computed_at"] >= ttl_seconds:
+            return None
+        return data["value"], data["computed_at"]
+
+    def set(self, key: str, value: Any, computed_at: float) -> None:
+        """Store a JSON-serializable value"""
+        if not self._available():
+            return
+        payload = json.dumps({"computed_at": computed_at, "value": value})
+        try:
+            self.client.set(self._key(key), payload, px=int(self.max_ttl_seconds * 1000))
+        except Exception as e:
+            self._failed("set", e)
+
+    def invalidate(self, prefix: str) -> int:
+        """Drop every stored key starting with prefix"""
+        if not self._available():
+            return 0
+        try:
+            keys = list(self.client.scan_iter(match=f"{self._key(prefix)}*", count=500))
+            return self.client.delete(*keys) if keys else 0
+        except Exception as e:
+            self._failed("invalidate", e)
+            return 0
+
+def connect_redis(url: str):
+    """Redis client for CACHE_REDIS_URL (redis is only needed when it is set)"""
+    import redis
+
+    return redis.Redis.from_url(url, socket_timeout=2.0, socket_connect_timeout=2.0, health_check_interval=30)
+
+class DataVersion:
+    """
+    Latest load of each fact table (day and manifest finished_at, see
+    load_manifest.data_version), re-read at most every check_seconds. A caller holding a session passes it as db: the re-read
+    then runs on that session instead of taking a second pooled connection.
+    """
+
+    def __init__(self, check_seconds: float, loader: Callable[[Optional[Session]], dict] = load_snapshot_version):
+        self.check_seconds = check_seconds
+        self.loader = loader
+        self._version: Optional[str] = None
+        self._checked_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def invalidate(self) -> None:
+        """Re-read on the next use (a new day was detected)"""
+        self._checked_at = None
+
+    def _due(self) -> bool:
+        return self._checked_at is None or time.monotonic() - self._checked_at >= self.check_seconds
+
+    def key(self, db: Optional[Session] = None) -> str:
+        """e.g. "20261017.1792206765000-20261017.1792210365000" (inventory load, sales load)"""
+        if self._due():
+            with self._lock:
+                if self._due():
+                    try:
+                        loaded = self.loader(db)
+                        self._version = data_version(
+                            loaded["inventory_date_key"], loaded.get("inventory_loaded_at"),
+                            loaded["sales_date_key"], loaded.get("sales_loaded_at")
+                        )
+                    except Exception as e:
+                        if self._version is None:
+                            raise
+                        logger.error(f"Data version check failed, keeping {self._version}: {str(e)}")
+                    self._checked_at = time.monotonic()
+        return self._version
+
+class TieredCache:
+    """L1 (per process) in front of an optional shared L2, keyed by the loaded data version"""
+
+    def __init__(self, l1: TTLCache, shared=None, version: Optional[DataVersion] = None):
+        self.l1 = l1
+        self.shared = shared
+        self.version = version
+        self._flights: Dict[Hashable, List] = {}  # key -> [lock, waiters]
+        self._flights_lock = threading.Lock()
+
+    @staticmethod
+    def _digest(params: tuple) -> str:
+        return hashlib.sha1(json.dumps(params, default=str).encode()).hexdigest()[:16]
+
+    def key(self, name: str, params: tuple, db: Optional[Session] = None) -> str:
+        """<name>@<data version>@<calendar day>@<params hash>: safe as a file name or Redis key"""
+        version = self.version.key(db) if self.version is not None else ""
+        # Windows like "last 30 days" are relative to today, so the calendar day is part of the key too
+        return f"{name}@{version}@{date.today():%Y%m%d}@{self._digest(params)}"
+
+    def get_or_compute(self, name: str, params: tuple, compute: Callable[[], Any], ttl_seconds: float,
+                       db: Optional[Session] = None) -> Any:
+        """
+        Cached JSON-compatible value of compute() (run through jsonable_encoder,
+        so L1 and L2 hits have the same shape as a fresh value). db: the
+        caller's session, for the data version check. Blocking: call it from
+        the threadpool.
+        """
+        key = self.key(name, params, db)
+        value = self.l1.get(key)
+        if value is not None:
+            return value
+
+        with self._single_flight(key):
+            value = self.l1.get(key)  # computed while we waited
+            if value is None:
+                value = self._load(key, compute, ttl_seconds)
+                self.l1.set(key, value, ttl_seconds, group=(name, self._digest(params)))
+        return value
+
+    def get_or_last_good(self, name: str, params: tuple, compute: Callable[[], Any], ttl_seconds: float,
+                         fallback_on: Tuple[type, ...], db: Optional[Session] = None) -> Tuple[Any, Optional[float]]:
+        """
+        (value, None) like get_or_compute, or (last good value, its compute
+        time) when compute raised one of fallback_on and an earlier value for
+        these parameters is still remembered
+        """
+        try:
+            return self.get_or_compute(name, params, compute, ttl_seconds, db), None
+        except fallback_on as e:
+            last_good = self.l1.last_good((name, self._digest(params)))
+            if last_good is None:
+                raise
+            logger.warning(f"Serving last good {name} value: {str(e)}")
+            return last_good
+
+    def _load(self, key: str, compute: Callable[[], Any], ttl_seconds: float) -> Any:
+        if self.shared is None:
+            return jsonable_encoder(compute())
+
+        with self.shared.lock(key):
+            cached = self.shared.get(key, ttl_seconds)
+            if cached is not None:
+                return cached[0]  # computed by another worker
+            value = jsonable_encoder(compute())
+            self.shared.set(key, value, time.time())
+        return value
+
+    @contextmanager
+    def _single_flight(self, key: Hashable):
+        with self._flights_lock:
+            flight = self._flights.setdefault(key, [threading.Lock(), 0])
+            flight[1] += 1
+        try:
+            with flight[0]:
+                yield
+        finally:
+            with self._flights_lock:
+                flight[1] -= 1
+                if flight[1] == 0:
+                    del self._flights[key]
+
+    def invalidate(self) -> None:
+        """Drop the L1 entries (L2 keys carry the data version and expire on their own)"""
+        self.l1.clear()
@@ -0,0 +1,108 @@
+"""
+Statement timeouts and client-disconnect cancellation for the helpers.
+
+statement_timeout() runs a helper's queries under
+`set_config('statement_timeout', ..., true)`, i.e. SET LOCAL, which lasts
+until the session's transaction ends. A pathological plan therefore
+releases its connection and thread after the helper's budget, and the
+caller serves the last good value marked stale. Budgets come from
+StatementTimeouts: a default plus per-helper overrides (dashboard section
+names and the cached endpoints' names).
+
+run_until_disconnect() runs a blocking helper in the threadpool and checks
+every poll_seconds whether the client is still connected. When the client
+disconnects, the query in flight is cancelled through psycopg2's
+connection.cancel(), which is safe to call from another thread. Postgres
+reports both a timeout and a cancel as query_canceled (57014). The
+QueryCanceller tells the two apart, so only a real timeout falls back to
+the last good value.
+"""
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Optional
+import asyncio
+import logging
+import threading
+
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import Request
+
+logger = logging.getLogger(__name__)
+
+# SQLSTATE of a statement stopped by statement_timeout or pg_cancel_backend / PQcancel
+QUERY_CANCELED = "57014"
+
+class QueryTimeout(Exception):
+    """A helper's statement ran past its statement_timeout"""
+
+class QueryCancelled(Exception):
+    """A helper's statement was cancelled because its client disconnected"""
+
+class StatementTimeouts:
+    """Statement timeout (ms) per helper name; 0 = no timeout"""
+
+    def __init__(self, default_ms: int, overrides: Optional[Dict[str, int]] = None):
+        self.default_ms = default_ms
+        self.overrides = overrides or {}
+
+    def for_helper(self, name: str) -> int:
+        return self.overrides.get(name, self.default_ms)
+
+class QueryCanceller:
+    """The DBAPI connection a request's helper is running on, cancellable from the event loop"""
+
+    def __init__(self):
+        self.cancelled = False
+        self._connection = None
+        self._lock = threading.Lock()
+
+    def attach(self, dbapi_connection) -> None:
+        with self._lock:
+            self._connection = dbapi_connection
+
+    def detach(self) -> None:
+        # Afterwards the pooled connection may run another request's queries: never cancel those
+        with self._lock:
+            self._connection = None
+
+    def cancel(self) -> None:
+        with self._lock:
+            self.cancelled = True
+            if self._connection is not None and hasattr(self._connection, "cancel"):
+                self._connection.cancel()
+
+@contextmanager
+def statement_timeout(db: Session, name: str, timeout_ms: int, canceller: Optional[QueryCanceller] = None):
+    """Run the block's queries under a transaction-local statement_timeout (PostgreSQL only)"""
+    connection = db.connection()
+    postgres = connection.dialect.name == "postgresql"
+    if postgres and timeout_ms:
+        connection.exec_driver_sql("SELECT set_config('statement_timeout', %(timeout)s, true)",
+                                   {"timeout": f"{int(timeout_ms)}ms"})
+    if canceller is not None:
+        canceller.attach(connection.connection.dbapi_connection)
+    try:
+        yield
+    except DBAPIError as e:
+        if not postgres or getattr(e.orig, "pgcode", None) != QUERY_CANCELED:
+            raise
+        if canceller is not None and canceller.cancelled:
+            raise QueryCancelled(f"{name}: cancelled, client disconnected") from e
+        raise QueryTimeout(f"{name}: statement timeout after {timeout_ms} ms") from e
+    finally:
+        if canceller is not None:
+            canceller.detach()
+
+async def run_until_disconnect(request: Request, canceller: QueryCanceller, poll_seconds: float,
+                               fn: Callable[..., Any], *args) -> Any:
+    """fn(*args) in the threadpool, cancelling its query if the client goes away"""
+    task = asyncio.ensure_future(run_in_threadpool(fn, *args))
+    while True:
+        done, _ = await asyncio.wait({task}, timeout=poll_seconds)
+        if done:
+            return task.result()
+        if await request.is_disconnected():
+            logger.info(f"Client disconnected from {request.url.path}, cancelling its query")
+            canceller.cancel()
+            return await task
@@ -0,0 +1,104 @@
+"""
+Gap-filled sales time series in one statement.
+
+The series is driven by dim_date: every calendar day of the window is
+left-joined to the sales of that day, so days (and weeks/months) without a
+sale come back as zero counts instead of missing rows, and the database
+does the bucketing. With by_brand the days are crossed with the brands that
+sold in the window first, so every brand gets a complete series.
+
+Weeks are ISO weeks (Monday start, date_trunc('week')): dim_date.week_of_year
+alone is ambiguous around new year, where days of week 1 or 53 belong to the
+neighbouring year. Months group on dim_date.year_month.
+"""
+from typing import Dict, List, NamedTuple, Optional
+
+from sqlalchemy import Date, and_, cast, func, select, true
+from sqlalchemy.orm import Session
+
+from .models import DimDate, DimVehicle, FactSalesEvents
+
+GRANULARITIES = ["day", "week", "month"]
+
+class Metric(NamedTuple):
+    aggregate: str  # count, sum or avg
+    column: str     # fact_sales_events column
+
+# Metrics of the sales series, by response field name
+SALES_METRICS: Dict[str, Metric] = {
+    "sales_count": Metric("count", "vin"),
+    "total_sales_amount": Metric("sum", "sale_price"),
+    "avg_sale_price": Metric("avg", "sale_price"),
+    "avg_days_to_sell": Metric("avg", "days_to_sell"),
+}
+
+def _period_start(granularity: str):
+    if granularity == "day":
+        return DimDate.full_date, [DimDate.full_date]
+    if granularity == "week":
+        week_start = cast(func.date_trunc("week", DimDate.full_date), Date)
+        return week_start, [week_start]
+    if granularity == "month":
+        return cast(func.to_date(DimDate.year_month, "YYYY-MM"), Date), [DimDate.year_month]
+    raise ValueError(f"Unknown granularity {granularity!r}, expected one of {', '.join(GRANULARITIES)}")
+
+def sales_series(db: Session, start_date_key: int, end_date_key: int, metrics: List[str],
+                 granularity: str = "day", brand: Optional[str] = None, by_brand: bool = False) -> List[dict]:
+    """One row per period (and brand) of the window: {"period_start", ["brand"], <metric>...}.
+
+    Periods without sales get a count/sum of 0 and an avg of None.
+    """
+    unknown = [name for name in metrics if name not in SALES_METRICS]
+    if unknown:
+        raise ValueError(f"Unknown metric(s) {', '.join(unknown)}, expected {', '.join(SALES_METRICS)}")
+    period_start, group_columns = _period_start(granularity)
+
+    sales_filters = [
+        FactSalesEvents.sale_date_key >= start_date_key,
+        FactSalesEvents.sale_date_key <= end_date_key,
+    ]
+    sales_columns = [
+        FactSalesEvents.sale_date_key,
+        FactSalesEvents.vin,
+        FactSalesEvents.sale_price,
+        FactSalesEvents.days_to_sell,
+    ]
+    if brand is not None or by_brand:
+        # Only brand series need the vehicle: the others keep sales without a (known) vehicle_key
+        if brand is not None:
+            sales_filters.append(DimVehicle.brand == brand)
+        sales = select(*sales_columns, DimVehicle.brand).join(
+            DimVehicle, FactSalesEvents.vehicle_key == DimVehicle.vehicle_key
+        )
+    else:
+        sales = select(*sales_columns)
+    sales = sales.where(*sales_filters).subquery("sales")
+
+    aggregates = []
+    for name in metrics:
+        metric = SALES_METRICS[name]
+        column = sales.c[metric.column]
+        if metric.aggregate == "count":
+            aggregates.append(func.count(column).label(name))
+        elif metric.aggregate == "sum":
+            aggregates.append(func.coalesce(func.sum(column), 0).label(name))
+        else:
+            aggregates.append(func.avg(column).label(name))
+
+    days = DimDate.__table__
+    in_window = and_(DimDate.date_key >= start_date_key, DimDate.date_key <= end_date_key)
+    if by_brand:
+        brands = select(sales.c.brand).where(sales.c.brand.isnot(None)).distinct().subquery("brands")
+        from_clause = days.join(brands, true()).outerjoin(
+            sales, and_(sales.c.sale_date_key == DimDate.date_key, sales.c.brand == brands.c.brand)
+        )
+        query = select(period_start.label("period_start"), brands.c.brand, *aggregates).select_from(
+            from_clause
+        ).where(in_window).group_by(*group_columns, brands.c.brand).order_by(period_start, brands.c.brand)
+    else:
+        from_clause = days.outerjoin(sales, sales.c.sale_date_key == DimDate.date_key)
+        query = select(period_start.label("period_start"), *aggregates).select_from(
+            from_clause
+        ).where(in_window).group_by(*group_columns).order_by(period_start)
+
+    return [dict(row._mapping) for row in db.execute(query)]
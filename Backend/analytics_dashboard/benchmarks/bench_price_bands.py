@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Benchmark PriceBandClassifier against a per-row range join.
+
+The range join baseline probes every band for every price, the way a
+non-equi join (price BETWEEN min_price AND max_price) is evaluated row by row.
+
+Usage (from Backend/analytics_dashboard):
+    python -m benchmarks.bench_price_bands --prices 5000000
+"""
+import argparse
+import time
+import numpy as np
+
+from app.price_bands import PriceBandClassifier, UNASSIGNED
+
+# Same shape as dim_price_range in the warehouse
+DEFAULT_BANDS = [
+    (1, 0.00, 14999.99),
+    (2, 15000.00, 24999.99),
+    (3, 25000.00, 34999.99),
+    (4, 35000.00, 49999.99),
+    (5, 50000.00, 74999.99),
+    (6, 75000.00, 999999.99),
+]
+
+def range_join(prices, bands):
+    """Per-row range join: probe each band until one contains the price"""
+    keys = []
+    for price in prices:
+        key = UNASSIGNED
+        for price_range_key, min_price, max_price in bands:
+            if min_price <= price <= max_price:
+                key = price_range_key
+                break
+        keys.append(key)
+    return np.array(keys, dtype=np.int64)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark vectorized price band assignment")
+    parser.add_argument("--prices", type=int, default=5_000_000, help="Prices classified by the vectorized path")
+    parser.add_argument("--join-sample", type=int, default=200_000, help="Prices classified by the per-row baseline")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    prices = np.round(rng.lognormal(mean=10.2, sigma=0.45, size=args.prices), 2)
+    classifier = PriceBandClassifier(DEFAULT_BANDS)
+
+    # Warm up, then take the best of N runs
+    classifier.classify(prices[:1000])
+    timings = []
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        keys = classifier.classify(prices)
+        timings.append(time.perf_counter() - start)
+    vectorized_seconds = min(timings)
+
+    sample = prices[:args.join_sample].tolist()
+    start = time.perf_counter()
+    join_keys = range_join(sample, DEFAULT_BANDS)
+    join_seconds = time.perf_counter() - start
+
+    if not np.array_equal(keys[:len(sample)], join_keys):
+        raise SystemExit("Mismatch between vectorized classifier and range join")
+
+    vectorized_rate = args.prices / vectorized_seconds
+    join_rate = len(sample) / join_seconds
+
+    print(f"bands:               {len(classifier)}")
+    print(f"vectorized:          {args.prices:,} prices in {vectorized_seconds * 1000:.1f} ms "
+          f"({vectorized_rate / 1e6:.1f}M prices/s)")
+    print(f"per-row range join:  {len(sample):,} prices in {join_seconds * 1000:.1f} ms "
+          f"({join_rate / 1e6:.2f}M prices/s)")
+    print(f"speedup:             {vectorized_rate / join_rate:.0f}x")
+
+if __name__ == "__main__":
+    main()
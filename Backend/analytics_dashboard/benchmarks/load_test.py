@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Fixed-concurrency load test for the analytics API.
+
+Each worker thread keeps one persistent HTTP/1.1 connection and issues
+requests back to back (closed loop), cycling through /api/dashboard and the
+brand endpoints. Reports RPS and p50/p95/p99 latency overall and per route.
+
+Usage (from Backend/analytics_dashboard, API running against synthetic data):
+    python -m benchmarks.load_test --base-url http://localhost:9515 --concurrency 16 --duration 30
+"""
+import argparse
+import http.client
+import json
+import math
+import threading
+import time
+from collections import defaultdict
+from urllib.parse import quote, urlparse
+
+DEFAULT_BRANDS = ["Ford", "Toyota", "Honda", "Chevrolet", "BMW"]
+
+def percentile(sorted_values: list, pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = math.ceil(pct / 100.0 * len(sorted_values)) - 1
+    return sorted_values[min(max(rank, 0), len(sorted_values) - 1)]
+
+def build_paths(brands: list, include_detailed: bool = True) -> list:
+    paths = ["/api/dashboard"]
+    for brand in brands:
+        paths.append(f"/api/brand/{quote(brand)}")
+        if include_detailed:
+            paths.append(f"/api/brand/{quote(brand)}/detailed")
+    return paths
+
+def route_name(path: str) -> str:
+    """Group brand URLs so per-route stats are not split by brand"""
+    parts = path.split("/")
+    if len(parts) >= 4 and parts[2] == "brand":
+        return "/api/brand/{brand_name}" + ("/" + "/".join(parts[4:]) if len(parts) > 4 else "")
+    return path
+
+def summarize(latencies: list, elapsed: float, errors: int) -> dict:
+    ordered = sorted(latencies)
+    return {
+        "requests": len(ordered),
+        "errors": errors,
+        "rps": round(len(ordered) / elapsed, 2) if elapsed > 0 else 0.0,
+        "p50_ms": round(percentile(ordered, 50) * 1000, 2),
+        "p95_ms": round(percentile(ordered, 95) * 1000, 2),
+        "p99_ms": round(percentile(ordered, 99) * 1000, 2),
+        "max_ms": round(ordered[-1] * 1000, 2) if ordered else 0.0,
+    }
+
+def run_load_test(base_url: str, paths: list, concurrency: int, duration: float, warmup: float = 2.0) -> dict:
+    """Drive `paths` round-robin from `concurrency` workers and return latency stats"""
+    target = urlparse(base_url)
+    connection_class = http.client.HTTPSConnection if target.scheme == "https" else http.client.HTTPConnection
+    lock = threading.Lock()
+    latencies = defaultdict(list)
+    errors = defaultdict(int)
+    measure_from = time.perf_counter() + warmup
+    stop_at = measure_from + duration
+
+    def worker(offset: int):
+        conn = connection_class(target.hostname, target.port, timeout=60)
+        i = offset
+        while True:
+            path = paths[i % len(paths)]
+            i += 1
+            started = time.perf_counter()
+            if started >= stop_at:
+                break
+            try:
+                conn.request("GET", path, headers={"Connection": "keep-alive"})
+                response = conn.getresponse()
+                response.read()
+                ok = response.status < 400
+            except (OSError, http.client.HTTPException):
+                conn.close()
+                conn = connection_class(target.hostname, target.port, timeout=60)
+                ok = False
+            finished = time.perf_counter()
+            if started < measure_from:
+                continue
+            with lock:
+                if ok:
+                    latencies[route_name(path)].append(finished - started)
+                else:
+                    errors[route_name(path)] += 1
+        conn.close()
+
+    threads = [threading.Thread(target=worker, args=(n,), daemon=True) for n in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    all_latencies = [value for values in latencies.values() for value in values]
+    return {
+        "base_url": base_url,
+        "concurrency": concurrency,
+        "duration_s": duration,
+        "overall": summarize(all_latencies, duration, sum(errors.values())),
+        "routes": {
+            route: summarize(latencies.get(route, []), duration, errors.get(route, 0))
+            for route in sorted(set(latencies) | set(errors))
+        },
+    }
+
+def print_report(report: dict) -> None:
+    print(f"{report['base_url']}  concurrency={report['concurrency']}  duration={report['duration_s']}s")
+    print(f"{'route':<36}{'reqs':>8}{'err':>6}{'rps':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    rows = list(report["routes"].items()) + [("TOTAL", report["overall"])]
+    for route, stats in rows:
+        print(f"{route:<36}{stats['requests']:>8}{stats['errors']:>6}{stats['rps']:>9.1f}"
+              f"{stats['p50_ms']:>10.1f}{stats['p95_ms']:>10.1f}{stats['p99_ms']:>10.1f}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the analytics API at fixed concurrency")
+    parser.add_argument("--base-url", default="http://localhost:9515")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=30.0, help="Measured seconds (after warmup)")
+    parser.add_argument("--warmup", type=float, default=2.0)
+    parser.add_argument("--brands", default=",".join(DEFAULT_BRANDS), help="Comma separated brands to drill into")
+    parser.add_argument("--no-detailed", action="store_true", help="Skip /api/brand/{brand}/detailed")
+    parser.add_argument("--json", help="Also write the report to this file")
+    args = parser.parse_args()
+
+    paths = build_paths([b.strip() for b in args.brands.split(",") if b.strip()], not args.no_detailed)
+    report = run_load_test(args.base_url, paths, args.concurrency, args.duration, args.warmup)
+    print_report(report)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Startup profile of the analytics API.
+
+Two measurements, each repeated in fresh interpreters:
+- import time of app.main (python -X importtime), broken down by top-level
+  package (self time summed over every module of the package), plus the
+  slowest individual modules;
+- time from spawning a uvicorn worker to the first 200 from /health, which
+  is what a rolling deploy or an autoscaled container waits for.
+
+Usage (from Backend/analytics_dashboard):
+    python -m benchmarks.startup_profile --runs 5
+    python -m benchmarks.startup_profile --runs 5 --no-boot --json startup.json
+"""
+import argparse
+import json
+import re
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+from collections import defaultdict
+
+IMPORT_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|\s+(\S+)$")
+
+def profile_imports(module: str) -> dict:
+    """{module: (self_us, cumulative_us)} for one fresh `import module`"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, check=True
+    )
+    modules = {}
+    for line in result.stderr.splitlines():
+        match = IMPORT_LINE.match(line)
+        if match:
+            modules[match.group(3)] = (int(match.group(1)), int(match.group(2)))
+    return modules
+
+def package_breakdown(modules: dict) -> dict:
+    """Self time (ms) per top-level package, app.* modules listed on their own"""
+    totals = defaultdict(float)
+    for name, (self_us, _) in modules.items():
+        package = name if name.startswith("app.") or name == "app" else name.split(".")[0]
+        totals[package] += self_us / 1000
+    return totals
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def time_to_ready(app: str, timeout: float) -> float:
+    """Seconds from spawning uvicorn to the first 200 from /health"""
+    port = free_port()
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", app, "--port", str(port), "--log-level", "warning"],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        while time.perf_counter() - started < timeout:
+            if server.poll() is not None:
+                raise RuntimeError(f"uvicorn exited with {server.returncode}")
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/health", timeout=1) as response:
+                    if response.status == 200:
+                        return time.perf_counter() - started
+            except OSError:
+                time.sleep(0.01)
+        raise TimeoutError(f"/health not ready after {timeout}s")
+    finally:
+        server.terminate()
+        server.wait()
+
+def main():
+    parser = argparse.ArgumentParser(description="Profile API import time and time to first /health")
+    parser.add_argument("--module", default="app.main")
+    parser.add_argument("--app", default="app.main:app", help="uvicorn app for the boot measurement")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15, help="Slowest modules to list")
+    parser.add_argument("--no-boot", action="store_true", help="Skip the uvicorn time-to-ready runs")
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--json", help="Also write the report to this file")
+    args = parser.parse_args()
+
+    runs = [profile_imports(args.module) for _ in range(args.runs)]
+    totals = [run[args.module][1] / 1000 for run in runs if args.module in run]
+    packages = defaultdict(list)
+    for run in runs:
+        for package, ms in package_breakdown(run).items():
+            packages[package].append(ms)
+    package_ms = {package: statistics.median(values) for package, values in packages.items()}
+    cumulative = defaultdict(list)
+    for run in runs:
+        for name, (_, cumulative_us) in run.items():
+            cumulative[name].append(cumulative_us / 1000)
+    slowest = sorted(((statistics.median(v), name) for name, v in cumulative.items()), reverse=True)[:args.top]
+
+    report = {
+        "module": args.module,
+        "runs": args.runs,
+        "import_ms": round(statistics.median(totals), 1),
+        "packages_ms": {k: round(v, 1) for k, v in sorted(package_ms.items(), key=lambda kv: -kv[1])},
+        "slowest_modules_ms": {name: round(ms, 1) for ms, name in slowest},
+    }
+
+    print(f"import {args.module}: median {report['import_ms']:.1f} ms over {args.runs} runs")
+    print(f"{'package (self time)':<40}{'ms':>9}{'share':>8}")
+    for package, ms in list(report["packages_ms"].items())[:args.top]:
+        print(f"{package:<40}{ms:>9.1f}{ms / report['import_ms'] * 100:>7.1f}%")
+    print(f"\n{'module (cumulative)':<40}{'ms':>9}")
+    for name, ms in report["slowest_modules_ms"].items():
+        print(f"{name:<40}{ms:>9.1f}")
+
+    if not args.no_boot:
+        ready = [time_to_ready(args.app, args.timeout) for _ in range(args.runs)]
+        report["time_to_ready_s"] = {"median": round(statistics.median(ready), 3), "max": round(max(ready), 3)}
+        print(f"\nuvicorn {args.app} -> /health 200: median {report['time_to_ready_s']['median']:.3f}s, "
+              f"max {report['time_to_ready_s']['max']:.3f}s")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+Sweep gunicorn worker / thread configurations and report the best one for this host.
+
+For every (workers, threads) pair the script starts gunicorn with
+gunicorn_conf.py (WEB_CONCURRENCY and WORKER_THREADS overridden), waits for
+/health, drives it with benchmarks.load_test and records RPS, p95 latency and
+the server's CPU use. Before the sweep it samples each route once per brand
+and reads the Server-Timing header to estimate how much of a request is spent
+waiting on Postgres versus running Python: the more I/O-bound the mix, the more
+threads (and workers per CPU) pay off. Unless --workers / --threads are given,
+that share picks the grid (derive_grid). The script exits 1 when no
+configuration stays under --max-error-rate.
+
+Usage (from Backend/analytics_dashboard, Postgres loaded by benchmarks.generate_data):
+    python -m benchmarks.sweep_workers --duration 20
+    python -m benchmarks.sweep_workers --workers 1,2,4,8 --threads 0,16,64 --duration 20
+"""
+import argparse
+import http.client
+import itertools
+import json
+import math
+import os
+import re
+import signal
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+from urllib.parse import urlparse
+
+from benchmarks.load_test import DEFAULT_BRANDS, build_paths, run_load_test
+from gunicorn_conf import available_cpus
+
+SERVER_TIMING_ENTRY = re.compile(r"(\w+);dur=([\d.]+)")
+CLOCK_TICKS = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+MAX_IO_SHARE = 0.98        # a fully I/O-bound sample would ask for unbounded threads
+MAX_THREADS_PER_CPU = 64
+
+def parse_int_list(value: str) -> list:
+    return [int(v) for v in value.split(",") if v.strip()]
+
+def derive_grid(io_share: float, cpus: int) -> dict:
+    """(workers, threads) pairs to sweep for an I/O share: a request spending io_share
+    of its time waiting on SQL needs 1 / (1 - io_share) in flight per CPU to keep it busy"""
+    per_cpu = round(min(1.0 / (1.0 - min(max(io_share, 0.0), MAX_IO_SHARE)), MAX_THREADS_PER_CPU), 2)
+    in_flight = math.ceil(per_cpu * cpus)
+    configs = []
+    for workers in sorted({max(1, cpus // 2), cpus, 2 * cpus}):
+        # Threads per worker so that workers * threads lands on in_flight, with half and double around it
+        threads = math.ceil(in_flight / workers)
+        configs += [(workers, t) for t in sorted({max(1, threads // 2), threads, threads * 2})]
+    return {"per_cpu": per_cpu, "in_flight": in_flight, "configs": configs}
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def measure_io_mix(base_url: str, paths: list) -> dict:
+    """Share of server time spent in SQL, from the db/app Server-Timing entries"""
+    target = urlparse(base_url)
+    conn = http.client.HTTPConnection(target.hostname, target.port, timeout=120)
+    db_ms = app_ms = 0.0
+    try:
+        for path in paths:
+            conn.request("GET", path)
+            response = conn.getresponse()
+            response.read()
+            timings = dict(SERVER_TIMING_ENTRY.findall(response.getheader("Server-Timing") or ""))
+            db_ms += float(timings.get("db", 0))
+            app_ms += float(timings.get("app", 0))
+    finally:
+        conn.close()
+    io_share = db_ms / app_ms if app_ms else 0.0
+    return {"db_ms": round(db_ms, 1), "app_ms": round(app_ms, 1), "io_share": round(io_share, 3)}
+
+def process_tree_cpu_seconds(pid: int) -> float:
+    """user + system CPU seconds of a process and its live children (Linux /proc)"""
+    total = 0.0
+    pids = [pid]
+    try:
+        with open(f"/proc/{pid}/task/{pid}/children") as f:
+            pids += [int(child) for child in f.read().split()]
+    except OSError:
+        pass
+    for p in pids:
+        try:
+            with open(f"/proc/{p}/stat") as f:
+                fields = f.read().rsplit(")", 1)[1].split()
+            total += (int(fields[11]) + int(fields[12])) / CLOCK_TICKS  # utime, stime
+        except (OSError, IndexError, ValueError):
+            pass
+    return total
+
+def start_server(workers: int, threads: int, port: int) -> subprocess.Popen:
+    env = dict(
+        os.environ,
+        WEB_CONCURRENCY=str(workers),
+        WORKER_THREADS=str(threads),
+        SERVER_HOST="127.0.0.1",
+        SERVER_PORT=str(port),
+        MAX_REQUESTS="0",  # no worker recycling in the middle of a measurement
+    )
+    return subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn_conf.py", "app.main:app"],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+
+def wait_ready(server: subprocess.Popen, base_url: str, timeout: float) -> None:
+    started = time.perf_counter()
+    while time.perf_counter() - started < timeout:
+        if server.poll() is not None:
+            raise RuntimeError(f"gunicorn exited with {server.returncode}")
+        try:
+            with urllib.request.urlopen(f"{base_url}/health", timeout=1) as response:
+                if response.status == 200:
+                    return
+        except OSError:
+            time.sleep(0.05)
+    raise TimeoutError(f"{base_url}/health not ready after {timeout}s")
+
+def stop_server(server: subprocess.Popen) -> None:
+    server.send_signal(signal.SIGTERM)
+    try:
+        server.wait(timeout=30)
+    except subprocess.TimeoutExpired:
+        server.kill()
+        server.wait()
+
+def run_config(workers: int, threads: int, paths: list, args) -> dict:
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    server = start_server(workers, threads, port)
+    try:
+        wait_ready(server, base_url, args.timeout)
+        cpu_before = process_tree_cpu_seconds(server.pid)
+        started = time.perf_counter()
+        report = run_load_test(base_url, paths, args.concurrency, args.duration, args.warmup)
+        elapsed = time.perf_counter() - started
+        cpu_seconds = process_tree_cpu_seconds(server.pid) - cpu_before
+    finally:
+        stop_server(server)
+    overall = report["overall"]
+    return {
+        "workers": workers,
+        "threads": threads,
+        "rps": overall["rps"],
+        "p50_ms": overall["p50_ms"],
+        "p95_ms": overall["p95_ms"],
+        "errors": overall["errors"],
+        # Server CPU over warmup + measurement, as a share of the host's available CPUs
+        "cpu_utilization": round(cpu_seconds / (elapsed * available_cpus()), 3),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Find the best gunicorn worker/thread configuration for this host")
+    parser.add_argument("--workers", help="Comma separated worker counts (default: derived from the I/O mix)")
+    parser.add_argument("--threads", help="Comma separated WORKER_THREADS values, 0 = default 40 "
+                                          "(default: derived from the I/O mix)")
+    parser.add_argument("--concurrency", type=int, default=32, help="Load test connections")
+    parser.add_argument("--duration", type=float, default=20.0)
+    parser.add_argument("--warmup", type=float, default=3.0)
+    parser.add_argument("--brands", default=",".join(DEFAULT_BRANDS))
+    parser.add_argument("--no-detailed", action="store_true", help="Skip /api/brand/{brand}/detailed")
+    parser.add_argument("--max-error-rate", type=float, default=0.01, help="Configs failing more requests are not eligible")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Seconds to wait for /health")
+    parser.add_argument("--json", help="Also write the report to this file")
+    args = parser.parse_args()
+
+    paths = build_paths([b.strip() for b in args.brands.split(",") if b.strip()], not args.no_detailed)
+    cpus = available_cpus()
+
+    # I/O mix on a single worker, after one pass to warm the caches
+    port = free_port()
+    server = start_server(1, 0, port)
+    try:
+        wait_ready(server, f"http://127.0.0.1:{port}", args.timeout)
+        measure_io_mix(f"http://127.0.0.1:{port}", paths)
+        mix = measure_io_mix(f"http://127.0.0.1:{port}", paths)
+    finally:
+        stop_server(server)
+    print(f"{cpus} CPUs available; {mix['io_share'] * 100:.0f}% of server time waiting on SQL "
+          f"({mix['db_ms']:.0f} of {mix['app_ms']:.0f} ms over {len(paths)} requests)")
+    grid = derive_grid(mix["io_share"], cpus)
+    print(f"  -> ~{grid['per_cpu']:g} requests in flight per CPU, {grid['in_flight']} in total")
+    if args.workers or args.threads:
+        workers = parse_int_list(args.workers) if args.workers else sorted({w for w, _ in grid["configs"]})
+        threads = parse_int_list(args.threads) if args.threads else sorted({t for _, t in grid["configs"]})
+        grid["configs"] = list(itertools.product(workers, threads))
+
+    results = []
+    print(f"\n{'workers':>8}{'threads':>9}{'rps':>9}{'p50 ms':>10}{'p95 ms':>10}{'err':>6}{'cpu':>7}")
+    for workers, threads in grid["configs"]:
+        result = run_config(workers, threads, paths, args)
+        results.append(result)
+        print(f"{workers:>8}{threads or 'dflt':>9}{result['rps']:>9.1f}{result['p50_ms']:>10.1f}"
+              f"{result['p95_ms']:>10.1f}{result['errors']:>6}{result['cpu_utilization'] * 100:>6.0f}%")
+
+    def error_rate(result: dict) -> float:
+        requests = result["rps"] * args.duration + result["errors"]
+        return result["errors"] / requests if requests else 1.0
+
+    eligible = [r for r in results if error_rate(r) <= args.max_error_rate]
+    best = max(eligible, key=lambda r: (r["rps"], -r["p95_ms"])) if eligible else None
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"cpus": cpus, "io_mix": mix, "grid": grid, "results": results, "best": best}, f, indent=2)
+
+    if best is None:
+        sys.exit(f"\nNo configuration kept its error rate under {args.max_error_rate:.1%}: "
+                 f"check the server logs before sizing on these numbers")
+    print(f"\nBest: {best['workers']} workers, WORKER_THREADS={best['threads']} "
+          f"-> {best['rps']:.1f} rps, p95 {best['p95_ms']:.1f} ms")
+    print(f"  WEB_CONCURRENCY={best['workers']}  (or WORKERS_PER_CPU={best['workers'] / cpus:g})")
+    print(f"  WORKER_THREADS={best['threads']}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Gunicorn configuration for the production API server.
+
+    gunicorn -c gunicorn_conf.py app.main:app
+
+Every value comes from app.config.settings (so from the environment / .env).
+With WEB_CONCURRENCY=0 the worker count is derived from the CPUs the
+container may actually use, honouring a cgroup CPU quota rather than the
+host's core count. benchmarks/sweep_workers.py measures the best worker and
+thread counts for a host.
+"""
+import math
+import os
+
+from app.config import settings
+
+def available_cpus() -> int:
+    """CPUs this process may run on, capped by the cgroup (v2 or v1) CPU quota"""
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:  # not available on macOS / Windows
+        cpus = os.cpu_count() or 1
+
+    quota = None
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            limit, period = f.read().split()
+            if limit != "max":
+                quota = int(limit) / int(period)
+    except (OSError, ValueError):
+        try:
+            with open("/sys/fs/cgroup/cpu/cpu.cfs_quota_us") as f:
+                limit = int(f.read())
+            with open("/sys/fs/cgroup/cpu/cpu.cfs_period_us") as f:
+                period = int(f.read())
+            if limit > 0:
+                quota = limit / period
+        except (OSError, ValueError):
+            pass
+
+    if quota is not None:
+        cpus = min(cpus, max(1, math.ceil(quota)))
+    return cpus
+
+def worker_count() -> int:
+    if settings.web_concurrency > 0:
+        return settings.web_concurrency
+    derived = round(available_cpus() * settings.workers_per_cpu)
+    return max(2, min(settings.max_workers, derived))
+
+bind = f"{settings.server_host}:{settings.server_port}"
+workers = worker_count()
+worker_class = settings.worker_class
+keepalive = settings.keepalive_seconds
+max_requests = settings.max_requests
+max_requests_jitter = settings.max_requests_jitter
+timeout = settings.worker_timeout_seconds
+graceful_timeout = settings.graceful_timeout_seconds
+
+# Logs go to stdout/stderr for the container runtime
+accesslog = "-"
+errorlog = "-"
+loglevel = settings.log_level.lower()
+
+def on_starting(server):
+    server.log.info(
+        f"Starting {workers} x {worker_class} on {bind} "
+        f"({available_cpus()} CPUs available, worker_threads={settings.worker_threads or 'default'})"
+    )
@@ -1,15 +1,17 @@
 #!/usr/bin/env python3
 """
-Startup script for Carvana Analytics Dashboard API
+Startup script for Carvana Analytics Dashboard API (development server).
+Production runs gunicorn with gunicorn_conf.py.
 """
+import os
+
 import uvicorn
-from app.main import app
 
 if __name__ == "__main__":
     uvicorn.run(
         "app.main:app",
         host="0.0.0.0",
         port=9515,
-        reload=True,
+        reload=os.getenv("ENVIRONMENT", "dev") != "prod",
         log_level="info"
     )
@@ -0,0 +1,122 @@
+"""
+AdmissionMiddleware (app/admission.py) in front of an ASGI app whose requests
+stay in flight until the test opens a gate, driven with concurrent httpx
+requests.
+
+Usage (from Backend/analytics_dashboard):
+    python -m unittest discover tests
+"""
+import asyncio
+import time
+import unittest
+
+import httpx
+from starlette.responses import PlainTextResponse
+
+from app.admission import AdmissionController, AdmissionMiddleware
+
+class GatedApp:
+    """Answers 200 once its gate is open (/health at once); records start order and concurrency"""
+
+    def __init__(self):
+        self.gate = asyncio.Event()
+        self.started = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def __call__(self, scope, receive, send):
+        self.started.append(scope["path"])
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            if scope["path"] != "/health":
+                await self.gate.wait()
+            await PlainTextResponse("ok")(scope, receive, send)
+        finally:
+            self.in_flight -= 1
+
+async def until(condition, timeout: float = 2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError("condition not reached")
+        await asyncio.sleep(0.01)
+
+class AdmissionMiddlewareTest(unittest.TestCase):
+
+    def serve(self, scenario, capacity=4, limits=None, queue_sizes=None, queue_timeout_seconds=5.0):
+        """Run scenario(client, app, controller) against a fresh middleware stack"""
+        async def run():
+            app = GatedApp()
+            controller = AdmissionController(capacity, limits or {}, queue_sizes or {}, queue_timeout_seconds)
+            middleware = AdmissionMiddleware(app, controller, retry_after_seconds=7)
+            async with httpx.AsyncClient(transport=httpx.ASGITransport(app=middleware), base_url="http://test") as client:
+                return await scenario(client, app, controller)
+        return asyncio.run(run())
+
+    def test_class_limit_queues_then_admits(self):
+        async def scenario(client, app, controller):
+            requests = [asyncio.create_task(client.get(f"/api/brand/brand{i}")) for i in range(5)]
+            await until(lambda: controller.stats()["classes"]["drilldown"]["waiting"] == 3)
+            self.assertEqual(app.in_flight, 2)
+            app.gate.set()
+            responses = await asyncio.gather(*requests)
+            self.assertEqual([r.status_code for r in responses], [200] * 5)
+            self.assertEqual(app.max_in_flight, 2)
+            self.assertIn('desc="drilldown"', responses[-1].headers["Server-Timing"])
+            self.assertEqual(controller.stats()["active"], 0)
+        self.serve(scenario, limits={"drilldown": 2}, queue_sizes={"drilldown": 4})
+
+    def test_queue_overflow_answers_503_with_retry_after(self):
+        async def scenario(client, app, controller):
+            held = [asyncio.create_task(client.get("/api/brand/Ford")) for _ in range(2)]  # one runs, one waits
+            await until(lambda: controller.stats()["classes"]["drilldown"]["waiting"] == 1)
+
+            overflow = await client.get("/api/brand/Kia")
+            self.assertEqual(overflow.status_code, 503)
+            self.assertEqual(overflow.headers["Retry-After"], "7")
+            self.assertEqual(overflow.json(), {"detail": "Server busy, retry in 7s"})
+            self.assertEqual(app.started, ["/api/brand/Ford"])  # never reached the app
+
+            # Another class still has room, and unclassified routes are never queued
+            self.assertEqual((await client.get("/health")).status_code, 200)
+            dashboard = asyncio.create_task(client.get("/api/dashboard"))
+            await until(lambda: app.in_flight == 2)
+
+            app.gate.set()
+            self.assertEqual([r.status_code for r in await asyncio.gather(*held, dashboard)], [200, 200, 200])
+            self.assertEqual(controller.stats()["classes"]["drilldown"]["rejected"], 1)
+        self.serve(scenario, limits={"drilldown": 1}, queue_sizes={"drilldown": 1})
+
+    def test_queue_timeout_answers_503(self):
+        async def scenario(client, app, controller):
+            held = asyncio.create_task(client.get("/api/debug"))
+            await until(lambda: app.in_flight == 1)
+            started = time.monotonic()
+            waited = await client.get("/api/debug")
+            self.assertEqual(waited.status_code, 503)
+            self.assertEqual(waited.headers["Retry-After"], "7")
+            self.assertGreaterEqual(time.monotonic() - started, 0.2)
+            self.assertEqual(controller.stats()["classes"]["diagnostic"]["waiting"], 0)
+            app.gate.set()
+            self.assertEqual((await held).status_code, 200)
+        self.serve(scenario, limits={"diagnostic": 1}, queue_sizes={"diagnostic": 2}, queue_timeout_seconds=0.2)
+
+    def test_freed_slot_goes_to_highest_priority(self):
+        async def scenario(client, app, controller):
+            held = asyncio.create_task(client.get("/api/debug"))
+            await until(lambda: app.in_flight == 1)
+            # Queued in the opposite order of their priority
+            queued = [asyncio.create_task(client.get(path))
+                      for path in ("/api/test-sales-by-brand", "/api/brand/Ford", "/api/dashboard")]
+            await until(lambda: sum(c["waiting"] for c in controller.stats()["classes"].values()) == 3)
+            app.gate.set()
+            responses = await asyncio.gather(held, *queued)
+            self.assertEqual([r.status_code for r in responses], [200] * 4)
+            self.assertEqual(app.started,
+                             ["/api/debug", "/api/dashboard", "/api/brand/Ford", "/api/test-sales-by-brand"])
+            self.assertEqual(app.max_in_flight, 1)
+        self.serve(scenario, capacity=1, queue_sizes={"dashboard": 4, "drilldown": 4, "diagnostic": 4})
+
+if __name__ == "__main__":
+    unittest.main()
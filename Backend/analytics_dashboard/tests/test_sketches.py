@@ -0,0 +1,149 @@
+"""
+HyperLogLog and SpaceSaving (app/sketches.py): error bounds, merges and the
+byte format the ETL writes to daily_sketches and the API reads back.
+
+Usage (from Backend/analytics_dashboard):
+    python -m unittest discover tests
+"""
+from collections import Counter
+import random
+import unittest
+
+import numpy as np
+
+from app.sketches import HyperLogLog, SpaceSaving, hll_register_updates, merge_all, merge_hll
+
+def vins(start: int, count: int) -> list:
+    return [f"VIN{number:012d}" for number in range(start, start + count)]
+
+def zipf_stream(rng: random.Random, items: int, length: int) -> list:
+    """Skewed stream: item i is drawn with weight 1 / (i + 1)"""
+    return rng.choices(range(items), weights=[1 / (i + 1) for i in range(items)], k=length)
+
+class HyperLogLogTest(unittest.TestCase):
+
+    def test_estimate_within_error_bound(self):
+        for count in (50_000, 200_000):
+            sketch = HyperLogLog().add(vins(0, count))
+            # 4 standard errors: a failure is a bug, not bad luck
+            self.assertLess(abs(sketch.estimate() - count) / count, 4 * sketch.relative_error, count)
+
+    def test_small_counts_use_linear_counting(self):
+        sketch = HyperLogLog().add(vins(0, 300))
+        self.assertLess(abs(sketch.estimate() - 300), 3)
+        self.assertEqual(HyperLogLog().estimate(), 0)
+
+    def test_duplicates_do_not_count(self):
+        once = HyperLogLog().add(vins(0, 5_000))
+        thrice = HyperLogLog().add(vins(0, 5_000) * 3)
+        np.testing.assert_array_equal(once.registers, thrice.registers)
+
+    def test_merge_is_the_sketch_of_the_union(self):
+        monday, tuesday = vins(0, 30_000), vins(20_000, 30_000)  # 10k VINs on the lot both days
+        merged = HyperLogLog().add(monday).merge(HyperLogLog().add(tuesday))
+        np.testing.assert_array_equal(merged.registers, HyperLogLog().add(monday + tuesday).registers)
+        self.assertLess(abs(merged.estimate() - 50_000) / 50_000, 4 * merged.relative_error)
+
+        days = [HyperLogLog().add(vins(day * 1_000, 2_000)) for day in range(5)]
+        before = [day.registers.copy() for day in days]
+        np.testing.assert_array_equal(merge_hll(days).registers, merge_hll(reversed(days)).registers)
+        for day, registers in zip(days, before):
+            np.testing.assert_array_equal(day.registers, registers)  # inputs left untouched
+        self.assertIsNone(merge_hll([]))
+
+    def test_merge_rejects_other_precision(self):
+        with self.assertRaises(ValueError):
+            HyperLogLog(12).merge(HyperLogLog(14))
+
+    def test_bytes_round_trip(self):
+        sketch = HyperLogLog(12).add(vins(0, 10_000))
+        payload = sketch.to_bytes()
+        # psycopg2 hands BYTEA back as a memoryview
+        for stored in (payload, memoryview(payload)):
+            restored = HyperLogLog.from_bytes(stored)
+            self.assertEqual(restored.precision, 12)
+            self.assertEqual(restored.registers.dtype, np.uint8)
+            np.testing.assert_array_equal(restored.registers, sketch.registers)
+            self.assertEqual(restored.estimate(), sketch.estimate())
+        # Restored registers are writable, so merge_hll can fold into them
+        restored.update_registers([0], [1])
+
+    def test_packed_register_updates_match_add(self):
+        # The inventory job packs index << 8 | rank in a pandas UDF and unpacks it with shiftright / bitwiseAND
+        values = vins(0, 20_000)
+        index, rank = hll_register_updates(values)
+        packed = (index << 8) | rank.astype(np.int64)
+        from_etl = HyperLogLog().update_registers(packed >> 8, packed & 255)
+        np.testing.assert_array_equal(from_etl.registers, HyperLogLog().add(values).registers)
+        self.assertTrue(((rank >= 1) & (rank <= 64 - 14 + 1)).all())
+
+class SpaceSavingTest(unittest.TestCase):
+
+    def assert_guarantees(self, sketch: SpaceSaving, truth: Counter):
+        bound = sketch.total / sketch.capacity
+        tracked = {hitter.item: hitter for hitter in sketch.top()}
+        for item, count in truth.items():
+            if count > bound:
+                self.assertIn(item, tracked, f"heavy hitter {item} ({count} > {bound:.1f}) not tracked")
+        for item, hitter in tracked.items():
+            self.assertLessEqual(hitter.guaranteed, truth[item], item)
+            self.assertGreaterEqual(hitter.count, truth[item], item)
+            self.assertLessEqual(hitter.error, bound, item)
+
+    def test_exact_below_capacity(self):
+        sketch = SpaceSaving(capacity=10)
+        for brand, price in [("Ford", 20_000), ("Kia", 15_000), ("Ford", 30_000)]:
+            sketch.update(brand, values=(price,))
+        self.assertEqual(sketch.top(), [
+            ("Ford", 2, 0, (50_000.0,)),
+            ("Kia", 1, 0, (15_000.0,)),
+        ])
+        self.assertEqual(sketch.top(1)[0].average(), 25_000.0)
+        self.assertEqual(sketch.total, 3)
+        self.assertEqual(sketch.value_totals, [65_000.0])
+
+    def test_heavy_hitter_guarantees(self):
+        rng = random.Random(7)
+        stream = zipf_stream(rng, items=2_000, length=50_000)
+        sketch = SpaceSaving(capacity=64)
+        for item in stream:
+            sketch.update(item)
+        self.assertEqual(sketch.total, len(stream))
+        self.assertEqual(len(sketch), 64)
+        self.assert_guarantees(sketch, Counter(stream))
+
+    def test_merged_days_keep_guarantees(self):
+        rng = random.Random(11)
+        days = [zipf_stream(rng, items=1_000, length=5_000) for _ in range(7)]
+        summaries = [SpaceSaving.from_counts(Counter(day).items(), capacity=32, n_values=0) for day in days]
+        merged = merge_all(summaries)
+        self.assertEqual(merged.total, sum(len(day) for day in days))
+        self.assertLessEqual(len(merged), 32)
+        self.assert_guarantees(merged, Counter(item for day in days for item in day))
+        self.assertIsNone(merge_all([]))
+
+    def test_from_counts_sums_values(self):
+        # fix_sales_script: (item, count, *value sums) rows aggregated in Spark
+        rows = [(("Ford", "F-150", "Ford"), 3, 90_000, 30), (("Kia", "Soul", "Kia"), 1, 18_000, None)]
+        sketch = SpaceSaving.from_counts(rows, n_values=2)
+        top = sketch.top()
+        self.assertEqual(top[0].item, ("Ford", "F-150", "Ford"))
+        self.assertEqual(top[0].average(0), 30_000.0)
+        self.assertEqual(top[0].average(1), 10.0)
+        self.assertEqual(top[1].sums, (18_000.0, 0.0))
+
+    def test_bytes_round_trip(self):
+        rng = random.Random(3)
+        sketch = SpaceSaving(capacity=16, n_values=2)
+        for item in zipf_stream(rng, items=100, length=2_000):
+            sketch.update((f"make{item}", f"model{item}", "brand"), values=(1_000.0 * item, item))
+        for stored in (sketch.to_bytes(), memoryview(sketch.to_bytes())):
+            restored = SpaceSaving.from_bytes(stored)
+            self.assertEqual(restored.top(), sketch.top())  # tuple items come back as tuples
+            self.assertEqual((restored.capacity, restored.n_values, restored.total),
+                             (sketch.capacity, sketch.n_values, sketch.total))
+            self.assertEqual(restored.value_totals, sketch.value_totals)
+            self.assertEqual(restored.merge(restored).top(), sketch.merge(sketch).top())
+
+if __name__ == "__main__":
+    unittest.main()
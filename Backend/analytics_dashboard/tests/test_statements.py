@@ -0,0 +1,103 @@
+"""
+PreparedQuery (app/statements.py): the PREPARE text compiled for PostgreSQL
+and the EXECUTE statements handed to the driver.
+
+Usage (from Backend/analytics_dashboard):
+    python -m unittest discover tests
+"""
+import unittest
+
+from sqlalchemy import bindparam, case, func, literal_column, select
+from sqlalchemy.dialects.postgresql import psycopg2
+
+from app.statements import PreparedQuery, _keys, inventory
+
+# An ANY array, literals in a CASE and a WHERE, and a LIKE pattern with % in the SQL text
+AGE_GROUPS = PreparedQuery("age_groups", select(
+    case((inventory.c.days_on_lot <= 30, "fresh"), else_="aged").label("age_group"),
+    func.count(inventory.c.vin).label("vehicles")
+).where(
+    inventory.c.vehicle_key == _keys("vehicle_keys"),
+    inventory.c.date_key == bindparam("date_key"),
+    inventory.c.vin.like(literal_column("'1HG%'")),
+    inventory.c.status == "active"
+).group_by(literal_column("age_group")))
+
+class RecordingConnection:
+    """Stands in for the session's connection: records driver statements, returns no rows"""
+
+    def __init__(self):
+        self.dialect = psycopg2.dialect()
+        self.info = {}
+        self.statements = []
+
+    def exec_driver_sql(self, sql, parameters=None):
+        self.statements.append((sql, parameters))
+        return self
+
+    def all(self):
+        return []
+
+class RecordingSession:
+    def __init__(self):
+        self.recorded = RecordingConnection()
+
+    def connection(self):
+        return self.recorded
+
+class PreparedQueryTest(unittest.TestCase):
+
+    def test_prepare_text(self):
+        sql, prepare_sql, names, defaults = AGE_GROUPS._compile(psycopg2.dialect())
+        self.assertEqual(names, ["days_on_lot_1", "param_1", "param_2", "vehicle_keys", "date_key", "status_1"])
+        self.assertTrue(prepare_sql.startswith("PREPARE carvana_age_groups AS SELECT CASE WHEN "))
+        self.assertIn("(fact_daily_inventory.days_on_lot <= $1) THEN $2 ELSE $3 END AS age_group", prepare_sql)
+        self.assertIn("fact_daily_inventory.vehicle_key = ANY ($4::INTEGER[])", prepare_sql)
+        self.assertIn("fact_daily_inventory.date_key = $5", prepare_sql)
+        self.assertIn("fact_daily_inventory.status = $6", prepare_sql)
+        # The text Postgres prepares: % as written, no pyformat placeholders left
+        self.assertIn("LIKE '1HG%' AND", prepare_sql)
+        self.assertNotIn("%%", prepare_sql)
+        self.assertNotIn("%(", prepare_sql)
+        # The plain statement keeps the driver's escaping
+        self.assertIn("LIKE '1HG%%'", sql)
+        self.assertEqual(defaults, {"days_on_lot_1": 30, "param_1": "fresh", "param_2": "aged", "status_1": "active"})
+
+    def test_execute_arguments_follow_placeholders(self):
+        db = RecordingSession()
+        params = {"date_key": 20261017, "vehicle_keys": [3, 1, 2]}
+        AGE_GROUPS.execute(db, params)
+        AGE_GROUPS.execute(db, {**params, "status_1": "sold"})  # a literal can be overridden
+
+        statements = db.recorded.statements
+        self.assertEqual(len(statements), 3)  # prepared once per connection
+        prepare, first, second = statements
+        # Handed to the driver, which formats it: % is escaped again
+        self.assertEqual(prepare, (AGE_GROUPS._compile(psycopg2.dialect())[1].replace("%", "%%"), None))
+        self.assertEqual(first[0], "EXECUTE carvana_age_groups(%(days_on_lot_1)s, %(param_1)s, %(param_2)s, "
+                                   "%(vehicle_keys)s, %(date_key)s, %(status_1)s)")
+        self.assertEqual(list(first[1].items()), [
+            ("days_on_lot_1", 30), ("param_1", "fresh"), ("param_2", "aged"),
+            ("vehicle_keys", [3, 1, 2]), ("date_key", 20261017), ("status_1", "active")
+        ])
+        self.assertEqual(second[1]["status_1"], "sold")
+
+    def test_statement_without_parameters(self):
+        db = RecordingSession()
+        query = PreparedQuery("latest_day", select(func.max(inventory.c.date_key)))
+        query.execute(db, {})
+        self.assertEqual([sql for sql, _ in db.recorded.statements], [
+            "PREPARE carvana_latest_day AS SELECT max(fact_daily_inventory.date_key) AS max_1 \n"
+            "FROM fact_daily_inventory",
+            "EXECUTE carvana_latest_day",
+        ])
+
+        # prepare=False runs the compiled statement with its literals bound
+        unprepared = RecordingSession()
+        AGE_GROUPS.execute(unprepared, {"date_key": 20261017, "vehicle_keys": [1]}, prepare=False)
+        sql, values = unprepared.recorded.statements[0]
+        self.assertTrue(sql.startswith("SELECT CASE WHEN"))
+        self.assertEqual(values["status_1"], "active")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,205 @@
+"""
+TieredCache with a RedisPayloadCache L2, against an in-process server speaking
+the Redis protocol (only the commands RedisPayloadCache sends).
+
+Usage (from Backend/analytics_dashboard):
+    python -m unittest discover tests
+"""
+from datetime import datetime, timedelta, timezone
+from fnmatch import fnmatchcase
+import socket
+import socketserver
+import threading
+import time
+import unittest
+
+import redis
+
+from app.cache import TTLCache
+from app.tiered_cache import DataVersion, RedisPayloadCache, TieredCache
+
+class RespHandler(socketserver.StreamRequestHandler):
+    """GET, SET [NX] [PX ms], DEL, SCAN with MATCH, PING; other commands answer OK"""
+
+    def handle(self):
+        while True:
+            command = self._read_command()
+            if command is None:
+                return
+            self.wfile.write(self.server.execute(command))
+
+    def _read_command(self):
+        line = self.rfile.readline()
+        if not line:
+            return None
+        command = []
+        for _ in range(int(line[1:])):  # *<count>, then $<length> + bytes per argument
+            length = int(self.rfile.readline()[1:])
+            command.append(self.rfile.read(length + 2)[:-2])
+        return command
+
+class FakeRedisServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), RespHandler)
+        self.data = {}  # key -> (value, expires_at or None)
+        self.lock = threading.Lock()
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+
+    @property
+    def port(self) -> int:
+        return self.server_address[1]
+
+    def _live(self, key):
+        item = self.data.get(key)
+        if item is not None and item[1] is not None and time.monotonic() >= item[1]:
+            del self.data[key]
+            return None
+        return item
+
+    def execute(self, command) -> bytes:
+        name, args = command[0].upper(), command[1:]
+        with self.lock:
+            if name == b"PING":
+                return b"+PONG\r\n"
+            if name == b"GET":
+                item = self._live(args[0])
+                return b"$-1\r\n" if item is None else b"$%d\r\n%s\r\n" % (len(item[0]), item[0])
+            if name == b"SET":
+                key, value, options = args[0], args[1], [a.upper() for a in args[2:]]
+                if b"NX" in options and self._live(key) is not None:
+                    return b"$-1\r\n"
+                expires_at = None
+                if b"PX" in options:
+                    expires_at = time.monotonic() + int(args[2 + options.index(b"PX") + 1]) / 1000
+                self.data[key] = (value, expires_at)
+                return b"+OK\r\n"
+            if name == b"DEL":
+                return b":%d\r\n" % sum(self.data.pop(key, None) is not None for key in args)
+            if name == b"SCAN":
+                pattern = args[args.index(b"MATCH") + 1].decode() if b"MATCH" in args else "*"
+                keys = [k for k in list(self.data) if self._live(k) and fnmatchcase(k.decode(), pattern)]
+                return b"*2\r\n$1\r\n0\r\n*%d\r\n" % len(keys) + b"".join(
+                    b"$%d\r\n%s\r\n" % (len(k), k) for k in keys)
+            return b"+OK\r\n"
+
+class Loads:
+    """Counts compute() calls; each takes `seconds`"""
+
+    def __init__(self, seconds: float = 0.0):
+        self.seconds = seconds
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def __call__(self):
+        with self._lock:
+            self.calls += 1
+        time.sleep(self.seconds)
+        return {"units": 42}
+
+class TieredCacheRedisTest(unittest.TestCase):
+
+    def setUp(self):
+        self.server = FakeRedisServer()
+        self.loaded = {"inventory_date_key": 20261016, "sales_date_key": 20261016}
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def worker_cache(self, version: DataVersion = None, port: int = None) -> TieredCache:
+        """One worker's TieredCache: its own L1 and Redis connection"""
+        client = redis.Redis(host="127.0.0.1", port=port or self.server.port, socket_timeout=1.0,
+                             socket_connect_timeout=1.0)
+        shared = RedisPayloadCache(client, "test", lock_wait_seconds=5.0, retry_seconds=30.0)
+        version = version or DataVersion(check_seconds=3600, loader=lambda db: dict(self.loaded))
+        return TieredCache(TTLCache(16), shared, version)
+
+    def test_single_flight_across_caches(self):
+        compute = Loads(seconds=0.3)
+        caches = [self.worker_cache(), self.worker_cache()]
+        values = [None, None]
+
+        def request(i):
+            values[i] = caches[i].get_or_compute("kpis", (30,), compute, ttl_seconds=60)
+        threads = [threading.Thread(target=request, args=(i,)) for i in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(compute.calls, 1)
+        self.assertEqual(values, [{"units": 42}, {"units": 42}])
+        # The lock is released once the value is stored
+        self.assertEqual([k for k in self.server.data if b":lock:" in k], [])
+
+    def test_new_load_misses(self):
+        compute = Loads()
+        version = DataVersion(check_seconds=3600, loader=lambda db: dict(self.loaded))
+        cache = self.worker_cache(version)
+        cache.get_or_compute("kpis", (30,), compute, ttl_seconds=60)
+        cache.get_or_compute("kpis", (30,), compute, ttl_seconds=60)
+        self.assertEqual(compute.calls, 1)
+        before = cache.key("kpis", (30,))
+
+        # An ETL load of the next day, noticed through invalidate()
+        self.loaded = {"inventory_date_key": 20261017, "sales_date_key": 20261017}
+        version.invalidate()
+        cache.get_or_compute("kpis", (30,), compute, ttl_seconds=60)
+        self.assertEqual(compute.calls, 2)
+        self.assertNotEqual(cache.key("kpis", (30,)), before)
+        self.assertIn("20261017-20261017", cache.key("kpis", (30,)))
+
+        # Another worker that sees the same load reads it from L2
+        other = self.worker_cache()
+        self.assertEqual(other.get_or_compute("kpis", (30,), compute, ttl_seconds=60), {"units": 42})
+        self.assertEqual(compute.calls, 2)
+
+    def test_same_day_reload_misses(self):
+        compute = Loads()
+        loaded_at = datetime(2026, 10, 17, 3, 0, tzinfo=timezone.utc)
+        self.loaded = {"inventory_date_key": 20261017, "inventory_loaded_at": loaded_at,
+                       "sales_date_key": 20261017, "sales_loaded_at": loaded_at}
+        version = DataVersion(check_seconds=3600, loader=lambda db: dict(self.loaded))
+        cache = self.worker_cache(version)
+        cache.get_or_compute("kpis", (30,), compute, ttl_seconds=60)
+        before = cache.key("kpis", (30,))
+
+        # The inventory job re-runs the same day: a new manifest finished_at, same date_key
+        self.loaded["inventory_loaded_at"] = loaded_at + timedelta(hours=2)
+        version.invalidate()
+        cache.get_or_compute("kpis", (30,), compute, ttl_seconds=60)
+        self.assertEqual(compute.calls, 2)
+        self.assertNotEqual(cache.key("kpis", (30,)), before)
+        self.assertIn("20261017.1792213200000-20261017.1792206000000", cache.key("kpis", (30,)))
+
+    def test_version_check_uses_callers_session(self):
+        sessions = []
+
+        def loader(db):
+            sessions.append(db)
+            return dict(self.loaded)
+        cache = self.worker_cache(DataVersion(check_seconds=3600, loader=loader))
+        db = object()  # stands in for the request's Session
+        cache.get_or_compute("kpis", (30,), Loads(), ttl_seconds=60, db=db)
+        self.assertEqual(sessions, [db])
+
+    def test_redis_down_bypasses_l2(self):
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            closed_port = sock.getsockname()[1]
+        cache = self.worker_cache(port=closed_port)
+        compute = Loads()
+
+        started = time.monotonic()
+        self.assertEqual(cache.get_or_compute("kpis", (30,), compute, ttl_seconds=60), {"units": 42})
+        self.assertEqual(cache.get_or_compute("kpis", (7,), compute, ttl_seconds=60), {"units": 42})
+        self.assertEqual(compute.calls, 2)
+        self.assertFalse(cache.shared._available())
+        # No lock wait: the failed lock call turns L2 off for retry_seconds
+        self.assertLess(time.monotonic() - started, 2.0)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -4,51 +4,7 @@ import { Button } from "@/components/ui/button";
 import { Badge } from "@/components/ui/badge";
 import { ChevronDown, BarChart3 } from "lucide-react";
 import { cn } from "@/lib/utils";
-
-// Brand logos mapping with worldvectorlogo.com CDN URLs
-const brandLogos: Record<string, string> = {
-  "Lincoln": "https://cdn.worldvectorlogo.com/logos/lincoln-1.svg",
-  "Honda": "https://cdn.worldvectorlogo.com/logos/honda-1.svg",
-  "Ram": "https://cdn.worldvectorlogo.com/logos/ram-1.svg",
-  "VinFast": "https://cdn.worldvectorlogo.com/logos/vinfast-3.svg",
-  "Ford": "https://cdn.worldvectorlogo.com/logos/ford-1.svg",
-  "Scion": "https://cdn.worldvectorlogo.com/logos/scion.svg",
-  "Maserati": "https://cdn.worldvectorlogo.com/logos/maserati-1.svg",
-  "Dodge": "https://cdn.worldvectorlogo.com/logos/dodge-1.svg",
-  "Chevrolet": "https://cdn.worldvectorlogo.com/logos/chevrolet-1.svg",
-  "INFINITI": "https://cdn.worldvectorlogo.com/logos/infiniti-1.svg",
-  "MINI": "https://cdn.worldvectorlogo.com/logos/bmw-mini-1.svg",
-  "Lucid": "https://cdn.worldvectorlogo.com/logos/lucid-motors-logo.svg",
-  "Porsche": "https://cdn.worldvectorlogo.com/logos/porsche-1.svg",
-  "Alfa Romeo": "https://cdn.worldvectorlogo.com/logos/alfaromeo.svg",
-  "smart": "https://cdn.worldvectorlogo.com/logos/smart-1.svg",
-  "Audi": "https://cdn.worldvectorlogo.com/logos/audi-11.svg",
-  "Tesla": "https://cdn.worldvectorlogo.com/logos/tesla-1.svg",
-  "Jaguar": "https://cdn.worldvectorlogo.com/logos/jaguar-1.svg",
-  "Lexus": "https://cdn.worldvectorlogo.com/logos/lexus-1.svg",
-  "Kia": "https://cdn.worldvectorlogo.com/logos/kia-1.svg",
-  "Mercedes-Benz": "https://cdn.worldvectorlogo.com/logos/mercedes-benz-9.svg",
-  "Land Rover": "https://cdn.worldvectorlogo.com/logos/land-rover.svg",
-  "Jeep": "https://cdn.worldvectorlogo.com/logos/jeep-1.svg",
-  "Rivian": "https://cdn.worldvectorlogo.com/logos/rivian-1.svg",
-  "Volvo": "https://cdn.worldvectorlogo.com/logos/volvo-1.svg",
-  "Buick": "https://cdn.worldvectorlogo.com/logos/buick-1.svg",
-  "Cadillac": "https://cdn.worldvectorlogo.com/logos/cadillac-1.svg",
-  "Acura": "https://cdn.worldvectorlogo.com/logos/acura-1.svg",
-  "Nissan": "https://cdn.worldvectorlogo.com/logos/nissan-1.svg",
-  "Polestar": "https://cdn.worldvectorlogo.com/logos/polestar-1.svg",
-  "Genesis": "https://cdn.worldvectorlogo.com/logos/genesis-1.svg",
-  "Hyundai": "https://cdn.worldvectorlogo.com/logos/hyundai-1.svg",
-  "MAZDA": "https://cdn.worldvectorlogo.com/logos/mazda-1.svg",
-  "Mitsubishi": "https://cdn.worldvectorlogo.com/logos/mitsubishi-1.svg",
-  "FIAT": "https://cdn.worldvectorlogo.com/logos/fiat-1.svg",
-  "Subaru": "https://cdn.worldvectorlogo.com/logos/subaru-1.svg",
-  "BMW": "https://cdn.worldvectorlogo.com/logos/bmw-1.svg",
-  "Volkswagen": "https://cdn.worldvectorlogo.com/logos/volkswagen-1.svg",
-  "Chrysler": "https://cdn.worldvectorlogo.com/logos/chrysler-1.svg",
-  "Toyota": "https://cdn.worldvectorlogo.com/logos/toyota-1.svg",
-  "GMC": "https://cdn.worldvectorlogo.com/logos/gmc-1.svg"
-};
+import { brandLogoUrl } from "@/services/api";
 
 // Brand list for iteration
 const brands = [
@@ -109,7 +65,7 @@ export function BrandSelector({ onBrandSelect, selectedBrand, className }: Brand
                   <div className="flex items-center space-x-3 w-full">
                     <div className="h-8 w-10 flex items-center justify-center bg-white/10 rounded-lg border border-white/20">
                       <img
-                        src={brandLogos[brand]}
+                        src={brandLogoUrl(brand)}
                         alt={brand}
                         className="h-5 w-auto object-contain max-w-full"
                         onError={(e) => {
@@ -149,7 +105,7 @@ export function BrandSelector({ onBrandSelect, selectedBrand, className }: Brand
             >
               <div className="h-6 w-8 flex items-center justify-center bg-white/10 rounded border border-white/20">
                 <img
-                  src={brandLogos[brand]}
+                  src={brandLogoUrl(brand)}
                   alt={brand}
                   className="h-4 w-auto object-contain max-w-full"
                   onError={(e) => {
@@ -205,7 +161,7 @@ export function BrandSelector({ onBrandSelect, selectedBrand, className }: Brand
               >
                 <div className="h-6 w-8 flex items-center justify-center bg-white/10 rounded border border-white/20">
                   <img
-                    src={brandLogos[brand]}
+                    src={brandLogoUrl(brand)}
                     alt={brand}
                     className="h-4 w-auto object-contain max-w-full"
                     onError={(e) => {
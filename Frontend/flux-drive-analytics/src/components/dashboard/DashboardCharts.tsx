@@ -20,27 +20,36 @@ import {
   DailySalesTrend, 
   InventoryByPriceRange, 
   SalesByBrand, 
-  DaysOnLotByPriceRange
+  DaysOnLotByPriceRange,
+  DashboardSection,
+  SectionState
 } from "@/types/dashboard";
+import { SectionStateBadge, SectionUnavailable } from "./SectionStatus";
 import { TrendingUp, Package, Target, Clock } from "lucide-react";
 
+// Sections are undefined when the API could not load them
 interface DashboardChartsProps {
-  dailySalesTrend: DailySalesTrend[];
-  inventoryByPriceRange: InventoryByPriceRange[];
-  salesByBrand: SalesByBrand[];
-  daysOnLotByPriceRange: DaysOnLotByPriceRange[];
+  dailySalesTrend?: DailySalesTrend[];
+  inventoryByPriceRange?: InventoryByPriceRange[];
+  salesByBrand?: SalesByBrand[];
+  daysOnLotByPriceRange?: DaysOnLotByPriceRange[];
+  sectionState?: (section: DashboardSection) => SectionState;
 }
 
 interface TopChartsProps {
-  dailySalesTrend: DailySalesTrend[];
-  inventoryByPriceRange: InventoryByPriceRange[];
-  salesByBrand: SalesByBrand[];
+  dailySalesTrend?: DailySalesTrend[];
+  inventoryByPriceRange?: InventoryByPriceRange[];
+  salesByBrand?: SalesByBrand[];
+  sectionState?: (section: DashboardSection) => SectionState;
 }
 
 interface BottomChartProps {
-  daysOnLotByPriceRange: DaysOnLotByPriceRange[];
+  daysOnLotByPriceRange?: DaysOnLotByPriceRange[];
+  sectionState?: (section: DashboardSection) => SectionState;
 }
 
+const allSectionsOk = (): SectionState => 'ok';
+
 // Apple-inspired custom tooltip
 const CustomTooltip = ({ active, payload, label }: any) => {
   if (active && payload && payload.length) {
@@ -113,7 +122,8 @@ const brandColors = [
 export function TopCharts({
   dailySalesTrend,
   inventoryByPriceRange,
-  salesByBrand
+  salesByBrand,
+  sectionState = allSectionsOk
 }: TopChartsProps) {
   return (
     <div className="space-y-6">
@@ -132,9 +142,11 @@ export function TopCharts({
                 Daily sales volume and revenue trends over the past 30 days
               </CardDescription>
             </div>
+            <SectionStateBadge state={sectionState('daily_sales_trend')} className="ml-auto" />
           </div>
         </CardHeader>
         <CardContent className="pt-2">
+          {!dailySalesTrend ? <SectionUnavailable /> : (
           <ResponsiveContainer width="100%" height={350}>
             <AreaChart data={dailySalesTrend} margin={{ top: 10, right: 30, left: 0, bottom: 0 }}>
               <defs>
@@ -198,6 +210,7 @@ export function TopCharts({
               />
             </AreaChart>
           </ResponsiveContainer>
+          )}
         </CardContent>
       </Card>
 
@@ -218,9 +231,12 @@ export function TopCharts({
                   Market share distribution by manufacturer
                 </CardDescription>
               </div>
+              <SectionStateBadge state={sectionState('sales_by_brand')} className="ml-auto" />
             </div>
           </CardHeader>
           <CardContent className="pt-2">
+            {!salesByBrand ? <SectionUnavailable /> : (
+            <>
             <ResponsiveContainer width="100%" height={350}>
               <PieChart>
                 <Pie
@@ -275,6 +291,8 @@ export function TopCharts({
                 </div>
               ))}
             </div>
+            </>
+            )}
           </CardContent>
         </Card>
 
@@ -293,9 +311,11 @@ export function TopCharts({
                   Active inventory by price segments
                 </CardDescription>
               </div>
+              <SectionStateBadge state={sectionState('inventory_by_price_range')} className="ml-auto" />
             </div>
           </CardHeader>
           <CardContent className="pt-2">
+            {!inventoryByPriceRange ? <SectionUnavailable /> : (
             <ResponsiveContainer width="100%" height={350}>
               <BarChart data={inventoryByPriceRange} margin={{ top: 10, right: 30, left: 0, bottom: 5 }}>
                 <defs>
@@ -343,6 +363,7 @@ export function TopCharts({
                 />
               </BarChart>
             </ResponsiveContainer>
+            )}
           </CardContent>
         </Card>
       </div>
@@ -350,7 +371,7 @@ export function TopCharts({
   );
 }
 
-export function BottomChart({ daysOnLotByPriceRange }: BottomChartProps) {
+export function BottomChart({ daysOnLotByPriceRange, sectionState = allSectionsOk }: BottomChartProps) {
   return (
     <Card className="glass rounded-3xl border-0 shadow-card backdrop-blur-apple hover:shadow-hover transition-all duration-500 group">
       <CardHeader className="pb-4">
@@ -366,9 +387,11 @@ export function BottomChart({ daysOnLotByPriceRange }: BottomChartProps) {
               Average days on lot by price range - optimized for quick turnover
             </CardDescription>
           </div>
+          <SectionStateBadge state={sectionState('days_on_lot_by_price_range')} className="ml-auto" />
         </div>
       </CardHeader>
       <CardContent className="pt-2">
+        {!daysOnLotByPriceRange ? <SectionUnavailable /> : (
         <ResponsiveContainer width="100%" height={350}>
           <BarChart data={daysOnLotByPriceRange} margin={{ top: 10, right: 30, left: 0, bottom: 5 }}>
             <defs>
@@ -415,6 +438,7 @@ export function BottomChart({ daysOnLotByPriceRange }: BottomChartProps) {
             />
           </BarChart>
         </ResponsiveContainer>
+        )}
       </CardContent>
     </Card>
   );
@@ -424,13 +448,15 @@ export function DashboardCharts({
   dailySalesTrend,
   inventoryByPriceRange,
   salesByBrand,
-  daysOnLotByPriceRange
+  daysOnLotByPriceRange,
+  sectionState
 }: DashboardChartsProps) {
   return (
     <TopCharts
       dailySalesTrend={dailySalesTrend}
       inventoryByPriceRange={inventoryByPriceRange}
       salesByBrand={salesByBrand}
+      sectionState={sectionState}
     />
   );
 }
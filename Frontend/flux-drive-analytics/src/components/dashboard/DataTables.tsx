@@ -5,20 +5,26 @@ import { cn } from "@/lib/utils";
 import { 
   TopSellingModel, 
   SlowMovingInventory, 
-  RecentSale 
+  RecentSale,
+  DashboardSection,
+  SectionState
 } from "@/types/dashboard";
+import { SectionStateBadge, SectionUnavailable } from "./SectionStatus";
 import { TrendingUp, AlertTriangle, Clock, Trophy, Car, Calendar } from "lucide-react";
 
+// Sections are undefined when the API could not load them
 interface DataTablesProps {
-  topSellingModels: TopSellingModel[];
-  slowMovingInventory: SlowMovingInventory[];
-  recentSales: RecentSale[];
+  topSellingModels?: TopSellingModel[];
+  slowMovingInventory?: SlowMovingInventory[];
+  recentSales?: RecentSale[];
+  sectionState?: (section: DashboardSection) => SectionState;
 }
 
 export function DataTables({ 
   topSellingModels, 
   slowMovingInventory, 
-  recentSales 
+  recentSales,
+  sectionState = () => 'ok'
 }: DataTablesProps) {
   const formatCurrency = (amount: number) => 
     new Intl.NumberFormat('en-US', { style: 'currency', currency: 'USD', minimumFractionDigits: 0 }).format(amount);
@@ -76,6 +82,8 @@ export function DataTables({
           {/* Top Selling Models */}
           <TabsContent value="top-selling" className="mt-0">
             <div className="px-6 pb-6">
+              <SectionStateBadge state={sectionState('top_selling_models')} className="mb-3" />
+              {!topSellingModels ? <SectionUnavailable height={240} /> : (
               <div className="glass rounded-2xl overflow-hidden backdrop-blur-apple">
                 <div className="overflow-x-auto">
                   <table className="w-full">
@@ -140,12 +148,15 @@ export function DataTables({
                   </table>
                 </div>
               </div>
+              )}
             </div>
           </TabsContent>
 
           {/* Slow Moving Inventory */}
           <TabsContent value="slow-moving" className="mt-0">
             <div className="px-6 pb-6">
+              <SectionStateBadge state={sectionState('slow_moving_inventory')} className="mb-3" />
+              {!slowMovingInventory ? <SectionUnavailable height={240} /> : (
               <div className="glass rounded-2xl overflow-hidden backdrop-blur-apple">
                 <div className="overflow-x-auto">
                   <table className="w-full">
@@ -201,12 +212,15 @@ export function DataTables({
                   </table>
                 </div>
               </div>
+              )}
             </div>
           </TabsContent>
 
           {/* Recent Sales */}
           <TabsContent value="recent-sales" className="mt-0">
             <div className="px-6 pb-6">
+              <SectionStateBadge state={sectionState('recent_sales')} className="mb-3" />
+              {!recentSales ? <SectionUnavailable height={240} /> : (
               <div className="glass rounded-2xl overflow-hidden backdrop-blur-apple">
                 <div className="overflow-x-auto">
                   <table className="w-full">
@@ -266,6 +280,7 @@ export function DataTables({
                   </table>
                 </div>
               </div>
+              )}
             </div>
           </TabsContent>
         </Tabs>
@@ -0,0 +1,46 @@
+import { Badge } from "@/components/ui/badge";
+import { cn } from "@/lib/utils";
+import { SectionState } from "@/types/dashboard";
+import { AlertCircle, History } from "lucide-react";
+
+interface SectionUnavailableProps {
+  height?: number;
+  className?: string;
+}
+
+// Placeholder for a dashboard section the API could not compute
+export function SectionUnavailable({ height = 350, className }: SectionUnavailableProps) {
+  return (
+    <div
+      className={cn(
+        "flex flex-col items-center justify-center gap-3 rounded-2xl bg-muted/20 text-muted-foreground",
+        className
+      )}
+      style={{ height }}
+    >
+      <AlertCircle className="h-6 w-6 text-error/80" />
+      <p className="text-sm font-medium">This section is temporarily unavailable</p>
+      <p className="text-xs">It will load again on the next refresh</p>
+    </div>
+  );
+}
+
+interface SectionStateBadgeProps {
+  state: SectionState;
+  className?: string;
+}
+
+// Marks a section served from a previous value; renders nothing for fresh sections
+export function SectionStateBadge({ state, className }: SectionStateBadgeProps) {
+  if (state === 'ok') return null;
+  return (
+    <Badge
+      variant="outline"
+      title={state === 'stale' ? "Showing the last successfully loaded data" : "Could not be loaded"}
+      className={cn("rounded-full px-3 py-1 text-xs font-medium gap-1 text-warning border-warning/40", className)}
+    >
+      {state === 'stale' ? <History className="h-3 w-3" /> : <AlertCircle className="h-3 w-3" />}
+      {state === 'stale' ? "Cached" : "Unavailable"}
+    </Badge>
+  );
+}
@@ -1,14 +1,62 @@
-import { useQuery } from '@tanstack/react-query';
-import { fetchDashboardData } from '@/services/api';
+import { useEffect, useRef, useState } from 'react';
+import { useQuery, useQueryClient } from '@tanstack/react-query';
+import { fetchDashboardData, fetchDashboardSections, dashboardEventsUrl, SnapshotEvent } from '@/services/api';
+import { DashboardData, DashboardSection } from '@/types/dashboard';
+
+// Refetched sections replace their old values; a refetch that failed keeps the old value, marked stale
+const mergeSections = (old: DashboardData, fresh: Partial<DashboardData>, refetched: DashboardSection[]): DashboardData => {
+  const untouched = (names?: string[]) => (names ?? []).filter((name) => !refetched.includes(name as DashboardSection));
+  return {
+    ...old,
+    ...fresh,
+    stale_sections: [...untouched(old.stale_sections), ...(fresh.stale_sections ?? [])],
+    failed_sections: [...untouched(old.failed_sections), ...(fresh.failed_sections ?? [])],
+  };
+};
 
 export const useDashboardData = (refreshInterval = 30000) => {
+  const queryClient = useQueryClient();
+  const [live, setLive] = useState(false);
+  const lastVersion = useRef<string | null>(null);
+
+  // Server pushes a "snapshot" event when a day is loaded (or reloaded); refetch only the changed sections
+  useEffect(() => {
+    if (typeof EventSource === 'undefined') return;
+
+    const source = new EventSource(dashboardEventsUrl());
+    source.addEventListener('snapshot', (event) => {
+      const snapshot: SnapshotEvent = JSON.parse((event as MessageEvent).data);
+      const version = [
+        snapshot.inventory_date_key, snapshot.inventory_loaded_at, snapshot.sales_date_key, snapshot.sales_loaded_at
+      ].join(':');
+      if (lastVersion.current !== null && lastVersion.current !== version) {
+        const cached = queryClient.getQueryData<DashboardData>(['dashboard-data']);
+        if (cached && snapshot.changed_sections.length > 0) {
+          fetchDashboardSections(snapshot.changed_sections)
+            .then((sections) => {
+              queryClient.setQueryData<DashboardData>(['dashboard-data'], (old) => old && mergeSections(old, sections, snapshot.changed_sections));
+            })
+            .catch(() => queryClient.invalidateQueries({ queryKey: ['dashboard-data'] }));
+        } else {
+          queryClient.invalidateQueries({ queryKey: ['dashboard-data'] });
+        }
+      }
+      lastVersion.current = version;
+      setLive(true);
+    });
+    // EventSource reconnects by itself; fall back to polling until it does
+    source.onerror = () => setLive(false);
+
+    return () => source.close();
+  }, [queryClient]);
+
   return useQuery({
     queryKey: ['dashboard-data'],
     queryFn: fetchDashboardData,
-    refetchInterval: refreshInterval,
-    staleTime: 15000, // Consider data stale after 15 seconds
+    refetchInterval: live ? false : refreshInterval,
+    staleTime: live ? Infinity : 15000, // Pushed updates replace the 15 second staleness window
     gcTime: 5 * 60 * 1000, // Keep in cache for 5 minutes
     retry: 3,
     retryDelay: (attemptIndex) => Math.min(1000 * 2 ** attemptIndex, 30000),
   });
-};
\ No newline at end of file
+};
@@ -4,9 +4,11 @@ import { KPICard } from "@/components/dashboard/KPICard";
 import { DashboardCharts } from "@/components/dashboard/DashboardCharts";
 import { DataTables } from "@/components/dashboard/DataTables";
 import { BrandSelector } from "@/components/dashboard/BrandSelector";
+import { SectionStateBadge } from "@/components/dashboard/SectionStatus";
 import { Skeleton } from "@/components/ui/skeleton";
 import { Alert, AlertDescription } from "@/components/ui/alert";
 import { useNavigate } from "react-router-dom";
+import { DashboardKPIs, DashboardSection, sectionState } from "@/types/dashboard";
 
 import { 
   Car, 
@@ -110,10 +112,15 @@ const Index = () => {
 
   if (!data) return null;
 
+  // A section that failed to load is missing from the response: show placeholders instead
+  const stateOf = (section: DashboardSection) => sectionState(data, section);
+  const kpis = data.kpis;
+  const kpiValue = (value: (k: DashboardKPIs) => string | number) => (kpis ? value(kpis) : "—");
+
   const kpiCards = [
     {
       title: "Active Inventory",
-      value: data.kpis.total_active_inventory,
+      value: kpiValue((k) => k.total_active_inventory),
       icon: <Car className="h-7 w-7" />,
       gradient: "bg-gradient-primary",
       trend: { value: 2.4, isPositive: true },
@@ -122,7 +129,7 @@ const Index = () => {
     },
     {
       title: "Sales Today", 
-      value: data.kpis.total_sales_today,
+      value: kpiValue((k) => k.total_sales_today),
       icon: <TrendingUp className="h-7 w-7" />,
       gradient: "bg-gradient-success",
       trend: { value: 8.1, isPositive: true },
@@ -131,7 +138,7 @@ const Index = () => {
     },
     {
       title: "Avg. Days to Sell",
-      value: Math.round(data.kpis.average_days_to_sell),
+      value: kpiValue((k) => Math.round(k.average_days_to_sell)),
       icon: <Calendar className="h-7 w-7" />,
       gradient: "bg-gradient-warning", 
       trend: { value: -3.2, isPositive: true },
@@ -140,12 +147,12 @@ const Index = () => {
     },
     {
       title: "Avg. Sale Price",
-      value: new Intl.NumberFormat('en-US', { 
+      value: kpiValue((k) => new Intl.NumberFormat('en-US', { 
         style: 'currency', 
         currency: 'USD',
         minimumFractionDigits: 0,
         maximumFractionDigits: 0 
-      }).format(data.kpis.average_sale_price),
+      }).format(k.average_sale_price)),
       icon: <DollarSign className="h-7 w-7" />,
       gradient: "bg-gradient-info",
       trend: { value: 5.7, isPositive: true },
@@ -171,6 +178,7 @@ const Index = () => {
 
         {/* Hero Section with KPI Cards */}
         <section className="space-y-6">
+          <SectionStateBadge state={stateOf('kpis')} />
           {/* KPI Cards Grid */}
           <div className="grid grid-cols-1 md:grid-cols-2 xl:grid-cols-4 gap-6">
             {kpiCards.map((card, index) => (
@@ -186,8 +194,8 @@ const Index = () => {
                   value={card.value}
                   icon={card.icon}
                   gradient={card.gradient}
-                  trend={card.trend}
-                  description={card.description}
+                  trend={kpis ? card.trend : undefined}
+                  description={kpis ? card.description : "Temporarily unavailable"}
                   color={card.color}
                   className="animate-fade-in-up hover:scale-[1.02] transition-all duration-300 ease-apple h-full"
                 />
@@ -205,6 +213,7 @@ const Index = () => {
               inventoryByPriceRange={data.inventory_by_price_range}
               salesByBrand={data.sales_by_brand}
               daysOnLotByPriceRange={data.days_on_lot_by_price_range}
+              sectionState={stateOf}
             />
           </div>
         </section>
@@ -216,6 +225,7 @@ const Index = () => {
               topSellingModels={data.top_selling_models}
               slowMovingInventory={data.slow_moving_inventory}
               recentSales={data.recent_sales}
+              sectionState={stateOf}
             />
           </div>
         </section>
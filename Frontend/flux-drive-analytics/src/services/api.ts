@@ -1,9 +1,11 @@
 import axios, { AxiosInstance } from 'axios';
-import { DashboardData } from '../types/dashboard';
+import { DashboardData, DashboardSection } from '../types/dashboard';
+
+const API_BASE_URL: string = import.meta.env.VITE_API_BASE_URL || '/api';
 
 // Create axios instance with base URL
 const apiClient: AxiosInstance = axios.create({
-  baseURL: import.meta.env.VITE_API_BASE_URL || '/api',
+  baseURL: API_BASE_URL,
   timeout: 10000,
   headers: {
     'Content-Type': 'application/json',
@@ -67,9 +69,38 @@ export const fetchDashboardData = async (): Promise<DashboardData> => {
   }
 };
 
+// Fetch only some dashboard sections (e.g. the ones a snapshot event reports as changed)
+export const fetchDashboardSections = async (sections: DashboardSection[]): Promise<Partial<DashboardData>> => {
+  try {
+    const response = await apiClient.get<Partial<DashboardData>>('/dashboard', {
+      params: { sections: sections.join(',') },
+    });
+    return response.data;
+  } catch (error) {
+    console.error(`Failed to fetch dashboard sections ${sections.join(',')}:`, error);
+    throw new Error('Failed to refresh dashboard sections.');
+  }
+};
+
+// Server-Sent Events stream announcing newly loaded warehouse days (a re-run of a day included)
+export interface SnapshotEvent {
+  inventory_date_key: number | null;
+  inventory_loaded_at: string | null;  // ETL load manifest finished_at (ISO 8601)
+  sales_date_key: number | null;
+  sales_loaded_at: string | null;
+  changed_sections: DashboardSection[];
+}
+
+export const dashboardEventsUrl = (): string => `${API_BASE_URL}/dashboard/events`;
+
+// Same-origin brand logo: redirects to a content-hashed file that is cached forever
+export const brandLogoUrl = (brandName: string): string =>
+  `${API_BASE_URL}/brand/${encodeURIComponent(brandName)}/logo`;
+
 export interface BrandMetrics {
   brand_name: string;
   total_vehicles: number;
+  total_vehicles_relative_error?: number | null; // set when estimated (?approximate=true)
   average_price: number;
   total_sales_30_days: number;
   avg_days_to_sell: number;
@@ -84,6 +115,7 @@ export interface DetailedBrandAnalysis {
   brand_name: string;
   basic_metrics: {
     total_vehicles: number;
+    total_vehicles_relative_error?: number | null;
     average_price: number;
     total_sales_30_days: number;
     total_revenue_30_days: number;
@@ -3,6 +3,7 @@ export interface DashboardKPIs {
   total_sales_today: number;
   average_days_to_sell: number;
   average_sale_price: number;
+  total_active_inventory_relative_error?: number | null; // set when estimated from sketches
 }
 
 export interface DailySalesTrend {
@@ -17,6 +18,9 @@ export interface InventoryByPriceRange {
   percentage: number;
 }
 
+// sales_by_brand ends with this bucket for every brand outside the top 10
+export const OTHER_BRANDS = 'Other';
+
 export interface SalesByBrand {
   brand: string;
   sales_count: number;
@@ -57,17 +61,32 @@ export interface RecentSale {
   days_to_sell: number;
 }
 
+// Every section is optional: a section that failed to load is left out of the response
 export interface DashboardData {
-  kpis: DashboardKPIs;
-  daily_sales_trend: DailySalesTrend[];
-  inventory_by_price_range: InventoryByPriceRange[];
-  sales_by_brand: SalesByBrand[];
-  days_on_lot_by_price_range: DaysOnLotByPriceRange[];
-  top_selling_models: TopSellingModel[];
-  slow_moving_inventory: SlowMovingInventory[];
-  recent_sales: RecentSale[];
+  kpis?: DashboardKPIs;
+  daily_sales_trend?: DailySalesTrend[];
+  inventory_by_price_range?: InventoryByPriceRange[];
+  sales_by_brand?: SalesByBrand[];
+  days_on_lot_by_price_range?: DaysOnLotByPriceRange[];
+  top_selling_models?: TopSellingModel[];
+  slow_moving_inventory?: SlowMovingInventory[];
+  recent_sales?: RecentSale[];
+  // Sections served from a cached previous value, or missing from the response
+  stale_sections?: string[];
+  failed_sections?: string[];
 }
 
+export type DashboardSection = keyof Omit<DashboardData, 'stale_sections' | 'failed_sections'>;
+
+// ok: fresh value; stale: a previous value (cached, or kept after a failed refresh); failed: no value
+export type SectionState = 'ok' | 'stale' | 'failed';
+
+export const sectionState = (data: DashboardData, section: DashboardSection): SectionState => {
+  if (data[section] === undefined) return 'failed';
+  if (data.stale_sections?.includes(section) || data.failed_sections?.includes(section)) return 'stale';
+  return 'ok';
+};
+
 export interface ApiResponse<T> {
   data: T;
   status: string;
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Build the fact_daily_inventory snapshot for one process_date.
+
+Shares the Spark session, dimension broadcast and COPY load path with the
+sales job (see etl_common.py). Every vehicle that was on the lot at some
+point during process_date becomes one row, with days_on_lot, price_range_key,
+new_arrivals and sold_count derived in a single pass over the Iceberg source.
+price_range_key comes from the API's PriceBandClassifier, shipped to the
+executors as a pandas UDF (needs pyarrow on the cluster). The job also stores
+the day's distinct-VIN HyperLogLog sketches (all vehicles and per brand) that
+back the API's approximate counts.
+"""
+from pyspark.sql.functions import *
+from pyspark.sql.types import *
+from pyspark import StorageLevel
+import argparse
+import logging
+from datetime import date, datetime, timezone
+
+from etl_common import (
+    build_spark_session, read_dimension, share_backend_module, load_date_partition,
+    replace_daily_sketches, refresh_brand_views, record_load, read_iceberg_snapshot
+)
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+INVENTORY_FACT_COLUMNS = [
+    "date_key", "vin", "vehicle_key", "price_range_key", "price", "mileage",
+    "status", "active_count", "new_arrivals", "sold_count", "days_on_lot"
+]
+
+def parse_date(s: str) -> date:
+    return date.fromisoformat(s)
+
+def write_inventory_sketches(sketches, postgres_url: str, postgres_user: str, postgres_password: str,
+                             date_key: int, inventory_fact=None, dim_vehicle=None):
+    """Store the day's distinct-VIN sketches, for all vehicles and per brand.
+
+    Executors only emit packed register updates; they are reduced to at most
+    one row per (brand, status, register) before reaching the driver.
+    """
+    registers = {}
+    for dimension in (sketches.INVENTORY_VINS, sketches.ACTIVE_VINS):
+        registers[(dimension, "")] = sketches.HyperLogLog()
+
+    if inventory_fact is not None:
+        hll_update = sketches.HyperLogLog.pandas_udf()
+        updates = (inventory_fact
+                   .join(dim_vehicle.select("vehicle_key", "brand"), "vehicle_key", "left")
+                   .select(col("brand"), col("status"), hll_update(col("vin")).alias("packed"))
+                   .select(col("brand"), col("status"),
+                           shiftright(col("packed"), 8).alias("register"),
+                           col("packed").bitwiseAND(255).alias("rank"))
+                   .groupBy("brand", "status", "register")
+                   .agg(max("rank").alias("rank"))
+                   .collect())
+        pending = {}
+        for row in updates:
+            dimensions = [sketches.INVENTORY_VINS]
+            if row["status"] == "active":
+                dimensions.append(sketches.ACTIVE_VINS)
+            for dimension in dimensions:
+                for key in [(dimension, "")] + ([(dimension, row["brand"])] if row["brand"] else []):
+                    pending.setdefault(key, []).append((row["register"], row["rank"]))
+        for key, register_updates in pending.items():
+            index, rank = zip(*register_updates)
+            registers.setdefault(key, sketches.HyperLogLog()).update_registers(index, rank)
+
+    replace_daily_sketches(
+        postgres_url, postgres_user, postgres_password, date_key, sketches.HYPERLOGLOG,
+        [sketches.INVENTORY_VINS, sketches.ACTIVE_VINS],
+        [(dimension, value, sketch.to_bytes()) for (dimension, value), sketch in registers.items()]
+    )
+
+def main(postgres_url: str, postgres_user: str, postgres_password: str, iceberg_table: str, process_date: date):
+    started_at = datetime.now(timezone.utc)
+    spark = build_spark_session("BuildDailyInventoryFact")
+
+    try:
+        # Read dimension tables (broadcast, they are small)
+        dim_vehicle = read_dimension(spark, postgres_url, postgres_user, postgres_password, "dim_vehicle")
+        dim_price_range = read_dimension(spark, postgres_url, postgres_user, postgres_password, "dim_price_range")
+
+        # Price bands are assigned with a binary search over the band boundaries
+        # (pandas UDF) instead of a non-equi range join
+        price_bands = share_backend_module(spark, "price_bands")
+        sketches = share_backend_module(spark, "sketches")
+        classifier = price_bands.PriceBandClassifier.from_rows(dim_price_range.collect())
+        price_range_key = classifier.pandas_udf()
+        logger.info(f"Loaded {len(classifier)} price bands")
+
+        date_key = int(process_date.strftime("%Y%m%d"))
+
+        # Vehicles on the lot during process_date: added on/before it and not sold before it,
+        # from the snapshot recorded in the load manifest
+        source, snapshot_id = read_iceberg_snapshot(spark, iceberg_table)
+        on_lot = (source
+                  .filter(
+                      (col("vin").isNotNull()) &
+                      (col("added_date").isNotNull()) &
+                      (col("added_date") <= lit(process_date)) &
+                      (col("sold_date").isNull() | (col("sold_date") >= lit(process_date)))
+                  ))
+
+        dim_vehicle_renamed = dim_vehicle.select(
+            col("manufacturer").alias("vehicle_manufacturer"),
+            col("model").alias("vehicle_model"),
+            col("brand").alias("vehicle_brand"),
+            col("color").alias("vehicle_color"),
+            col("vehicle_key")
+        )
+
+        sold_today = col("sold_date").isNotNull() & (col("sold_date") == lit(process_date))
+
+        inventory_fact = (on_lot
+                          .join(
+                              dim_vehicle_renamed,
+                              (col("manufacturer") == col("vehicle_manufacturer")) &
+                              (col("model") == col("vehicle_model")) &
+                              (col("brand") == col("vehicle_brand")) &
+                              (col("color") == col("vehicle_color")),
+                              "left"
+                          )
+                          .select(
+                              lit(date_key).alias("date_key"),
+                              col("vin"),
+                              col("vehicle_key"),
+                              price_range_key(col("price").cast("double")).alias("price_range_key"),
+                              col("price"),
+                              col("mileage"),
+                              when(sold_today, lit("sold")).otherwise(lit("active")).alias("status"),
+                              when(sold_today, 0).otherwise(1).alias("active_count"),
+                              when(col("added_date") == lit(process_date), 1).otherwise(0).alias("new_arrivals"),
+                              when(sold_today, 1).otherwise(0).alias("sold_count"),
+                              datediff(lit(process_date), col("added_date")).alias("days_on_lot")
+                          )
+                          .dropDuplicates(["date_key", "vin"])
+                          .persist(StorageLevel.MEMORY_AND_DISK))
+
+        # One aggregate over the persisted snapshot instead of a count() per check
+        summary = inventory_fact.agg(
+            count(lit(1)).alias("rows"),
+            sum("active_count").alias("active"),
+            sum("new_arrivals").alias("new_arrivals"),
+            sum("sold_count").alias("sold"),
+            sum(when(col("vehicle_key").isNull(), 1).otherwise(0)).alias("unmatched_vehicles"),
+            sum(when(col("price_range_key").isNull(), 1).otherwise(0)).alias("unmatched_price_ranges")
+        ).first()
+
+        logger.info(
+            f"Inventory snapshot for {process_date}: rows={summary['rows']}, active={summary['active']}, "
+            f"new_arrivals={summary['new_arrivals']}, sold={summary['sold']}, "
+            f"unmatched vehicles={summary['unmatched_vehicles']}, unmatched price ranges={summary['unmatched_price_ranges']}"
+        )
+
+        # Per-day counts for etl_load_manifest (the API's diagnostics read these instead of the fact table)
+        load_details = {name: summary[name] or 0 for name in
+                        ["active", "new_arrivals", "sold", "unmatched_vehicles", "unmatched_price_ranges"]}
+        quality_checks = {name: load_details[name] for name in ["unmatched_vehicles", "unmatched_price_ranges"]}
+
+        if not summary["rows"]:
+            logger.info(f"No inventory found for {process_date}")
+            write_inventory_sketches(sketches, postgres_url, postgres_user, postgres_password, date_key)
+            record_load(postgres_url, postgres_user, postgres_password, "fact_daily_inventory", date_key, 0,
+                        started_at, load_details, snapshot_id, quality_checks)
+            return
+
+        # Idempotency: COPY into staging, then replace this process_date in one transaction
+        load_date_partition(inventory_fact, postgres_url, postgres_user, postgres_password,
+                            "fact_daily_inventory", "date_key", date_key, INVENTORY_FACT_COLUMNS)
+
+        logger.info(f"Successfully loaded fact_daily_inventory with {summary['rows']} records for {process_date}")
+
+        write_inventory_sketches(sketches, postgres_url, postgres_user, postgres_password, date_key,
+                                 inventory_fact, dim_vehicle)
+
+        record_load(postgres_url, postgres_user, postgres_password, "fact_daily_inventory", date_key,
+                    summary["rows"], started_at, load_details, snapshot_id, quality_checks)
+
+        refresh_brand_views(postgres_url, postgres_user, postgres_password)
+
+    finally:
+        spark.stop()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build Daily Inventory Fact")
+    parser.add_argument("--postgres_url", required=True)
+    parser.add_argument("--postgres_user", required=True)
+    parser.add_argument("--postgres_password", required=True)
+    parser.add_argument("--iceberg_table", required=True)
+    parser.add_argument("--process_date", type=parse_date, required=True)
+    args = parser.parse_args()
+
+    main(args.postgres_url, args.postgres_user, args.postgres_password, args.iceberg_table, args.process_date)
@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+"""
+Shared building blocks for the warehouse Spark jobs.
+
+Both fact builders (fix_sales_script.py and build_inventory_fact.py) use the
+same Spark session setup, read the Postgres dimensions once and broadcast
+them, and bulk load their output with COPY instead of JDBC batch inserts.
+Executors COPY into a staging table of the run; the driver then swaps the
+day in with one transaction, so the API never sees a partially loaded day.
+"""
+from pyspark.sql import SparkSession
+from pyspark.sql.functions import broadcast, col
+from datetime import datetime, timezone
+import csv
+import io
+import logging
+import os
+import sys
+import uuid
+from urllib.parse import urlparse
+import psycopg2
+
+logger = logging.getLogger(__name__)
+
+# Dependency-free modules of the API package that the jobs reuse (price bands, sketches)
+BACKEND_APP_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "Backend", "analytics_dashboard", "app")
+
+SPARK_MASTER = "spark://spark-master:7077"
+
+SPARK_PACKAGES = (
+    "org.apache.hadoop:hadoop-aws:3.3.4," +
+    "com.amazonaws:aws-java-sdk-bundle:1.12.367," +
+    "org.apache.iceberg:iceberg-spark-runtime-3.5_2.12:1.4.3," +
+    "org.postgresql:postgresql:42.6.0"
+)
+
+def build_spark_session(app_name: str) -> SparkSession:
+    """Create the Spark session with the MinIO/Iceberg catalog configuration"""
+    return (
+        SparkSession.builder
+        .appName(app_name)
+        .master(SPARK_MASTER)
+        .config("spark.jars.packages", SPARK_PACKAGES)
+        .config("spark.hadoop.fs.s3a.endpoint", "http://minio:9000")
+        .config("spark.hadoop.fs.s3a.access.key", "AV77UPTYT1L579RBQE3I")
+        .config("spark.hadoop.fs.s3a.secret.key", "e8IIzbl3rCXP1DwK+WfkHgfCgjASdfIiY6KRWnuM")
+        .config("spark.hadoop.fs.s3a.path.style.access", "true")
+        .config("spark.sql.catalog.carvana", "org.apache.iceberg.spark.SparkCatalog")
+        .config("spark.sql.catalog.carvana.type", "hadoop")
+        .config("spark.sql.catalog.carvana.warehouse", "s3a://carvana-warehouse")
+        .getOrCreate()
+    )
+
+def backend_module(module_name: str):
+    """Import a standalone module from the API package on the driver"""
+    if BACKEND_APP_DIR not in sys.path:
+        sys.path.insert(0, BACKEND_APP_DIR)
+    return __import__(module_name)
+
+def share_backend_module(spark: SparkSession, module_name: str):
+    """Import a standalone module from the API package and ship it to the executors"""
+    module = backend_module(module_name)
+    spark.sparkContext.addPyFile(os.path.join(BACKEND_APP_DIR, f"{module_name}.py"))
+    return module
+
+def read_dimension(spark: SparkSession, postgres_url: str, postgres_user: str, postgres_password: str, table: str):
+    """Read a dimension table over JDBC and mark it for broadcast joins.
+
+    Dimensions are small (a few thousand rows at most), so broadcasting them
+    avoids shuffling the fact side of every join.
+    """
+    dim = (spark.read
+           .format("jdbc")
+           .option("url", postgres_url)
+           .option("dbtable", table)
+           .option("user", postgres_user)
+           .option("password", postgres_password)
+           .option("driver", "org.postgresql.Driver")
+           .load())
+    return broadcast(dim.cache())
+
+def read_iceberg_snapshot(spark: SparkSession, iceberg_table: str):
+    """Read the Iceberg table pinned to its current snapshot.
+
+    Returns (DataFrame, snapshot id). Every action of the job sees the same
+    snapshot, and the id recorded in etl_load_manifest is the one the load
+    was built from. The id is None for a table without snapshots.
+    """
+    current = (spark.read.format("iceberg")
+               .load(f"{iceberg_table}.history")
+               .filter(col("is_current_ancestor"))
+               .orderBy(col("made_current_at").desc())
+               .select("snapshot_id")
+               .first())
+    reader = spark.read.format("iceberg")
+    if current is None:
+        return reader.load(iceberg_table), None
+    snapshot_id = current["snapshot_id"]
+    logger.info(f"Reading {iceberg_table} at snapshot {snapshot_id}")
+    return reader.option("snapshot-id", snapshot_id).load(iceberg_table), snapshot_id
+
+def connect_postgres(postgres_url: str, postgres_user: str, postgres_password: str):
+    """Open a psycopg2 connection from a JDBC style postgres URL"""
+    pg_url = urlparse(postgres_url.replace('jdbc:', ''))
+    return psycopg2.connect(
+        dbname=pg_url.path[1:],
+        user=postgres_user,
+        password=postgres_password,
+        host=pg_url.hostname,
+        port=pg_url.port
+    )
+
+def delete_date_partition(postgres_url: str, postgres_user: str, postgres_password: str,
+                          table: str, date_column: str, date_key: int) -> int:
+    """Idempotency: delete existing rows for one date_key before reloading it"""
+    conn = connect_postgres(postgres_url, postgres_user, postgres_password)
+    try:
+        cur = conn.cursor()
+        cur.execute(f"DELETE FROM {table} WHERE {date_column} = %s", (date_key,))
+        deleted_count = cur.rowcount
+        conn.commit()
+        cur.close()
+    finally:
+        conn.close()
+    logger.info(f"Deleted {deleted_count} existing records from {table} for {date_column} {date_key}")
+    return deleted_count
+
+# Staging column holding the Spark partition a row came from
+STAGING_PARTITION_COLUMN = "spark_partition_id"
+
+def _copy_to_staging(df, postgres_url: str, postgres_user: str, postgres_password: str,
+                     staging_table: str, columns: list) -> None:
+    """COPY every Spark partition into the staging table, tagged with its partition id.
+
+    A retried or speculative attempt of a partition replaces the rows of the
+    earlier attempt instead of adding to them: each attempt deletes its
+    partition's rows and COPYs in one transaction, under an advisory lock on
+    (staging table, partition) so concurrent attempts do not interleave.
+    """
+    staging_columns = columns + [STAGING_PARTITION_COLUMN]
+    copy_sql = f"COPY {staging_table} ({', '.join(staging_columns)}) FROM STDIN WITH (FORMAT csv, NULL '')"
+
+    def _copy_partition(rows):
+        from pyspark import TaskContext
+
+        partition_id = TaskContext.get().partitionId()
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for row in rows:
+            writer.writerow(["" if row[c] is None else row[c] for c in columns] + [partition_id])
+        buffer.seek(0)
+        conn = connect_postgres(postgres_url, postgres_user, postgres_password)
+        try:
+            cur = conn.cursor()
+            cur.execute("SELECT pg_advisory_xact_lock(hashtext(%s), %s)", (staging_table, partition_id))
+            cur.execute(f"DELETE FROM {staging_table} WHERE {STAGING_PARTITION_COLUMN} = %s", (partition_id,))
+            cur.copy_expert(copy_sql, buffer)
+            conn.commit()
+            cur.close()
+        finally:
+            conn.close()
+
+    df.select(*columns).foreachPartition(_copy_partition)
+
+def load_date_partition(df, postgres_url: str, postgres_user: str, postgres_password: str,
+                        table: str, date_column: str, date_key: int, columns: list) -> int:
+    """Replace one date_key of a fact table with the DataFrame's rows; returns the rows inserted.
+
+    The executors COPY into an unlogged staging table created for this run.
+    The driver then deletes the day and inserts it from staging in a single
+    transaction: readers see the old day or the new one, a failed run leaves
+    the old day in place, and re-running the job replaces the day again.
+    """
+    staging_table = f"{table}_load_{date_key}_{uuid.uuid4().hex[:8]}"
+    conn = connect_postgres(postgres_url, postgres_user, postgres_password)
+    try:
+        cur = conn.cursor()
+        cur.execute(f"CREATE UNLOGGED TABLE {staging_table} (LIKE {table} INCLUDING DEFAULTS, "
+                    f"{STAGING_PARTITION_COLUMN} INTEGER NOT NULL)")
+        conn.commit()
+        try:
+            _copy_to_staging(df, postgres_url, postgres_user, postgres_password, staging_table, columns)
+
+            column_list = ", ".join(columns)
+            cur.execute(f"DELETE FROM {table} WHERE {date_column} = %s", (date_key,))
+            deleted_count = cur.rowcount
+            cur.execute(f"INSERT INTO {table} ({column_list}) SELECT {column_list} FROM {staging_table}")
+            inserted_count = cur.rowcount
+            cur.execute(f"DROP TABLE {staging_table}")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            cur.execute(f"DROP TABLE IF EXISTS {staging_table}")
+            conn.commit()
+            raise
+        cur.close()
+    finally:
+        conn.close()
+    logger.info(f"Replaced {deleted_count} rows of {table} for {date_column} {date_key} with {inserted_count}")
+    return inserted_count
+
+DAILY_SKETCHES_DDL = """
+CREATE TABLE IF NOT EXISTS daily_sketches (
+    date_key INTEGER NOT NULL REFERENCES dim_date (date_key),
+    sketch_type VARCHAR(20) NOT NULL,
+    dimension VARCHAR(50) NOT NULL,
+    dimension_value VARCHAR(100) NOT NULL DEFAULT '',
+    payload BYTEA NOT NULL,
+    PRIMARY KEY (date_key, sketch_type, dimension, dimension_value)
+)
+"""
+
+def replace_daily_sketches(postgres_url: str, postgres_user: str, postgres_password: str,
+                           date_key: int, sketch_type: str, dimensions: list, rows: list) -> None:
+    """Replace one day's summaries of the given dimensions.
+
+    rows are (dimension, dimension_value, payload bytes); the delete and the
+    inserts run in one transaction so readers never see a partial day.
+    """
+    conn = connect_postgres(postgres_url, postgres_user, postgres_password)
+    try:
+        cur = conn.cursor()
+        cur.execute(DAILY_SKETCHES_DDL)
+        cur.execute(
+            "DELETE FROM daily_sketches WHERE date_key = %s AND sketch_type = %s AND dimension = ANY(%s)",
+            (date_key, sketch_type, list(dimensions))
+        )
+        cur.executemany(
+            "INSERT INTO daily_sketches (date_key, sketch_type, dimension, dimension_value, payload) "
+            "VALUES (%s, %s, %s, %s, %s)",
+            [(date_key, sketch_type, dimension, value, psycopg2.Binary(payload)) for dimension, value, payload in rows]
+        )
+        conn.commit()
+        cur.close()
+    finally:
+        conn.close()
+    logger.info(f"Stored {len(rows)} {sketch_type} sketches for date_key {date_key}")
+
+def record_load(postgres_url: str, postgres_user: str, postgres_password: str, table: str, date_key: int,
+                row_count: int, started_at: datetime, details: dict = None, iceberg_snapshot_id: int = None,
+                quality_checks: dict = None) -> None:
+    """Write the day's etl_load_manifest row (app/load_manifest.py), which the API reads loaded days from"""
+    load_manifest = backend_module("load_manifest")
+    conn = connect_postgres(postgres_url, postgres_user, postgres_password)
+    try:
+        load_manifest.record_load(conn, table, date_key, row_count, started_at, datetime.now(timezone.utc), details,
+                                  iceberg_snapshot_id, quality_checks)
+    finally:
+        conn.close()
+
+def refresh_brand_views(postgres_url: str, postgres_user: str, postgres_password: str) -> None:
+    """Post-load hook: refresh the API's per-brand materialized views (app/brand_views.py).
+
+    The load itself has already committed, so a failed refresh is logged and
+    the API keeps answering brand drill-downs from live queries until the next one.
+    """
+    brand_views = backend_module("brand_views")
+
+    conn = connect_postgres(postgres_url, postgres_user, postgres_password)
+    try:
+        brand_views.refresh_brand_views(conn)
+    except Exception as e:
+        logger.error(f"Brand view refresh failed, the API serves live queries until the next one: {str(e)}")
+    finally:
+        conn.close()
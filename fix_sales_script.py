@@ -1,63 +1,76 @@
 #!/usr/bin/env python3
-from pyspark.sql import SparkSession
 from pyspark.sql.functions import *
 from pyspark.sql.types import *
 import argparse
 import logging
-from datetime import date
-import psycopg2
-from urllib.parse import urlparse
+from datetime import date, datetime, timezone
+
+from etl_common import (
+    build_spark_session, read_dimension, delete_date_partition, load_date_partition,
+    share_backend_module, replace_daily_sketches, refresh_brand_views, record_load, read_iceberg_snapshot
+)
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+SALES_FACT_COLUMNS = [
+    "sale_date_key", "vehicle_key", "vin", "sale_price", "sale_mileage",
+    "days_to_sell", "added_date", "sold_date"
+]
+
 def parse_date(s: str) -> date:
     return date.fromisoformat(s)
 
-def main(postgres_url: str, postgres_user: str, postgres_password: str, iceberg_table: str, process_date: date):
-    spark = (
-        SparkSession.builder
-        .appName("BuildSalesEventsFact")
-        .master("spark://spark-master:7077")
-        .config("spark.jars.packages",
-            "org.apache.hadoop:hadoop-aws:3.3.4," +
-            "com.amazonaws:aws-java-sdk-bundle:1.12.367," +
-            "org.apache.iceberg:iceberg-spark-runtime-3.5_2.12:1.4.3," +
-            "org.postgresql:postgresql:42.6.0"
-        )
-        .config("spark.hadoop.fs.s3a.endpoint", "http://minio:9000")
-        .config("spark.hadoop.fs.s3a.access.key", "AV77UPTYT1L579RBQE3I")
-        .config("spark.hadoop.fs.s3a.secret.key", "e8IIzbl3rCXP1DwK+WfkHgfCgjASdfIiY6KRWnuM")
-        .config("spark.hadoop.fs.s3a.path.style.access", "true")
-        .config("spark.sql.catalog.carvana", "org.apache.iceberg.spark.SparkCatalog")
-        .config("spark.sql.catalog.carvana.type", "hadoop")
-        .config("spark.sql.catalog.carvana.warehouse", "s3a://carvana-warehouse")
-        .getOrCreate()
+def write_sales_sketches(sketches, postgres_url: str, postgres_user: str, postgres_password: str,
+                         date_key: int, sales_fact=None, dim_vehicle=None):
+    """Store the day's heavy-hitter summaries (brands, models) used for top-N rankings.
+
+    Days without sales get empty summaries so the API can tell a quiet day
+    from a day that has not been loaded.
+    """
+    brand_rows, model_rows = [], []
+    if sales_fact is not None:
+        # Inner join like the API's exact ranking: sales without a vehicle_key are not ranked
+        sales = sales_fact.join(dim_vehicle.select("vehicle_key", "manufacturer", "model", "brand"), "vehicle_key")
+        brand_rows = [
+            (row["brand"], row["sales_count"], row["price_sum"])
+            for row in sales.groupBy("brand").agg(
+                count("vin").alias("sales_count"), sum("sale_price").alias("price_sum")
+            ).collect()
+        ]
+        model_rows = [
+            ((row["manufacturer"], row["model"], row["brand"]), row["sales_count"], row["price_sum"], row["days_sum"])
+            for row in sales.groupBy("manufacturer", "model", "brand").agg(
+                count("vin").alias("sales_count"), sum("sale_price").alias("price_sum"),
+                sum("days_to_sell").alias("days_sum")
+            ).collect()
+        ]
+
+    replace_daily_sketches(
+        postgres_url, postgres_user, postgres_password, date_key, sketches.SPACE_SAVING,
+        [sketches.SALES_BY_BRAND, sketches.SALES_BY_MODEL],
+        [
+            (sketches.SALES_BY_BRAND, "", sketches.SpaceSaving.from_counts(brand_rows, n_values=1).to_bytes()),
+            (sketches.SALES_BY_MODEL, "", sketches.SpaceSaving.from_counts(model_rows, n_values=2).to_bytes()),
+        ]
     )
 
+def main(postgres_url: str, postgres_user: str, postgres_password: str, iceberg_table: str, process_date: date):
+    started_at = datetime.now(timezone.utc)
+    spark = build_spark_session("BuildSalesEventsFact")
+
     try:
-        # Read dimension tables
-        dim_date = (spark.read
-                   .format("jdbc")
-                   .option("url", postgres_url)
-                   .option("dbtable", "dim_date")
-                   .option("user", postgres_user)
-                   .option("password", postgres_password)
-                   .option("driver", "org.postgresql.Driver")
-                   .load())
-
-        dim_vehicle = (spark.read
-                      .format("jdbc")
-                      .option("url", postgres_url)
-                      .option("dbtable", "dim_vehicle")
-                      .option("user", postgres_user)
-                      .option("password", postgres_password)
-                      .option("driver", "org.postgresql.Driver")
-                      .load())
-
-        # Read only sold cars for the current date with better filtering
-        sold_cars = (spark.read.format("iceberg")
-                    .load(iceberg_table)
+        # Read dimension tables (broadcast, they are small)
+        dim_vehicle = read_dimension(spark, postgres_url, postgres_user, postgres_password, "dim_vehicle")
+        sketches = share_backend_module(spark, "sketches")
+
+        # Get date key for the process date
+        date_key = int(process_date.strftime("%Y%m%d"))
+
+        # Read only sold cars for the current date with better filtering,
+        # from the snapshot recorded in the load manifest
+        source, snapshot_id = read_iceberg_snapshot(spark, iceberg_table)
+        sold_cars = (source
                     .filter(
                         (col("sold_date") == lit(process_date)) & 
                         (col("status") == "sold") &
@@ -66,15 +79,18 @@ def main(postgres_url: str, postgres_user: str, postgres_password: str, iceberg_
                         (col("sold_date").isNotNull())  # Ensure sold_date is not null
                     ))
 
-        # Add data quality checks
-        logger.info(f"Found {sold_cars.count()} sold cars for {process_date}")
-        
-        # Check for data quality issues
-        null_vin_count = sold_cars.filter(col("vin").isNull()).count()
-        null_price_count = sold_cars.filter(col("price").isNull()).count()
-        future_date_count = sold_cars.filter(col("sold_date") > lit(date.today())).count()
-        
-        logger.info(f"Data quality check - Null VINs: {null_vin_count}, Null prices: {null_price_count}, Future dates: {future_date_count}")
+        # Data quality checks in one aggregate instead of a count() per check
+        checks = sold_cars.agg(
+            count(lit(1)).alias("sold_cars"),
+            sum(when(col("vin").isNull(), 1).otherwise(0)).alias("null_vins"),
+            sum(when(col("price").isNull(), 1).otherwise(0)).alias("null_prices"),
+            sum(when(col("sold_date") > lit(date.today()), 1).otherwise(0)).alias("future_dates")
+        ).first()
+        quality_checks = {name: checks[name] or 0 for name in ["sold_cars", "null_vins", "null_prices", "future_dates"]}
+
+        logger.info(f"Found {quality_checks['sold_cars']} sold cars for {process_date}")
+        logger.info(f"Data quality check - Null VINs: {quality_checks['null_vins']}, "
+                    f"Null prices: {quality_checks['null_prices']}, Future dates: {quality_checks['future_dates']}")
         
         # Filter out problematic records
         clean_sold_cars = sold_cars.filter(
@@ -84,35 +100,16 @@ def main(postgres_url: str, postgres_user: str, postgres_password: str, iceberg_
             (col("sold_date") <= lit(date.today()))  # Don't include future dates
         )
         
-        logger.info(f"After cleaning: {clean_sold_cars.count()} valid sold cars")
+        quality_checks["valid_sold_cars"] = clean_sold_cars.count()
+        logger.info(f"After cleaning: {quality_checks['valid_sold_cars']} valid sold cars")
 
-        if clean_sold_cars.count() == 0:
+        if quality_checks["valid_sold_cars"] == 0:
             logger.info(f"No valid sales events found for {process_date}")
+            write_sales_sketches(sketches, postgres_url, postgres_user, postgres_password, date_key)
+            record_load(postgres_url, postgres_user, postgres_password, "fact_sales_events", date_key, 0, started_at,
+                        iceberg_snapshot_id=snapshot_id, quality_checks=quality_checks)
             return
 
-        # Get date key for the process date
-        date_key = int(process_date.strftime("%Y%m%d"))
-
-        # Idempotency: Delete existing rows for this process_date
-        pg_url = urlparse(postgres_url.replace('jdbc:', ''))
-        conn = psycopg2.connect(
-            dbname=pg_url.path[1:],
-            user=postgres_user,
-            password=postgres_password,
-            host=pg_url.hostname,
-            port=pg_url.port
-        )
-        cur = conn.cursor()
-        
-        # Delete existing data for this date
-        cur.execute("DELETE FROM fact_sales_events WHERE sale_date_key = %s", (date_key,))
-        deleted_count = cur.rowcount
-        logger.info(f"Deleted {deleted_count} existing records for date_key {date_key}")
-        
-        conn.commit()
-        cur.close()
-        conn.close()
-
         # Rename columns in dim_vehicle to avoid collision
         dim_vehicle_renamed = dim_vehicle.select(
             col("manufacturer").alias("vehicle_manufacturer"),
@@ -146,26 +143,39 @@ def main(postgres_url: str, postgres_user: str, postgres_password: str, iceberg_
                      .dropDuplicates(["sale_date_key", "vin"]))  # Remove duplicates
 
         # Final count check
-        final_count = sales_fact.count()
+        final = sales_fact.agg(
+            count(lit(1)).alias("rows"),
+            sum(when(col("vehicle_key").isNull(), 1).otherwise(0)).alias("unmatched_vehicles")
+        ).first()
+        final_count = final["rows"]
+        quality_checks["duplicates_dropped"] = quality_checks["valid_sold_cars"] - final_count
+        quality_checks["unmatched_vehicles"] = final["unmatched_vehicles"] or 0
         logger.info(f"Final sales fact count: {final_count}")
 
         if final_count == 0:
             logger.info("No valid sales data to insert")
+            # Idempotency: a re-run that now finds no sales clears the day
+            delete_date_partition(postgres_url, postgres_user, postgres_password,
+                                  "fact_sales_events", "sale_date_key", date_key)
+            write_sales_sketches(sketches, postgres_url, postgres_user, postgres_password, date_key)
+            record_load(postgres_url, postgres_user, postgres_password, "fact_sales_events", date_key, 0, started_at,
+                        iceberg_snapshot_id=snapshot_id, quality_checks=quality_checks)
             return
 
-        # Write to PostgreSQL using append mode
-        (sales_fact.write
-         .format("jdbc")
-         .option("url", postgres_url)
-         .option("dbtable", "fact_sales_events")
-         .option("user", postgres_user)
-         .option("password", postgres_password)
-         .option("driver", "org.postgresql.Driver")
-         .mode("append")
-         .save())
+        # Idempotency: COPY into staging, then replace this process_date in one transaction
+        load_date_partition(sales_fact, postgres_url, postgres_user, postgres_password,
+                            "fact_sales_events", "sale_date_key", date_key, SALES_FACT_COLUMNS)
 
         logger.info(f"Successfully loaded fact_sales_events with {final_count} records for {process_date}")
 
+        write_sales_sketches(sketches, postgres_url, postgres_user, postgres_password, date_key,
+                             sales_fact, dim_vehicle)
+
+        record_load(postgres_url, postgres_user, postgres_password, "fact_sales_events", date_key,
+                    final_count, started_at, iceberg_snapshot_id=snapshot_id, quality_checks=quality_checks)
+
+        refresh_brand_views(postgres_url, postgres_user, postgres_password)
+
     finally:
         spark.stop()
 
@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+"""
+Concurrent brand logo URL checker shared by url_checker.py, test_cdn_urls.py
+and test_alternative_urls.py.
+
+All requests go through one httpx.AsyncClient, so connections to a host are
+reused instead of opened per URL. Politeness is enforced per host rather than
+with fixed sleeps:
+- at most `per_host` requests to a host are in flight at once;
+- a token bucket allows `rate` requests per second to a host, with bursts of
+  up to `burst`.
+
+Each URL is probed with HEAD first. If the server does not answer HEAD
+properly (405/501, another error status, a network error or no content type),
+the URL is fetched with GET. A host that answers HEAD with 405/501 only gets
+GETs from then on.
+
+With a ResultsStore (a JSON file keyed by URL) runs are incremental:
+- a URL that answered 200 less than max_age ago is not requested at all;
+- a stale 200 is revalidated with If-None-Match / If-Modified-Since from its
+  stored ETag / Last-Modified, so an unchanged logo costs a bodiless 304;
+- a URL that failed last time is probed in full again.
+
+Needs httpx (pip install httpx).
+
+Usage:
+    python logo_checker.py https://cdn.worldvectorlogo.com/logos/ford-1.svg ...
+"""
+from typing import Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlparse
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+
+import httpx
+
+USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+)
+
+# HEAD answers that settle a URL without a GET: success, redirects already followed, or gone
+HEAD_FINAL_STATUSES = {404, 410}
+# HEAD answers meaning the server does not implement HEAD at all
+HEAD_UNSUPPORTED_STATUSES = {405, 501}
+
+# Stored 200s younger than this are trusted without a request
+DEFAULT_MAX_AGE_SECONDS = 12 * 3600
+
+# Store the root logo scripts share, so a URL checked by one is not re-probed by another
+DEFAULT_STORE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "logo_check_store.json")
+
+class ResultsStore:
+    """Last result per URL, with its ETag / Last-Modified, persisted as JSON"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.entries: Dict[str, dict] = {}
+        if os.path.exists(path):
+            with open(path) as f:
+                self.entries = json.load(f).get("entries", {})
+
+    def get(self, url: str) -> Optional[dict]:
+        return self.entries.get(url)
+
+    def put(self, result: dict) -> None:
+        self.entries[result["url"]] = {k: v for k, v in result.items() if k not in ("brand", "from_store", "not_modified")}
+
+    @staticmethod
+    def is_ok(entry: Optional[dict]) -> bool:
+        return entry is not None and entry.get("status_code") == 200
+
+    def is_fresh(self, entry: Optional[dict], max_age: float) -> bool:
+        """A stored 200 recent enough to reuse without asking the server"""
+        return self.is_ok(entry) and time.time() - entry.get("checked_at", 0) < max_age
+
+    def save(self) -> None:
+        """Write to a temp file next to the store, then rename it over the old one"""
+        directory = os.path.dirname(os.path.abspath(self.path))
+        handle, staging = tempfile.mkstemp(prefix=".logo-store-", dir=directory)
+        try:
+            with os.fdopen(handle, "w") as f:
+                json.dump({"entries": self.entries}, f, indent=2, sort_keys=True)
+            os.replace(staging, self.path)
+        except Exception:
+            if os.path.exists(staging):
+                os.remove(staging)
+            raise
+
+class TokenBucket:
+    """Allows `rate` acquisitions per second with bursts of up to `burst` (rate <= 0: unlimited)"""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        if self.rate <= 0:
+            return
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+class LogoChecker:
+    """Checks URLs concurrently over a shared connection pool; use as an async context manager"""
+
+    def __init__(self, per_host: int = 8, rate: float = 50.0, burst: int = 20,
+                 timeout: float = 10.0, max_connections: int = 64):
+        self.per_host = per_host
+        self.rate = rate
+        self.burst = burst
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self._client: Optional[httpx.AsyncClient] = None
+        self._hosts: Dict[str, Tuple[asyncio.Semaphore, TokenBucket]] = {}
+        self._no_head = set()  # hosts that answered HEAD with 405/501
+
+    async def __aenter__(self) -> "LogoChecker":
+        self._client = httpx.AsyncClient(
+            headers={"User-Agent": USER_AGENT},
+            timeout=self.timeout,
+            follow_redirects=True,
+            limits=httpx.Limits(max_connections=self.max_connections,
+                                max_keepalive_connections=self.max_connections),
+        )
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self._client.aclose()
+        self._client = None
+
+    def _host(self, url: str) -> Tuple[asyncio.Semaphore, TokenBucket]:
+        host = urlparse(url).netloc.lower()
+        if host not in self._hosts:
+            self._hosts[host] = (asyncio.Semaphore(self.per_host), TokenBucket(self.rate, self.burst))
+        return self._hosts[host]
+
+    async def _request(self, method: str, url: str, headers: Dict[str, str]) -> Optional[httpx.Response]:
+        """Send once the host has a free slot and a token; None for a HEAD the host has since rejected"""
+        semaphore, bucket = self._host(url)
+        async with semaphore:
+            if method == "HEAD" and urlparse(url).netloc.lower() in self._no_head:
+                return None
+            await bucket.acquire()
+            return await self._client.request(method, url, headers=headers)
+
+    async def fetch(self, url: str) -> httpx.Response:
+        """GET a URL under the same per-host limits (e.g. to download a verified logo)"""
+        return await self._request("GET", url, {})
+
+    async def check(self, url: str, brand: Optional[str] = None, previous: Optional[dict] = None) -> dict:
+        """
+        Status, content type and size of one URL (status_code 'ERROR' on failure).
+        With a previous 200 carrying validators the request is conditional, and a
+        304 returns the previous result marked not_modified.
+        """
+        result = {"brand": brand, "url": url}
+        headers = {}
+        if ResultsStore.is_ok(previous):
+            if previous.get("etag"):
+                headers["If-None-Match"] = previous["etag"]
+            if previous.get("last_modified"):
+                headers["If-Modified-Since"] = previous["last_modified"]
+
+        host = urlparse(url).netloc.lower()
+        response = None
+        if host not in self._no_head:
+            try:
+                response = await self._request("HEAD", url, headers)
+                if response is not None and response.status_code in HEAD_UNSUPPORTED_STATUSES:
+                    self._no_head.add(host)
+            except httpx.HTTPError:
+                pass  # some servers drop HEAD; GET decides
+
+        method = "HEAD"
+        if response is None or not self._head_is_final(response):
+            method = "GET"
+            try:
+                response = await self._request("GET", url, headers)
+            except httpx.HTTPError as e:
+                result.update({"status_code": "ERROR", "error": str(e) or type(e).__name__,
+                               "method": method, "is_image": False, "is_svg": False,
+                               "checked_at": time.time()})
+                return result
+
+        if response.status_code == 304 and headers:
+            result.update({k: v for k, v in previous.items() if k != "url"})
+            result.update({"brand": brand, "method": method, "not_modified": True, "checked_at": time.time()})
+            return result
+
+        content_type = response.headers.get("content-type", "")
+        if method == "GET":
+            content_length = len(response.content)
+        else:
+            content_length = int(response.headers.get("content-length", 0) or 0)
+        result.update({
+            "status_code": response.status_code,
+            "final_url": str(response.url),
+            "content_type": content_type,
+            "content_length": content_length,
+            "is_image": "image" in content_type.lower(),
+            "is_svg": "svg" in content_type.lower(),
+            "method": method,
+            "etag": response.headers.get("etag"),
+            "last_modified": response.headers.get("last-modified"),
+            "checked_at": time.time(),
+        })
+        return result
+
+    @staticmethod
+    def _head_is_final(response: httpx.Response) -> bool:
+        if response.status_code == 304 or response.status_code in HEAD_FINAL_STATUSES:
+            return True
+        return response.status_code < 400 and bool(response.headers.get("content-type"))
+
+    async def check_many(self, items: Iterable[Tuple[Optional[str], str]], store: Optional[ResultsStore] = None,
+                         max_age: float = DEFAULT_MAX_AGE_SECONDS) -> List[dict]:
+        """
+        Check (brand, url) pairs concurrently; results keep the input order.
+        With a store, fresh 200s are answered from it (from_store=True), the
+        rest are probed and written back.
+        """
+        async def one(brand: Optional[str], url: str) -> dict:
+            previous = store.get(url) if store is not None else None
+            if store is not None and store.is_fresh(previous, max_age):
+                return dict(previous, brand=brand, url=url, from_store=True)
+            result = await self.check(url, brand, previous)
+            if store is not None:
+                store.put(result)
+            return result
+        return await asyncio.gather(*(one(brand, url) for brand, url in items))
+
+def check_urls(items: Iterable[Tuple[Optional[str], str]], store_path: Optional[str] = None,
+               max_age: float = DEFAULT_MAX_AGE_SECONDS, **options) -> List[dict]:
+    """
+    Synchronous entry point: check (brand, url) pairs, options as for
+    LogoChecker. With store_path the results store is read first and saved after.
+    """
+    store = ResultsStore(store_path) if store_path else None
+
+    async def run():
+        async with LogoChecker(**options) as checker:
+            return await checker.check_many(items, store, max_age)
+    results = asyncio.run(run())
+    if store is not None:
+        store.save()
+    return results
+
+def describe_run(results: List[dict], elapsed: float) -> str:
+    """One-line summary of how much of a run the store and conditional requests saved"""
+    cached = sum(1 for r in results if r.get("from_store"))
+    not_modified = sum(1 for r in results if r.get("not_modified"))
+    return (f"Checked {len(results)} URLs in {elapsed:.1f}s: {cached} fresh in the store, "
+            f"{not_modified} not modified (304), {len(results) - cached - not_modified} probed in full")
+
+def main():
+    parser = argparse.ArgumentParser(description="Check logo URLs concurrently (HEAD first, GET fallback)")
+    parser.add_argument("urls", nargs="+")
+    parser.add_argument("--per-host", type=int, default=8, help="Concurrent requests per host")
+    parser.add_argument("--rate", type=float, default=50.0, help="Requests per second per host (0 = unlimited)")
+    parser.add_argument("--timeout", type=float, default=10.0)
+    parser.add_argument("--store", help="Results store (JSON) for incremental runs")
+    parser.add_argument("--max-age-hours", type=float, default=DEFAULT_MAX_AGE_SECONDS / 3600,
+                        help="Trust stored 200s younger than this without a request")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    results = check_urls([(None, url) for url in args.urls], store_path=args.store,
+                         max_age=args.max_age_hours * 3600, per_host=args.per_host,
+                         rate=args.rate, timeout=args.timeout)
+    for result in results:
+        print(json.dumps(result))
+    print(describe_run(results, time.perf_counter() - started))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Sync brand logos into the API's local logo store.
+
+Checks the URLs in brand_logos.json with logo_checker (sharing its results
+store), downloads every logo verified as an image, and writes it to the
+backend's LOGO_DIR as <brand-slug>.<sha256[:12]>.<ext>. It then rewrites
+manifest.json, which the API reads for /api/brand/{brand}/logo.
+
+- A brand whose URL is unchanged (fresh in the store or answered 304) and whose
+  file is on disk is not downloaded again.
+- A brand whose URL now fails keeps its last good file, so a CDN outage never
+  blanks the dashboard.
+- Files referenced by neither the new nor the previous manifest are removed.
+  The previous generation stays because clients may hold a cached redirect to it.
+
+Usage:
+    python sync_logos.py
+    python sync_logos.py --dest Backend/analytics_dashboard/logos --force
+"""
+from datetime import datetime, timezone
+from typing import Dict, List, Tuple
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import re
+import tempfile
+import time
+
+from logo_checker import DEFAULT_MAX_AGE_SECONDS, DEFAULT_STORE_PATH, LogoChecker, check_urls, describe_run
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_SOURCES = os.path.join(ROOT, "brand_logos.json")
+DEFAULT_DEST = os.path.join(ROOT, "Backend", "analytics_dashboard", "logos")
+MANIFEST_NAME = "manifest.json"
+
+EXTENSIONS = {
+    "image/svg+xml": "svg",
+    "image/png": "png",
+    "image/jpeg": "jpg",
+    "image/gif": "gif",
+    "image/webp": "webp",
+}
+LOGO_FILENAME = re.compile(r"^[a-z0-9_-]+\.[0-9a-f]{12}\.(svg|png|jpg|gif|webp)$")
+
+def slugify(brand: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "-", brand.lower()).strip("-")
+
+def write_atomic(path: str, data: bytes) -> None:
+    handle, staging = tempfile.mkstemp(prefix=".sync-", dir=os.path.dirname(path))
+    try:
+        with os.fdopen(handle, "wb") as f:
+            f.write(data)
+        os.chmod(staging, 0o644)  # readable by the nginx and API containers
+        os.replace(staging, path)
+    except Exception:
+        if os.path.exists(staging):
+            os.remove(staging)
+        raise
+
+def load_manifest(dest: str) -> Dict[str, dict]:
+    try:
+        with open(os.path.join(dest, MANIFEST_NAME)) as f:
+            return json.load(f).get("brands", {})
+    except (OSError, ValueError):
+        return {}
+
+async def download(items: List[Tuple[str, str]]) -> Dict[str, tuple]:
+    """{brand: (url, body, content_type)} for every download that succeeded"""
+    async with LogoChecker() as checker:
+        responses = await asyncio.gather(*(checker.fetch(url) for _, url in items), return_exceptions=True)
+    fetched = {}
+    for (brand, url), response in zip(items, responses):
+        if isinstance(response, Exception):
+            print(f"❌ {brand}: download failed ({response})")
+        elif response.status_code != 200:
+            print(f"❌ {brand}: download returned {response.status_code}")
+        else:
+            fetched[brand] = (url, response.content, response.headers.get("content-type", ""))
+    return fetched
+
+def main():
+    parser = argparse.ArgumentParser(description="Download verified brand logos into the API's logo directory")
+    parser.add_argument("--sources", default=DEFAULT_SOURCES, help="JSON object of brand -> logo URL")
+    parser.add_argument("--dest", default=DEFAULT_DEST, help="The API's LOGO_DIR")
+    parser.add_argument("--store", default=DEFAULT_STORE_PATH, help="logo_checker results store")
+    parser.add_argument("--max-age-hours", type=float, default=DEFAULT_MAX_AGE_SECONDS / 3600,
+                        help="Trust stored check results younger than this")
+    parser.add_argument("--force", action="store_true", help="Download every verified logo again")
+    args = parser.parse_args()
+
+    with open(args.sources) as f:
+        sources = json.load(f)
+    os.makedirs(args.dest, exist_ok=True)
+
+    started = time.perf_counter()
+    results = check_urls(sources.items(), store_path=args.store, max_age=args.max_age_hours * 3600)
+    print(describe_run(results, time.perf_counter() - started))
+
+    previous = load_manifest(args.dest)
+    brands: Dict[str, dict] = {}
+    to_fetch = []
+    for result in results:
+        brand, url = result["brand"], result["url"]
+        last = previous.get(brand)
+        if not (result["status_code"] == 200 and result["is_image"]):
+            if last is not None:
+                print(f"⚠️  {brand}: {url} failed ({result['status_code']}), keeping {last['file']}")
+                brands[brand] = last
+            else:
+                print(f"❌ {brand}: {url} failed ({result['status_code']}), no logo")
+            continue
+        unchanged = (result.get("from_store") or result.get("not_modified")) and last is not None \
+            and last.get("source_url") == url and os.path.isfile(os.path.join(args.dest, last["file"]))
+        if unchanged and not args.force:
+            brands[brand] = last
+        else:
+            to_fetch.append((brand, url))
+
+    written = 0
+    for brand, (url, body, content_type) in asyncio.run(download(to_fetch)).items():
+        media_type = content_type.split(";")[0].strip().lower()
+        extension = EXTENSIONS.get(media_type)
+        if extension is None:
+            print(f"❌ {brand}: unsupported content type {content_type!r}")
+            if brand in previous:
+                brands[brand] = previous[brand]
+            continue
+        digest = hashlib.sha256(body).hexdigest()
+        filename = f"{slugify(brand)}.{digest[:12]}.{extension}"
+        path = os.path.join(args.dest, filename)
+        if not os.path.exists(path):
+            write_atomic(path, body)
+            written += 1
+        brands[brand] = {
+            "file": filename,
+            "sha256": digest,
+            "content_type": media_type,
+            "bytes": len(body),
+            "source_url": url,
+            "synced_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        }
+    for brand, _ in to_fetch:
+        if brand not in brands and brand in previous:
+            brands[brand] = previous[brand]  # download failed: keep the last good file
+
+    manifest = {"generated_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                "brands": dict(sorted(brands.items()))}
+    write_atomic(os.path.join(args.dest, MANIFEST_NAME), json.dumps(manifest, indent=2).encode())
+
+    referenced = {entry["file"] for entry in brands.values()} | {entry["file"] for entry in previous.values()}
+    removed = 0
+    for entry in os.listdir(args.dest):
+        if LOGO_FILENAME.match(entry) and entry not in referenced:
+            os.remove(os.path.join(args.dest, entry))
+            removed += 1
+
+    print(f"\n✅ {len(brands)}/{len(sources)} brands have a logo; {written} new files, {removed} removed")
+    print(f"💾 Manifest written to {os.path.join(args.dest, MANIFEST_NAME)}")
+
+if __name__ == "__main__":
+    main()
@@ -3,9 +3,10 @@
 Test alternative URLs for broken brand logos
 """
 
-import requests
 import time
 
+from logo_checker import DEFAULT_STORE_PATH, check_urls, describe_run
+
 # Broken URLs that need alternatives
 broken_brands = {
     "VinFast": "https://worldvectorlogo.com/logo/vinfast-1",
@@ -45,31 +46,6 @@ alternative_patterns = [
     "https://brandlogo.net/wp-content/uploads/2015/11/{brand_lower}-logo-vector-400x400.png"
 ]
 
-def test_url(url, brand_name):
-    """Test a single URL"""
-    try:
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        }
-        response = requests.get(url, headers=headers, timeout=10, allow_redirects=True)
-        
-        is_image = 'image' in response.headers.get('content-type', '').lower()
-        
-        return {
-            'url': url,
-            'status_code': response.status_code,
-            'is_image': is_image,
-            'content_type': response.headers.get('content-type', ''),
-            'content_length': len(response.content)
-        }
-    except requests.exceptions.RequestException as e:
-        return {
-            'url': url,
-            'status_code': 'ERROR',
-            'error': str(e),
-            'is_image': False
-        }
-
 def generate_alternatives(brand):
     """Generate alternative URLs for a brand"""
     alternatives = []
@@ -98,7 +74,7 @@ def generate_alternatives(brand):
             except:
                 continue
     
-    return list(set(alternatives))  # Remove duplicates
+    return list(dict.fromkeys(alternatives))  # Remove duplicates, keep pattern order
 
 def main():
     """Main function to test alternatives"""
@@ -107,26 +83,26 @@ def main():
     
     working_alternatives = {}
     
-    for brand, original_url in broken_brands.items():
-        print(f"\n🔍 Testing alternatives for {brand}...")
+    # Every candidate of every brand in one concurrent batch
+    candidates = [(brand, url) for brand in broken_brands for url in generate_alternatives(brand)]
+    started = time.perf_counter()
+    results = check_urls(candidates, store_path=DEFAULT_STORE_PATH)
+    print(describe_run(results, time.perf_counter() - started))
+    
+    for brand in broken_brands:
+        print(f"\n🔍 Alternatives for {brand}...")
         print("-" * 50)
         
-        alternatives = generate_alternatives(brand)
         working_urls = []
-        
-        for i, url in enumerate(alternatives[:20]):  # Test first 20 alternatives
-            print(f"  Testing {i+1}/{len(alternatives[:20])}: {url}")
-            result = test_url(url, brand)
-            
+        for result in results:
+            if result['brand'] != brand:
+                continue
+            url = result['url']
             if result['status_code'] == 200 and result['is_image']:
-                print(f"    ✅ WORKING! (200, {result['content_type']})")
+                print(f"  ✅ WORKING! (200, {result['content_type']}): {url}")
                 working_urls.append(result)
             elif result['status_code'] == 200:
-                print(f"    ⚠️  OK but not image (200, {result['content_type']})")
-            else:
-                print(f"    ❌ Failed ({result['status_code']})")
-            
-            time.sleep(0.2)  # Be nice to servers
+                print(f"  ⚠️  OK but not image (200, {result['content_type']}): {url}")
         
         if working_urls:
             working_alternatives[brand] = working_urls[0]['url']  # Take first working one
@@ -3,9 +3,10 @@
 Test CDN URLs for brand logos
 """
 
-import requests
-import time
 import json
+import time
+
+from logo_checker import DEFAULT_STORE_PATH, check_urls, describe_run
 
 # Updated brand logos with CDN URLs
 brand_logos = {
@@ -52,36 +53,6 @@ brand_logos = {
     "GMC": "https://cdn.worldvectorlogo.com/logos/gmc-1.svg"
 }
 
-def test_url(url, brand_name):
-    """Test a single URL"""
-    try:
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        }
-        response = requests.get(url, headers=headers, timeout=10, allow_redirects=True)
-        
-        is_image = 'image' in response.headers.get('content-type', '').lower()
-        is_svg = 'svg' in response.headers.get('content-type', '').lower()
-        
-        return {
-            'brand': brand_name,
-            'url': url,
-            'status_code': response.status_code,
-            'is_image': is_image,
-            'is_svg': is_svg,
-            'content_type': response.headers.get('content-type', ''),
-            'content_length': len(response.content)
-        }
-    except requests.exceptions.RequestException as e:
-        return {
-            'brand': brand_name,
-            'url': url,
-            'status_code': 'ERROR',
-            'error': str(e),
-            'is_image': False,
-            'is_svg': False
-        }
-
 def main():
     """Main function to test CDN URLs"""
     print("🔍 Testing CDN URLs for brand logos...")
@@ -91,9 +62,10 @@ def main():
     working_urls = []
     broken_urls = []
     
-    for brand, url in brand_logos.items():
+    started = time.perf_counter()
+    for result in check_urls(brand_logos.items(), store_path=DEFAULT_STORE_PATH):
+        brand = result['brand']
         print(f"Testing {brand}...", end=" ")
-        result = test_url(url, brand)
         results.append(result)
         
         if result['status_code'] == 200 and (result['is_image'] or result['is_svg']):
@@ -105,9 +77,8 @@ def main():
         else:
             print(f"❌ FAILED ({result['status_code']})")
             broken_urls.append(result)
-        
-        time.sleep(0.2)  # Be nice to the CDN
     
+    print("\n" + describe_run(results, time.perf_counter() - started))
     print("\n" + "=" * 80)
     print("📊 SUMMARY")
     print("=" * 80)
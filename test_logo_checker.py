@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Tests for logo_checker against a local http.server stub (no network needed)
+
+Usage:
+    python test_logo_checker.py
+"""
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import asyncio
+import threading
+import time
+import unittest
+
+from logo_checker import LogoChecker
+
+SVG = b'<svg xmlns="http://www.w3.org/2000/svg"/>'
+
+class StubHandler(BaseHTTPRequestHandler):
+    """
+    /nohead/...   answers HEAD with 405, GET with an SVG
+    /slow/<ms>/.. waits <ms> before answering
+    anything else answers HEAD and GET with an SVG
+    """
+
+    def do_HEAD(self):
+        self._answer(body=False)
+
+    def do_GET(self):
+        self._answer(body=True)
+
+    def _answer(self, body: bool):
+        server = self.server
+        with server.lock:
+            server.requests.append((self.command, self.path, time.monotonic()))
+            server.in_flight += 1
+            server.max_in_flight = max(server.max_in_flight, server.in_flight)
+        try:
+            parts = self.path.strip("/").split("/")
+            if parts[0] == "slow":
+                time.sleep(int(parts[1]) / 1000)
+            if parts[0] == "nohead" and not body:
+                self.send_response(405)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", "image/svg+xml")
+            self.send_header("Content-Length", str(len(SVG)))
+            self.end_headers()
+            if body:
+                self.wfile.write(SVG)
+        finally:
+            with server.lock:
+                server.in_flight -= 1
+
+    def log_message(self, format, *args):
+        pass
+
+class LogoCheckerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+        self.server.daemon_threads = True
+        self.server.lock = threading.Lock()
+        self.server.requests = []
+        self.server.in_flight = self.server.max_in_flight = 0
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.base_url = f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def check_many(self, urls, **options):
+        async def run():
+            async with LogoChecker(**options) as checker:
+                return await checker.check_many([(None, url) for url in urls])
+        return asyncio.run(run())
+
+    def test_head_rejected_falls_back_to_get(self):
+        results = self.check_many([f"{self.base_url}/nohead/ford.svg"], rate=0)
+        self.assertEqual(results[0]["status_code"], 200)
+        self.assertEqual(results[0]["method"], "GET")
+        self.assertTrue(results[0]["is_svg"])
+        self.assertEqual(results[0]["content_length"], len(SVG))
+        self.assertEqual([r[:2] for r in self.server.requests],
+                         [("HEAD", "/nohead/ford.svg"), ("GET", "/nohead/ford.svg")])
+
+    def test_host_rejecting_head_only_gets_get(self):
+        urls = [f"{self.base_url}/nohead/{brand}.svg" for brand in ("ford", "kia", "audi", "bmw")]
+        results = self.check_many(urls, per_host=1, rate=0)
+        self.assertTrue(all(r["method"] == "GET" and r["status_code"] == 200 for r in results))
+        heads = [path for method, path, _ in self.server.requests if method == "HEAD"]
+        self.assertEqual(heads, ["/nohead/ford.svg"])
+
+    def test_head_answer_is_final(self):
+        results = self.check_many([f"{self.base_url}/kia.svg"], rate=0)
+        self.assertEqual(results[0]["method"], "HEAD")
+        self.assertEqual([r[0] for r in self.server.requests], ["HEAD"])
+
+    def test_per_host_concurrency_bound(self):
+        urls = [f"{self.base_url}/slow/100/{i}.svg" for i in range(8)]
+        results = self.check_many(urls, per_host=2, rate=0)
+        self.assertTrue(all(r["status_code"] == 200 for r in results))
+        self.assertEqual(self.server.max_in_flight, 2)
+
+    def test_token_bucket_pacing(self):
+        rate, burst, count = 20.0, 2, 8
+        urls = [f"{self.base_url}/{i}.svg" for i in range(count)]
+        self.check_many(urls, per_host=count, rate=rate, burst=burst)
+        started = [at for _, _, at in self.server.requests]
+        self.assertEqual(len(started), count)
+        # The burst goes at once, every later request waits for a token
+        elapsed = max(started) - min(started)
+        self.assertGreaterEqual(elapsed, (count - burst) / rate * 0.9)
+        self.assertLess(elapsed, (count - burst) / rate + 1.0)
+
+    def test_results_keep_input_order(self):
+        # The first URL answers last
+        urls = [f"{self.base_url}/slow/{ms}/{i}.svg" for i, ms in enumerate((300, 200, 100, 0))]
+        results = self.check_many(urls, per_host=4, rate=0)
+        self.assertEqual([r["url"] for r in results], urls)
+
+if __name__ == "__main__":
+    unittest.main()
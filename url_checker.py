@@ -4,10 +4,10 @@ Brand Logo URL Checker
 Checks all brand logo URLs for 404 errors and other HTTP status codes.
 """
 
-import requests
-import time
-from urllib.parse import urlparse
 import json
+import time
+
+from logo_checker import DEFAULT_STORE_PATH, check_urls, describe_run
 
 # Brand logos mapping from the frontend
 brand_logos = {
@@ -54,31 +54,6 @@ brand_logos = {
     "GMC": "https://worldvectorlogo.com/logo/gmc-1"
 }
 
-def check_url(url, brand_name):
-    """Check a single URL and return the status"""
-    try:
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        }
-        response = requests.get(url, headers=headers, timeout=10, allow_redirects=True)
-        return {
-            'brand': brand_name,
-            'url': url,
-            'status_code': response.status_code,
-            'final_url': response.url,
-            'content_type': response.headers.get('content-type', ''),
-            'content_length': len(response.content),
-            'is_image': 'image' in response.headers.get('content-type', '').lower()
-        }
-    except requests.exceptions.RequestException as e:
-        return {
-            'brand': brand_name,
-            'url': url,
-            'status_code': 'ERROR',
-            'error': str(e),
-            'is_image': False
-        }
-
 def main():
     """Main function to check all URLs"""
     print("🔍 Checking all brand logo URLs for 404 errors...")
@@ -88,9 +63,10 @@ def main():
     working_urls = []
     broken_urls = []
     
-    for brand, url in brand_logos.items():
+    started = time.perf_counter()
+    for result in check_urls(brand_logos.items(), store_path=DEFAULT_STORE_PATH):
+        brand = result['brand']
         print(f"Checking {brand}...", end=" ")
-        result = check_url(url, brand)
         results.append(result)
         
         if result['status_code'] == 200 and result['is_image']:
@@ -102,9 +78,8 @@ def main():
         else:
             print(f"❌ FAILED ({result['status_code']})")
             broken_urls.append(result)
-        
-        time.sleep(0.5)  # Be nice to the servers
     
+    print("\n" + describe_run(results, time.perf_counter() - started))
     print("\n" + "=" * 80)
     print("📊 SUMMARY")
     print("=" * 80)